@@ -0,0 +1,163 @@
+"""Parallel k-fold cross-validation of the surrogates on the COMSOL results.
+
+Instead of one train_test_split(random_state=42), every model is scored on k
+folds, optionally repeated and stratified by Th x rho_c bins. The data
+matrix is placed once in shared memory; worker processes attach to it by
+name and only fold indices travel through the task queue. Each worker is
+limited to one BLAS (and torch) thread, so folds scale across processes.
+
+    python cross_validation.py --model mlp --folds 5 --repeats 2 --stratify
+    python cross_validation.py --model multifidelity --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RepeatedKFold, RepeatedStratifiedKFold
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from comsol_results import INPUT_COLS, add_derived_metrics, load_results  # noqa: E402
+
+OUTPUT_COLS = ['V_diff', 'PDmax', 'flux (W)']
+
+
+def fit_mlp(X_train, y_train, X_test, seed):
+    """MinMax-scaled (64, 64) MLPRegressor, as in ANN_Train_Normalize_5000Sim.py."""
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.preprocessing import MinMaxScaler
+
+    rho = INPUT_COLS.index('rho_c')
+    X_train, X_test = X_train.copy(), X_test.copy()
+    for X in (X_train, X_test):
+        X[:, rho] = X[:, rho].clip(1e-9, 1e-7)
+    scaler_X, scaler_y = MinMaxScaler(), MinMaxScaler()
+    model = MLPRegressor(hidden_layer_sizes=(64, 64), activation='relu', max_iter=2000, random_state=seed)
+    model.fit(scaler_X.fit_transform(X_train), scaler_y.fit_transform(y_train))
+    return scaler_y.inverse_transform(model.predict(scaler_X.transform(X_test)).reshape(len(X_test), -1))
+
+
+def fit_multifidelity(X_train, y_train, X_test, seed):
+    """Analytic model plus learned correction (multifidelity.py); needs OUTPUT_COLS as outputs."""
+    import torch
+    from multifidelity import Surrogate
+
+    torch.set_num_threads(1)
+    return Surrogate().fit(X_train, y_train, seed=seed).predict(X_test)
+
+
+MODELS = {'mlp': fit_mlp, 'multifidelity': fit_multifidelity}
+
+# Worker-process state: views on the shared data matrix
+_shared = {}
+
+
+def _attach(name, shape, n_inputs):
+    """Pool initializer: map the shared matrix and pin every worker to one BLAS thread."""
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+    block = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    _shared.update(block=block, X=data[:, :n_inputs], y=data[:, n_inputs:])
+
+
+def _run_fold(model, repeat, fold, train, test, seed):
+    X, y = _shared['X'], _shared['y']
+    start, cpu_start = time.perf_counter(), time.process_time()
+    y_pred = MODELS[model](X[train], y[train], X[test], seed)
+    seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+
+    y_true = y[test]
+    with np.errstate(divide='ignore'):
+        relative = np.median(np.abs(y_pred / y_true - 1), axis=0)
+    r2 = 1 - ((y_true - y_pred)**2).sum(axis=0) / ((y_true - y_true.mean(axis=0))**2).sum(axis=0)
+    rmse = np.sqrt(((y_true - y_pred)**2).mean(axis=0))
+    return [{'repeat': repeat, 'fold': fold, 'output': j, 'R2': r2[j], 'RMSE': rmse[j], 'median |error|': relative[j],
+             'train rows': len(train), 'test rows': len(test), 'seconds': seconds, 'cpu seconds': cpu_seconds, 'pid': os.getpid()}
+            for j in range(y.shape[1])]
+
+
+def strata(df, bins=4):
+    """Th x log rho_c quantile-bin labels, for folds with the same temperature/contact mix."""
+    th = pd.qcut(df['Th (K)'], bins, labels=False)
+    rho = pd.qcut(np.log10(df['rho_c']), bins, labels=False)
+    return (th * bins + rho).to_numpy()
+
+
+def cross_validate(model='mlp', folds=5, repeats=1, stratify=False, workers=None, seed=42,
+                   results=None, outputs=OUTPUT_COLS):
+    """
+    Score a model on every fold in parallel.
+
+    Parameters:
+        model (str): key of MODELS.
+        folds, repeats (int): k and number of reshuffled repetitions.
+        stratify (bool): stratify folds by Th x rho_c bins.
+        workers (int): worker processes (None = all cores).
+        seed (int): fold shuffling and model seed.
+        results (DataFrame): COMSOL results (default: comsol_results_with_efficiency.csv).
+        outputs (list): target columns.
+
+    Returns:
+        DataFrame: per fold and output, R2, RMSE, median relative error, fit
+        wall/CPU time and worker pid.
+        dict: wall-clock seconds, summed fold CPU seconds and their ratio (parallel speed-up).
+    """
+    df = add_derived_metrics(load_results() if results is None else results)
+    data = df[INPUT_COLS + list(outputs)].to_numpy(dtype=np.float64)
+
+    if stratify:
+        splits = RepeatedStratifiedKFold(n_splits=folds, n_repeats=repeats, random_state=seed).split(data, strata(df))
+    else:
+        splits = RepeatedKFold(n_splits=folds, n_repeats=repeats, random_state=seed).split(data)
+    tasks = [(model, i // folds, i % folds, train, test, seed) for i, (train, test) in enumerate(splits)]
+
+    block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)[:] = data
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(block.name, data.shape, len(INPUT_COLS))) as pool:
+            rows = [row for fold in pool.map(_run_fold, *zip(*tasks)) for row in fold]
+        wall = time.perf_counter() - start
+    finally:
+        block.close()
+        block.unlink()
+
+    table = pd.DataFrame(rows)
+    table['output'] = np.asarray(outputs)[table['output']]
+    # CPU time, since folds sharing a core would overlap in wall-clock time
+    fold_seconds = table.drop_duplicates(['repeat', 'fold'])['cpu seconds'].sum()
+    timing = {'wall seconds': wall, 'fold cpu seconds': fold_seconds, 'speed-up': fold_seconds / wall,
+              'workers': table['pid'].nunique()}
+    return table, timing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='mlp', choices=list(MODELS))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--stratify', action='store_true', help='stratify by Th x rho_c bins')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='per-fold metrics CSV')
+    args = parser.parse_args()
+
+    table, timing = cross_validate(args.model, args.folds, args.repeats, args.stratify, args.workers, args.seed)
+    summary = table.groupby('output')[['R2', 'RMSE', 'median |error|']].agg(['mean', 'std'])
+    print(summary.round(4).to_string())
+    print(f"\n{len(table) // table['output'].nunique()} folds on {timing['workers']} workers: "
+          f"{timing['wall seconds']:.1f} s wall, {timing['fold cpu seconds']:.1f} CPU s of fitting "
+          f"(speed-up {timing['speed-up']:.2f}x)")
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"Per-fold metrics saved: {args.out}")
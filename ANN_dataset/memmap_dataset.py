@@ -0,0 +1,281 @@
+"""Sharded, memory-mapped training data for the TEG surrogate.
+
+A dataset directory holds pre-scaled float32 shards (X_00000.npy, y_00000.npy,
+...) and a meta.json with the column names, shard sizes and scaler statistics.
+Statistics are gathered in one streaming pass and the shards written in a
+second, so building and training both run in bounded memory.
+
+Build shards from a CSV, or from raw shards written by synthetic_data_gen.py:
+    python memmap_dataset.py TEG_data.csv teg_shards --rows-per-shard 1000000
+    python memmap_dataset.py synthetic_raw synthetic_shards
+
+Fine-tuning data must be scaled like the pretraining data; --derived adds
+V_diff and the other comsol_results.add_derived_metrics columns to the CSV:
+    python memmap_dataset.py comsol_results_with_efficiency.csv comsol_shards --scaling-from synthetic_shards \
+        --derived --inputs "LHT (mm)" "HIC (mm)" ... --outputs V_diff PDmax "flux (W)"
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Columns used by export_model.py
+INPUT_COLS = ['H_Copper (mm)', 'H_leg (mm)', 'Width_leg_p (mm)', 'Width_leg_n (mm)', 'Delta_T (K)', 'rho_c']
+OUTPUT_COLS = ['Power Output (Watts)', 'Voltage (V)']
+
+
+def csv_chunks(csv_path, input_cols=INPUT_COLS, output_cols=OUTPUT_COLS, chunksize=500_000, derived=False):
+    """
+    Return a callable that yields (X, y) float64 chunks from a CSV on every call.
+
+    With derived=True the CSV is a COMSOL results table and the columns of
+    comsol_results.add_derived_metrics (V_diff, efficiency, Power_W, ...) can be selected too.
+    """
+    def chunks():
+        if derived:
+            from comsol_results import add_derived_metrics
+
+        for chunk in pd.read_csv(csv_path, usecols=None if derived else input_cols + output_cols,
+                                 chunksize=chunksize):
+            if derived:
+                chunk.columns = chunk.columns.str.strip()
+                chunk = add_derived_metrics(chunk)
+            yield chunk[input_cols].to_numpy(dtype=float), chunk[output_cols].to_numpy(dtype=float)
+    return chunks
+
+
+def shard_chunks(shard_dir):
+    """Return a callable that yields the (X, y) arrays of an existing shard directory."""
+    meta = load_meta(shard_dir)
+
+    def chunks():
+        for shard in meta['shards']:
+            yield (np.load(Path(shard_dir) / shard['X'], mmap_mode='r'),
+                   np.load(Path(shard_dir) / shard['y'], mmap_mode='r'))
+    return chunks
+
+
+class RunningStats:
+    """Column-wise count, mean, variance (Chan et al. merge), min and max over streamed chunks."""
+
+    def __init__(self, n_cols):
+        self.count = 0
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean)**2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + m2 + delta**2 * self.count * n / total
+        self.count = total
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+
+    def scaler(self, kind):
+        """Offset and scale such that (x - offset) / scale is standardized or in [0, 1]."""
+        if kind == 'standard':
+            offset, scale = self.mean, np.sqrt(self.m2 / self.count)
+        elif kind == 'minmax':
+            offset, scale = self.min, self.max - self.min
+        else:
+            raise ValueError(f"Unknown scaling: {kind}")
+        return {'kind': kind, 'offset': offset.tolist(), 'scale': np.where(scale > 0, scale, 1.0).tolist(),
+                'mean': self.mean.tolist(), 'std': np.sqrt(self.m2 / self.count).tolist(),
+                'min': self.min.tolist(), 'max': self.max.tolist(), 'count': self.count}
+
+
+def build_shards(chunks, out_dir, input_cols=INPUT_COLS, output_cols=OUTPUT_COLS, rows_per_shard=1_000_000,
+                 x_scaling='minmax', y_scaling='standard', extra_meta=None, scalers=None):
+    """
+    Write pre-scaled float32 shards from a chunk source in two streaming passes.
+
+    Inputs default to [0, 1] scaling (what export_model.py ends up feeding the
+    network) and outputs to standardization.
+
+    Parameters:
+        chunks (callable): returns a fresh iterator of (X, y) chunks, e.g. csv_chunks(...).
+        out_dir (str or Path): dataset directory to create.
+        rows_per_shard (int): rows per .npy file.
+        extra_meta (dict): stored under 'provenance' in meta.json.
+        scalers (dict): meta of an existing dataset whose x_scaler / y_scaler
+            are reused instead of fitting new ones (for fine-tuning sets); its
+            inputs and outputs must be input_cols and output_cols, in order.
+
+    Returns:
+        dict: the dataset metadata.
+
+    Raises:
+        ValueError: the columns of `scalers` differ from input_cols / output_cols.
+    """
+    if scalers is not None:
+        for kind, cols in (('inputs', input_cols), ('outputs', output_cols)):
+            if list(scalers[kind]) != list(cols):
+                raise ValueError(f"Scaler {kind} {list(scalers[kind])} do not match the dataset's {list(cols)}")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Pass 1: scaler statistics
+    x_stats, y_stats = RunningStats(len(input_cols)), RunningStats(len(output_cols))
+    for X, y in chunks():
+        x_stats.update(X)
+        y_stats.update(y)
+    if scalers is None:
+        x_scaler, y_scaler = x_stats.scaler(x_scaling), y_stats.scaler(y_scaling)
+    else:
+        x_scaler, y_scaler = scalers['x_scaler'], scalers['y_scaler']
+    x_offset, x_scale = np.array(x_scaler['offset']), np.array(x_scaler['scale'])
+    y_offset, y_scale = np.array(y_scaler['offset']), np.array(y_scaler['scale'])
+
+    # Pass 2: scale and write, filling each shard across chunk boundaries
+    total = x_stats.count
+    shards = []
+    X_out = y_out = None
+    filled = 0
+    for X, y in chunks():
+        X = (np.asarray(X) - x_offset) / x_scale
+        y = (np.asarray(y) - y_offset) / y_scale
+        start = 0
+        while start < len(X):
+            if X_out is None:
+                rows = min(rows_per_shard, total - sum(s['rows'] for s in shards))
+                name = f"{len(shards):05d}"
+                X_out = np.lib.format.open_memmap(out_dir / f"X_{name}.npy", mode='w+', dtype=np.float32,
+                                                  shape=(rows, len(input_cols)))
+                y_out = np.lib.format.open_memmap(out_dir / f"y_{name}.npy", mode='w+', dtype=np.float32,
+                                                  shape=(rows, len(output_cols)))
+                shards.append({'X': f"X_{name}.npy", 'y': f"y_{name}.npy", 'rows': rows})
+                filled = 0
+            n = min(len(X) - start, len(X_out) - filled)
+            X_out[filled:filled + n] = X[start:start + n]
+            y_out[filled:filled + n] = y[start:start + n]
+            filled += n
+            start += n
+            if filled == len(X_out):
+                X_out.flush()
+                y_out.flush()
+                X_out = y_out = None
+
+    meta = {
+        'inputs': list(input_cols),
+        'outputs': list(output_cols),
+        'rows': total,
+        'shards': shards,
+        'x_scaler': x_scaler,
+        'y_scaler': y_scaler,
+        'provenance': extra_meta or {},
+    }
+    (out_dir / 'meta.json').write_text(json.dumps(meta, indent=2))
+    return meta
+
+
+def load_meta(shard_dir):
+    return json.loads((Path(shard_dir) / 'meta.json').read_text())
+
+
+class ShardedDataset(torch.utils.data.Dataset):
+    """
+    Memory-mapped view of a shard directory.
+
+    Indexing takes a (shard, row indices) pair as produced by ShardBatchSampler
+    and returns one (X, y) tensor batch; only the touched pages are read.
+    """
+
+    def __init__(self, shard_dir):
+        self.shard_dir = Path(shard_dir)
+        self.meta = load_meta(shard_dir)
+        self.shard_rows = [s['rows'] for s in self.meta['shards']]
+        self._X = self._y = None
+
+    def _open(self):
+        # Opened lazily so that each DataLoader worker maps the files itself
+        self._X = [np.load(self.shard_dir / s['X'], mmap_mode='r') for s in self.meta['shards']]
+        self._y = [np.load(self.shard_dir / s['y'], mmap_mode='r') for s in self.meta['shards']]
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, item):
+        if self._X is None:
+            self._open()
+        shard, rows = item
+        return torch.from_numpy(self._X[shard][rows]), torch.from_numpy(self._y[shard][rows])
+
+    def inverse_transform_y(self, y):
+        scaler = self.meta['y_scaler']
+        return np.asarray(y) * np.array(scaler['scale']) + np.array(scaler['offset'])
+
+
+class ShardBatchSampler(torch.utils.data.Sampler):
+    """
+    Shuffled mini-batches that stay within one shard at a time.
+
+    Each epoch visits the shards in random order and permutes the rows inside
+    each shard, so reads stay local to one file while every row is still seen
+    once per epoch. Row indices are sorted within a batch for sequential access.
+    """
+
+    def __init__(self, shard_rows, batch_size, shuffle=True, seed=0, shards=None):
+        self.shard_rows = shard_rows
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.shards = list(range(len(shard_rows))) if shards is None else list(shards)
+        self.rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+        order = self.rng.permutation(self.shards) if self.shuffle else self.shards
+        for shard in order:
+            rows = self.rng.permutation(self.shard_rows[shard]) if self.shuffle else np.arange(self.shard_rows[shard])
+            for start in range(0, len(rows), self.batch_size):
+                yield int(shard), np.sort(rows[start:start + self.batch_size])
+
+    def __len__(self):
+        return sum(-(-self.shard_rows[s] // self.batch_size) for s in self.shards)
+
+
+def make_loader(shard_dir, batch_size=4096, shuffle=True, seed=0, shards=None, num_workers=0):
+    """DataLoader streaming shuffled mini-batches from a shard directory."""
+    dataset = ShardedDataset(shard_dir)
+    sampler = ShardBatchSampler(dataset.shard_rows, batch_size, shuffle, seed, shards)
+    return torch.utils.data.DataLoader(dataset, sampler=sampler, batch_size=None, num_workers=num_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build memory-mapped training shards from a CSV or raw shards")
+    parser.add_argument('source', help='CSV file or directory of raw shards')
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows-per-shard', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    parser.add_argument('--inputs', nargs='+', default=INPUT_COLS, help='CSV input columns')
+    parser.add_argument('--outputs', nargs='+', default=OUTPUT_COLS, help='CSV output columns')
+    parser.add_argument('--scaling-from', help='reuse the scalers of this shard directory')
+    parser.add_argument('--derived', action='store_true',
+                        help='add the COMSOL derived metrics (V_diff, efficiency, Power_W) to the CSV columns')
+    args = parser.parse_args()
+
+    if Path(args.source).is_dir():
+        source_meta = load_meta(args.source)
+        chunks, inputs, outputs = shard_chunks(args.source), source_meta['inputs'], source_meta['outputs']
+        provenance = dict(source_meta.get('provenance', {}), source=str(args.source))
+    else:
+        chunks = csv_chunks(args.source, args.inputs, args.outputs, args.chunksize, args.derived)
+        inputs, outputs, provenance = args.inputs, args.outputs, {'source': str(args.source)}
+    scalers = load_meta(args.scaling_from) if args.scaling_from else None
+    meta = build_shards(chunks, args.out_dir, inputs, outputs, args.rows_per_shard,
+                        extra_meta=provenance, scalers=scalers)
+    print(f"✔ {meta['rows']} rows in {len(meta['shards'])} shards saved: {args.out_dir}")
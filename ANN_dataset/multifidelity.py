@@ -0,0 +1,244 @@
+"""Multi-fidelity surrogate: analytic unicouple model plus a learned COMSOL residual.
+
+teg_model.unicouple_performance gives the couple voltage, PDmax and the
+hot-side heat flow in closed form; a small network learns how COMSOL departs
+from it, as rho * analytic + delta(sweep parameters, analytic). The comparison
+trains it and a from-scratch TEGModel-sized network on growing subsets of
+comsol_results_with_efficiency.csv and scores both on the same held-out runs.
+With 3.3x fewer parameters the multi-fidelity model has smaller median
+errors on small training sets but a lower R² for PDmax at every size (and
+for V_diff from 500 rows on), and no faster inference, because each row also
+runs the analytic model.
+
+    python multifidelity.py --compare
+    python multifidelity.py --out multifidelity.pt
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from comsol_results import INPUT_COLS, add_derived_metrics, load_results, to_unit  # noqa: E402
+from teg_model import unicouple_performance  # noqa: E402
+
+# COMSOL column -> unicouple_performance output. The couple voltage is
+# V_diff = Voc - Vn; the COMSOL Voc column is a single terminal potential.
+OUTPUTS = {'V_diff': 'voc', 'PDmax': 'pd_max', 'flux (W)': 'q_hot'}
+# Outputs spanning decades, modelled in log space (V_diff is nearly constant with a few near-zero runs)
+LOG_OUTPUTS = ['PDmax', 'flux (W)']
+
+
+def analytic(X):
+    """Closed-form predictions (n, 3) for rows ordered as INPUT_COLS."""
+    result = unicouple_performance(*np.asarray(X, dtype=float).T)
+    return np.column_stack([result[key] for key in OUTPUTS.values()])
+
+
+def mlp(input_dim, output_dim, hidden):
+    layers, width = [], input_dim
+    for size in hidden:
+        layers += [torch.nn.Linear(width, size), torch.nn.ReLU()]
+        width = size
+    return torch.nn.Sequential(*layers, torch.nn.Linear(width, output_dim))
+
+
+class FidelityNet(torch.nn.Module):
+    """rho * low + network(x, low) in standardized units; just network(x) without a low-fidelity input."""
+
+    def __init__(self, input_dim, output_dim, hidden, low_fidelity=True, rho=None):
+        super().__init__()
+        self.network = mlp(input_dim + (output_dim if low_fidelity else 0), output_dim, hidden)
+        rho = torch.ones(output_dim) if rho is None else torch.as_tensor(rho, dtype=torch.float32)
+        self.rho = torch.nn.Parameter(rho) if low_fidelity else None
+
+    def forward(self, x, low=None):
+        if self.rho is None:
+            return self.network(x)
+        return self.rho * low + self.network(torch.cat([x, low], dim=1))
+
+
+class Surrogate:
+    """
+    Network on the unit-cube sweep parameters, trained full-batch with Adam
+    and early stopping on a validation split.
+
+    With multi_fidelity=True the outputs (LOG_OUTPUTS in log space) are
+    modelled as rho * analytic + delta(x, analytic), with rho learned per
+    output, so the network only has to learn what the analytic model misses
+    and can discount it where it is uninformative. With False it learns the
+    outputs from scratch, as TEGModel does.
+
+    Parameters:
+        hidden (tuple): hidden layer widths.
+        multi_fidelity (bool): use the analytic model.
+    """
+
+    def __init__(self, hidden=(32, 32), multi_fidelity=True):
+        self.hidden = tuple(hidden)
+        self.multi_fidelity = multi_fidelity
+        self.net = None
+
+    def _g(self, values):
+        return np.where(self.log, np.log(np.where(self.log, values, 1.0)), values)
+
+    def _inputs(self, X):
+        x = torch.tensor(to_unit(X), dtype=torch.float32)
+        if not self.multi_fidelity:
+            return x, None
+        low = (self._g(analytic(X)) - self.low_mean) / self.low_std
+        return x, torch.tensor(low, dtype=torch.float32)
+
+    def fit(self, X, y, epochs=3000, lr=0.01, val_fraction=0.1, patience=300, seed=0):
+        X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+        if self.multi_fidelity:
+            base = analytic(X)
+            self.log = np.isin(list(OUTPUTS), LOG_OUTPUTS) & ((y > 0) & (base > 0)).all(axis=0)
+            low = self._g(base)
+            self.low_mean, self.low_std = low.mean(axis=0), low.std(axis=0)
+        else:
+            self.log = np.zeros(y.shape[1], dtype=bool)
+        g = self._g(y)
+        self.y_mean, self.y_std = g.mean(axis=0), g.std(axis=0)
+        self.g_min, self.g_max = g.min(axis=0), g.max(axis=0)
+
+        torch.manual_seed(seed)
+        val = torch.tensor(np.random.default_rng(seed).random(len(X)) < val_fraction)
+        x, low = self._inputs(X)
+        target = torch.tensor((g - self.y_mean) / self.y_std, dtype=torch.float32)
+        # Start rho at the least-squares slope (the correlation, in standardized units)
+        rho = None if low is None else (low * target)[~val].mean(dim=0)
+        self.net = FidelityNet(x.shape[1], target.shape[1], self.hidden, self.multi_fidelity, rho)
+        optimizer = torch.optim.Adam(self.net.parameters(), lr=lr)
+        criterion = torch.nn.MSELoss()
+
+        def forward(rows):
+            return self.net(x[rows], None if low is None else low[rows])
+
+        best, best_state, since_best = np.inf, None, 0
+        for epoch in range(epochs):
+            self.net.train()
+            optimizer.zero_grad()
+            loss = criterion(forward(~val), target[~val])
+            loss.backward()
+            optimizer.step()
+
+            self.net.eval()
+            with torch.no_grad():
+                val_loss = criterion(forward(val), target[val]).item()
+            if val_loss < best:
+                best, since_best = val_loss, 0
+                best_state = {k: v.clone() for k, v in self.net.state_dict().items()}
+            else:
+                since_best += 1
+                if since_best > patience:
+                    break
+        self.net.load_state_dict(best_state)
+        self.net.eval()
+        self.epochs = epoch + 1
+        return self
+
+    def predict(self, X):
+        """Outputs (n, 3) ordered as OUTPUTS for rows ordered as INPUT_COLS."""
+        with torch.no_grad():
+            z = self.net(*self._inputs(np.asarray(X, dtype=float))).numpy()
+        # Never extrapolate beyond the range of the training runs
+        g = np.clip(z * self.y_std + self.y_mean, self.g_min, self.g_max)
+        return np.where(self.log, np.exp(np.where(self.log, g, 0.0)), g)
+
+    @property
+    def rho(self):
+        return None if self.net.rho is None else self.net.rho.detach().numpy()
+
+    @property
+    def n_parameters(self):
+        return sum(p.numel() for p in self.net.parameters())
+
+    _STATE = ('log', 'y_mean', 'y_std', 'g_min', 'g_max', 'low_mean', 'low_std')
+
+    def save(self, path):
+        state = {key: getattr(self, key) for key in self._STATE if hasattr(self, key)}
+        torch.save({'state_dict': self.net.state_dict(), 'hidden': self.hidden,
+                    'multi_fidelity': self.multi_fidelity, 'outputs': list(OUTPUTS), **state}, path)
+
+    @classmethod
+    def load(cls, path):
+        saved = torch.load(path, weights_only=False)
+        model = cls(saved['hidden'], saved['multi_fidelity'])
+        for key in cls._STATE:
+            if key in saved:
+                setattr(model, key, saved[key])
+        model.net = FidelityNet(len(INPUT_COLS), len(OUTPUTS), model.hidden, model.multi_fidelity)
+        model.net.load_state_dict(saved['state_dict'])
+        model.net.eval()
+        return model
+
+
+def scores(y_true, y_pred):
+    """Median relative error and R² per output."""
+    with np.errstate(divide='ignore'):
+        relative = np.median(np.abs(y_pred / y_true - 1), axis=0)
+    r2 = 1 - ((y_true - y_pred)**2).sum(axis=0) / ((y_true - y_true.mean(axis=0))**2).sum(axis=0)
+    return relative, r2
+
+
+def compare(hidden=(32, 32), sizes=(250, 500, 1000, 2000, None), test_fraction=0.2, seed=0):
+    """
+    Held-out accuracy of the analytic model, the multi-fidelity surrogate and
+    a from-scratch 64x64 network for several training-set sizes.
+
+    Returns:
+        DataFrame: one row per (model, training rows, output).
+    """
+    df = add_derived_metrics(load_results())
+    X, y = df[INPUT_COLS].to_numpy(dtype=float), df[list(OUTPUTS)].to_numpy(dtype=float)
+    order = np.random.default_rng(seed).permutation(len(df))
+    n_test = int(len(df) * test_fraction)
+    test, pool = order[:n_test], order[n_test:]
+
+    rows = []
+
+    def record(name, n_train, model, predict):
+        start = time.perf_counter()
+        y_pred = predict(X[test])
+        seconds = time.perf_counter() - start
+        for col, rel, r2 in zip(OUTPUTS, *scores(y[test], y_pred)):
+            rows.append({'model': name, 'training rows': n_train, 'output': col, 'median |error|': rel, 'R2': r2,
+                         'parameters': model.n_parameters if model else 0,
+                         'inference (µs/row)': seconds / n_test * 1e6})
+
+    record('analytic', 0, None, analytic)
+    for size in sizes:
+        train = pool[:size]
+        multi = Surrogate(hidden).fit(X[train], y[train], seed=seed)
+        record(f"multi-fidelity {'x'.join(map(str, hidden))}", len(train), multi, multi.predict)
+        direct = Surrogate((64, 64), multi_fidelity=False).fit(X[train], y[train], seed=seed)
+        record('from scratch 64x64', len(train), direct, direct.predict)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--compare', action='store_true', help='learning curves against the from-scratch network')
+    parser.add_argument('--hidden', type=int, nargs='+', default=[32, 32])
+    parser.add_argument('--out', default='multifidelity.pt')
+    args = parser.parse_args()
+
+    if args.compare:
+        table = compare(args.hidden)
+        pd.set_option('display.width', 160)
+        print(table.pivot_table(index=['model', 'training rows'], columns='output',
+                                values=['median |error|', 'R2']).round(3).to_string())
+        print(table.groupby('model')[['parameters', 'inference (µs/row)']].max().round(2).to_string())
+    else:
+        df = add_derived_metrics(load_results())
+        model = Surrogate(args.hidden).fit(df[INPUT_COLS].to_numpy(dtype=float), df[list(OUTPUTS)].to_numpy(dtype=float))
+        model.save(args.out)
+        print(f"Multi-fidelity surrogate ({model.n_parameters} parameters, {model.epochs} epochs, "
+              f"rho {np.round(model.rho, 3).tolist()}) saved: {args.out}")
@@ -0,0 +1,130 @@
+"""Generate labelled synthetic sweeps from the analytic unicouple model.
+
+Samples the same seven-parameter space as 5000parameter_gen.ipynb (uniform,
+log-uniform rho_c) and labels every point with teg_model.unicouple_performance,
+writing raw float32 shards in the memmap_dataset.py layout. Each shard is
+produced by its own process from a spawned SeedSequence, so the output is
+reproducible for a given seed regardless of the number of workers.
+
+    python synthetic_data_gen.py synthetic_raw --samples 10000000 --workers 8
+    python memmap_dataset.py synthetic_raw synthetic_shards
+"""
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from comsol_results import INPUT_COLS, SWEEP_PARAMS, scale_unit  # noqa: E402
+from teg_model import PBTE_SNSE, T_COLD_COMSOL, unicouple_performance  # noqa: E402
+
+# Labels named after the COMSOL results columns so that fine-tuning data lines up. The
+# analytic couple voltage is V_diff = Voc - Vn (comsol_results.add_derived_metrics);
+# the COMSOL Voc column alone is a single terminal potential.
+OUTPUT_COLS = ['V_diff', 'PDmax', 'flux (W)']
+MODEL = 'teg_model.unicouple_performance'
+
+
+def model_version():
+    """Short hash of teg_model.py, so shards record exactly which physics labelled them."""
+    return hashlib.sha256((ROOT / 'teg_model.py').read_bytes()).hexdigest()[:12]
+
+
+def generate_block(seed_seq, n):
+    """Sample n sweep points and their analytic labels."""
+    rng = np.random.default_rng(seed_seq)
+    X = scale_unit(rng.random((n, len(SWEEP_PARAMS))))
+    LHT, HIC, w_p, w_n, FF, rho_c, Th = X.T
+    result = unicouple_performance(LHT, HIC, w_p, w_n, FF, rho_c, Th)
+    y = np.column_stack([result['voc'], result['pd_max'], result['q_hot']])
+    return X, y
+
+
+def write_shard(out_dir, index, seed_seq, rows, block_size):
+    """Fill one shard block by block; runs in a worker process."""
+    name = f"{index:05d}"
+    X_out = np.lib.format.open_memmap(out_dir / f"X_{name}.npy", mode='w+', dtype=np.float32,
+                                      shape=(rows, len(INPUT_COLS)))
+    y_out = np.lib.format.open_memmap(out_dir / f"y_{name}.npy", mode='w+', dtype=np.float32,
+                                      shape=(rows, len(OUTPUT_COLS)))
+    for block, start in zip(seed_seq.spawn(-(-rows // block_size)), range(0, rows, block_size)):
+        n = min(block_size, rows - start)
+        X_out[start:start + n], y_out[start:start + n] = generate_block(block, n)
+    X_out.flush()
+    y_out.flush()
+    return {'X': f"X_{name}.npy", 'y': f"y_{name}.npy", 'rows': rows}
+
+
+def generate(out_dir, n_samples, rows_per_shard=1_000_000, seed=42, workers=None, block_size=100_000):
+    """
+    Write n_samples labelled points as raw (unscaled) shards plus meta.json.
+
+    Parameters:
+        out_dir (str or Path): output directory.
+        n_samples (int): total rows.
+        rows_per_shard (int): rows per .npy file; one task per shard.
+        seed (int): root seed; shard i uses the i-th child of SeedSequence(seed).
+        workers (int): process count (None = all cores, 1 = serial).
+        block_size (int): rows labelled at a time inside a shard.
+
+    Returns:
+        dict: the metadata written to meta.json.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sizes = [min(rows_per_shard, n_samples - start) for start in range(0, n_samples, rows_per_shard)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(out_dir, i, s, rows, block_size) for i, (s, rows) in enumerate(zip(seeds, sizes))]
+
+    start = time.perf_counter()
+    if workers == 1:
+        shards = [write_shard(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(write_shard, *zip(*tasks)))
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    meta = {
+        'inputs': INPUT_COLS,
+        'outputs': OUTPUT_COLS,
+        'rows': n_samples,
+        'shards': shards,
+        'provenance': {
+            'generator': 'synthetic_data_gen.py',
+            'model': MODEL,
+            'model_version': model_version(),
+            'commit': commit or None,
+            'seed': seed,
+            'materials': PBTE_SNSE,
+            'T_cold': T_COLD_COMSOL,
+            'sweep_params': SWEEP_PARAMS,
+            'seconds': round(time.perf_counter() - start, 2),
+        },
+    }
+    (out_dir / 'meta.json').write_text(json.dumps(meta, indent=2))
+    return meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--rows-per-shard', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    meta = generate(args.out_dir, args.samples, args.rows_per_shard, args.seed, args.workers)
+    print(f"✔ {meta['rows']} samples in {len(meta['shards'])} shards "
+          f"({meta['provenance']['seconds']} s, model {meta['provenance']['model_version']}) saved: {args.out_dir}")
@@ -0,0 +1,94 @@
+"""Train TEGModel from memory-mapped shards with shuffled mini-batches.
+
+Same network, loss and optimizer as export_model.py, but the data is streamed
+from a shard directory built by memmap_dataset.py, so memory stays bounded for
+datasets of any size. The last shard is held out for validation.
+
+    python memmap_dataset.py TEG_data.csv teg_shards --rows-per-shard 1000
+    python train_from_shards.py teg_shards --epochs 50
+
+Pretrain on synthetic data, then fine-tune on COMSOL shards scaled alike:
+    python train_from_shards.py synthetic_shards --out pretrained.pt
+    python train_from_shards.py comsol_shards --init pretrained.pt --lr 0.0001
+"""
+import argparse
+import json
+from pathlib import Path
+
+import torch
+
+from memmap_dataset import load_meta, make_loader
+
+
+# Define the ANN model (as in export_model.py)
+class TEGModel(torch.nn.Module):
+    def __init__(self, input_dim=6, output_dim=2):
+        super(TEGModel, self).__init__()
+        self.network = torch.nn.Sequential(
+            torch.nn.Linear(input_dim, 64),
+            torch.nn.ReLU(),
+            torch.nn.Linear(64, 64),
+            torch.nn.ReLU(),
+            torch.nn.Linear(64, output_dim)
+        )
+
+    def forward(self, x):
+        return self.network(x)
+
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('shard_dir')
+parser.add_argument('--epochs', type=int, default=50)
+parser.add_argument('--batch-size', type=int, default=4096)
+parser.add_argument('--lr', type=float, default=0.001)
+parser.add_argument('--workers', type=int, default=0, help='DataLoader worker processes')
+parser.add_argument('--init', help='state dict to start from (fine-tuning)')
+parser.add_argument('--out', default='teg_ann_model_shards.pt')
+args = parser.parse_args()
+
+meta = load_meta(args.shard_dir)
+n_shards = len(meta['shards'])
+if n_shards < 2:
+    raise SystemExit("Need at least two shards (one is held out for validation); lower --rows-per-shard.")
+train_loader = make_loader(args.shard_dir, args.batch_size, shards=range(n_shards - 1), num_workers=args.workers)
+val_loader = make_loader(args.shard_dir, args.batch_size, shuffle=False, shards=[n_shards - 1])
+
+model = TEGModel(len(meta['inputs']), len(meta['outputs']))
+if args.init:
+    # The starting model must have been trained on the same columns, in the same order
+    init_scaling = Path(args.init).with_suffix('.scaling.json')
+    if init_scaling.exists():
+        init_meta = json.loads(init_scaling.read_text())
+        for key in ('inputs', 'outputs'):
+            if init_meta[key] != meta[key]:
+                raise ValueError(f"{args.init} was trained on {key} {init_meta[key]}, {args.shard_dir} has {meta[key]}")
+    model.load_state_dict(torch.load(args.init))
+criterion = torch.nn.MSELoss()
+optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
+
+for epoch in range(args.epochs):
+    model.train()
+    train_loss, n_train = 0.0, 0
+    for X_batch, y_batch in train_loader:
+        optimizer.zero_grad()
+        loss = criterion(model(X_batch), y_batch)
+        loss.backward()
+        optimizer.step()
+        train_loss += loss.item() * len(X_batch)
+        n_train += len(X_batch)
+
+    model.eval()
+    val_loss, n_val = 0.0, 0
+    with torch.no_grad():
+        for X_batch, y_batch in val_loader:
+            val_loss += criterion(model(X_batch), y_batch).item() * len(X_batch)
+            n_val += len(X_batch)
+
+    if epoch % max(args.epochs // 10, 1) == 0 or epoch == args.epochs - 1:
+        print(f"Epoch {epoch}: Train Loss = {train_loss / n_train:.6f}, Val Loss = {val_loss / n_val:.6f}")
+
+# Save the model and the scaling it expects next to it
+torch.save(model.state_dict(), args.out)
+scaling = {key: meta[key] for key in ('inputs', 'outputs', 'x_scaler', 'y_scaler', 'provenance')}
+Path(args.out).with_suffix('.scaling.json').write_text(json.dumps(scaling, indent=2))
+print("Model and scaling exported successfully.")
@@ -0,0 +1,148 @@
+"""Precomputed histogram pyramids, 2D density tiles and column statistics.
+
+Instead of sending every row to the browser for client-side binning, each
+numeric column is binned once, chunk by chunk, into a fine histogram of
+FINEST_BINS bins (log-spaced for rho_c, which the sweep samples
+log-uniformly). Every coarser resolution is a sum of adjacent bins, and 2D
+density tiles are built the same way for the column pairs a page asks for.
+A page then only ships a few hundred counts, whether the table has 5 thousand
+or 50 million rows.
+"""
+import numpy as np
+import pandas as pd
+
+FINEST_BINS = 1024
+TILE_BINS = 256
+LOG_COLUMNS = ('rho_c',)
+CHUNK_ROWS = 1 << 20
+
+
+def _column_names(table):
+    names = table.names if hasattr(table, 'names') else list(table.columns)
+    return [name for name in names if np.issubdtype(_column(table, name).dtype, np.number)]
+
+
+def _column(table, name):
+    # ColumnStore (shared_data.py) or DataFrame
+    return table.column(name) if hasattr(table, 'column') else table[name].to_numpy()
+
+
+def _chunks(values):
+    for start in range(0, len(values), CHUNK_ROWS):
+        chunk = np.asarray(values[start:start + CHUNK_ROWS], dtype=float)
+        yield chunk[np.isfinite(chunk)]
+
+
+def _snap(bins, finest):
+    """Nearest power of two to bins, within [1, finest]."""
+    return int(np.clip(2 ** np.round(np.log2(max(bins, 1))), 1, finest))
+
+
+class DatasetAggregates:
+    """
+    Histogram pyramids and summary statistics of every numeric column of a table.
+
+    Parameters:
+        table (DataFrame or ColumnStore): the data; a ColumnStore is read in chunks from its memory map.
+        columns (list): columns to aggregate (default: all numeric ones).
+        finest (int): bins of the finest histogram level (a power of two).
+        tile (int): bins per axis of the finest 2D density tiles (a power of two).
+        log_columns (tuple): columns binned on a log scale when positive.
+    """
+
+    def __init__(self, table, columns=None, finest=FINEST_BINS, tile=TILE_BINS, log_columns=LOG_COLUMNS):
+        self.table = table
+        self.log_columns = set(log_columns)
+        self.finest = finest
+        self.tile = tile
+        self.columns = list(columns) if columns is not None else _column_names(table)
+        self.scales, self.edges, self.counts, self.stats = {}, {}, {}, {}
+        self._tiles = {}
+        for name in self.columns:
+            self._aggregate(name)
+
+    def _aggregate(self, name):
+        values = _column(self.table, name)
+        count, total, total_sq, lo, hi = 0, 0.0, 0.0, np.inf, -np.inf
+        for chunk in _chunks(values):
+            if len(chunk):
+                count += len(chunk)
+                total += chunk.sum()
+                total_sq += (chunk**2).sum()
+                lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+        log = name in self.log_columns and count > 0 and lo > 0
+        self.scales[name] = 'log' if log else 'linear'
+        if count == 0:
+            lo, hi = 0.0, 1.0
+        elif hi == lo:
+            lo, hi = lo - 0.5, hi + 0.5
+        self.edges[name] = np.geomspace(lo, hi, self.finest + 1) if log else np.linspace(lo, hi, self.finest + 1)
+
+        counts = np.zeros(self.finest, dtype=np.int64)
+        for chunk in _chunks(values):
+            counts += np.bincount(self._bin(name, chunk, self.finest), minlength=self.finest)
+        self.counts[name] = counts
+        mean = total / count if count else np.nan
+        self.stats[name] = {'count': count, 'mean': mean,
+                            'std': np.sqrt(max(total_sq / count - mean**2, 0.0)) if count else np.nan,
+                            'min': lo if count else np.nan, 'max': hi if count else np.nan}
+
+    def _bin(self, name, values, n):
+        edges = self.edges[name]
+        if self.scales[name] == 'log':
+            position = (np.log(values) - np.log(edges[0])) / (np.log(edges[-1]) - np.log(edges[0]))
+        else:
+            position = (values - edges[0]) / (edges[-1] - edges[0])
+        return np.clip((position * n).astype(np.int64), 0, n - 1)
+
+    def histogram(self, name, bins=64):
+        """
+        Histogram at the pyramid level closest to `bins` (a power of two).
+
+        Returns:
+            DataFrame: left, right, center (geometric for log columns) and count per bin.
+        """
+        bins = _snap(bins, self.finest)
+        step = self.finest // bins
+        counts = self.counts[name].reshape(bins, step).sum(axis=1)
+        edges = self.edges[name][::step]
+        center = np.sqrt(edges[:-1] * edges[1:]) if self.scales[name] == 'log' else 0.5 * (edges[:-1] + edges[1:])
+        return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'center': center, 'count': counts})
+
+    def quantiles(self, name, q=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Quantiles interpolated within the finest histogram bins."""
+        cumulative = np.concatenate([[0], np.cumsum(self.counts[name])]) / max(self.counts[name].sum(), 1)
+        return np.interp(q, cumulative, self.edges[name])
+
+    def summary(self):
+        """Count, mean, std, min, max and approximate quartiles/5-95 % per column."""
+        rows = {}
+        for name in self.columns:
+            row = dict(self.stats[name])
+            row.update(zip(['p5', 'p25', 'p50', 'p75', 'p95'], self.quantiles(name)))
+            rows[name] = row
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def density(self, x, y, bins=64):
+        """
+        2D counts of a column pair; the finest tile is built on first use and coarsened by summing blocks.
+
+        Returns:
+            dict: 'x_edges', 'y_edges' and 'counts' (n_x, n_y).
+        """
+        key = (x, y)
+        if key not in self._tiles:
+            counts = np.zeros(self.tile * self.tile, dtype=np.int64)
+            X, Y = _column(self.table, x), _column(self.table, y)
+            for start in range(0, len(X), CHUNK_ROWS):
+                xs = np.asarray(X[start:start + CHUNK_ROWS], dtype=float)
+                ys = np.asarray(Y[start:start + CHUNK_ROWS], dtype=float)
+                ok = np.isfinite(xs) & np.isfinite(ys)
+                index = self._bin(x, xs[ok], self.tile) * self.tile + self._bin(y, ys[ok], self.tile)
+                counts += np.bincount(index, minlength=self.tile * self.tile)
+            self._tiles[key] = counts.reshape(self.tile, self.tile)
+        bins = _snap(bins, self.tile)
+        step = self.tile // bins
+        counts = self._tiles[key].reshape(bins, step, bins, step).sum(axis=(1, 3))
+        coarse = self.finest // bins
+        return {'x_edges': self.edges[x][::coarse], 'y_edges': self.edges[y][::coarse], 'counts': counts}
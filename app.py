@@ -4,6 +4,9 @@ import numpy as np
 import matplotlib
 import pandas as pd
 from PIL import Image
+from utils import show_image, start_page_timer, stop_page_timer
+
+start_page_timer('Home')
 
 # Page configuration
 st.set_page_config(
@@ -38,7 +41,7 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # Sidebar navigation
-st.sidebar.image("Images/Sans-titre-01.webp", width=200)
+show_image("Images/Sans-titre-01.webp", width=200, container=st.sidebar)
 st.sidebar.title("Navigation")
 
 # Main sections
@@ -95,3 +98,5 @@ st.markdown("""
     <p>Use the sidebar to navigate between different sections.</p>
 </div>
 """, unsafe_allow_html=True)
+
+stop_page_timer()
@@ -0,0 +1,234 @@
+"""Time the project's numerical hot paths at several input scales.
+
+Runs offline from the repository root and writes one JSON file with the
+timings and machine metadata, so runs from different commits can be compared:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --quick --only pair_screening load_sweep
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from aggregates import DatasetAggregates  # noqa: E402
+from comsol_results import add_derived_metrics, load_results  # noqa: E402
+from materials import SEEBECK, TEMPERATURE, PropertyIndex, load_estm, screen_pairs  # noqa: E402
+from teg_model import ANN_DIR, SURROGATE_INPUTS, SURROGATE_OUTPUTS, load_sweep  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def time_call(func, repeat):
+    """Run func `repeat` times and return the wall-clock timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# Each benchmark takes a scale and returns (callable, work size) after doing its setup.
+
+def bench_estm_loading(scale):
+    return (lambda: [load_estm() for _ in range(scale)]), scale * 5205
+
+
+def bench_pair_screening(scale):
+    # Replicate the library to emulate a larger database at the busiest temperature
+    data = load_estm()
+    T = data[TEMPERATURE].mode()[0]
+    data = pd.concat([data] * scale, ignore_index=True)
+    return (lambda: screen_pairs(data, T)), int((data[TEMPERATURE] == T).sum())
+
+
+def bench_property_lookup(scale):
+    # Random (formula, T) Seebeck queries against the interpolation index
+    index = PropertyIndex(load_estm())
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, len(index.formulas), scale)
+    T = rng.uniform(300, 900, scale)
+    return (lambda: index.query(ids, T, [SEEBECK], method='pchip')), scale
+
+
+def bench_load_sweep(scale):
+    # `scale` couples, each swept over the page-4 grid of 500 load points
+    rng = np.random.default_rng(0)
+    V_oc = rng.uniform(0.01, 0.1, scale)
+    R_int = rng.uniform(0.1, 10, scale)
+    return (lambda: load_sweep(V_oc, R_int, 500)), scale * 500
+
+
+def bench_derived_metrics(scale):
+    df = pd.concat([load_results()] * scale, ignore_index=True)
+    return (lambda: add_derived_metrics(df)), len(df)
+
+
+AGGREGATE_COLUMNS = ['PDmax', 'Th (K)', 'rho_c']
+
+
+def bench_aggregate_build(scale):
+    df = pd.concat([load_results()] * scale, ignore_index=True)
+    return (lambda: DatasetAggregates(df, AGGREGATE_COLUMNS)), len(df)
+
+
+def bench_histogram_query(scale):
+    # Should not grow with the table: only precomputed bins are summed
+    df = pd.concat([load_results()] * scale, ignore_index=True)
+    aggregates = DatasetAggregates(df, AGGREGATE_COLUMNS)
+    return (lambda: [aggregates.histogram(column, 64) for column in AGGREGATE_COLUMNS]), len(df)
+
+
+def _teg_tensors(scale):
+    import torch
+
+    df = pd.read_csv(ANN_DIR / 'TEG_data.csv')
+    df = pd.concat([df] * scale, ignore_index=True)
+    X = df[SURROGATE_INPUTS].to_numpy()
+    y = df[SURROGATE_OUTPUTS].to_numpy()
+    X = (X - X.mean(axis=0)) / X.std(axis=0)
+    y = (y - y.mean(axis=0)) / y.std(axis=0)
+    return torch.tensor(X, dtype=torch.float32), torch.tensor(y, dtype=torch.float32)
+
+
+def bench_surrogate_training(scale):
+    # One epoch = one full-batch Adam step, as in export_model.py
+    import torch
+    from teg_model import build_network
+
+    X, y = _teg_tensors(scale)
+    model = build_network()
+    criterion = torch.nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+
+    def epochs(n=10):
+        for _ in range(n):
+            optimizer.zero_grad()
+            loss = criterion(model(X), y)
+            loss.backward()
+            optimizer.step()
+    return epochs, len(X) * 10
+
+
+def bench_surrogate_inference(scale):
+    from teg_model import SurrogateModel
+
+    surrogate = SurrogateModel()
+    X = pd.read_csv(ANN_DIR / 'TEG_data.csv', usecols=SURROGATE_INPUTS)[SURROGATE_INPUTS].to_numpy()
+    X = np.resize(X, (scale, X.shape[1]))
+    return (lambda: surrogate.predict(X)), scale
+
+
+BENCHMARKS = {
+    'estm_loading': (bench_estm_loading, [1, 2, 4]),
+    'pair_screening': (bench_pair_screening, [1, 4, 16]),
+    'property_lookup': (bench_property_lookup, [10_000, 1_000_000, 10_000_000]),
+    'load_sweep': (bench_load_sweep, [1, 1_000, 100_000]),
+    'derived_metrics': (bench_derived_metrics, [1, 10, 100]),
+    'aggregate_build': (bench_aggregate_build, [1, 100, 1_000]),
+    'histogram_query': (bench_histogram_query, [1, 100, 1_000]),
+    'surrogate_training': (bench_surrogate_training, [1, 10, 100]),
+    'surrogate_inference': (bench_surrogate_inference, [1_000, 100_000, 1_000_000]),
+}
+
+
+def machine_metadata():
+    """Hardware, software and commit information stored with every run."""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return None
+
+    versions = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__}
+    try:
+        import torch
+        versions['torch'] = torch.__version__
+    except ImportError:
+        pass
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'versions': versions,
+    }
+
+
+def run(only=None, quick=False, repeat=5):
+    """Run the selected benchmarks; a benchmark whose dependency is missing is recorded as skipped."""
+    results = []
+    for name, (bench, scales) in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        for scale in (scales[:2] if quick else scales):
+            try:
+                func, size = bench(scale)
+            except ImportError as e:
+                results.append({'name': name, 'scale': scale, 'skipped': str(e)})
+                print(f"{name:22s} scale={scale:<8} skipped ({e})")
+                break
+            func()  # warm-up
+            timings = time_call(func, 2 if quick else repeat)
+            results.append({
+                'name': name,
+                'scale': scale,
+                'size': size,
+                'min_s': min(timings),
+                'median_s': float(np.median(timings)),
+                'mean_s': float(np.mean(timings)),
+                'timings_s': timings,
+                'throughput_per_s': size / min(timings),
+            })
+            print(f"{name:22s} scale={scale:<8} min={min(timings) * 1e3:10.3f} ms  size={size}")
+    return {'metadata': machine_metadata(), 'results': results}
+
+
+def compare(old_path, new_path):
+    """Print the min-time ratio new/old for every benchmark present in both files."""
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    old_times = {(r['name'], r['scale']): r['min_s'] for r in old['results'] if 'min_s' in r}
+    print(f"old: {old['metadata']['commit']}  new: {new['metadata']['commit']}")
+    for r in new['results']:
+        key = (r['name'], r['scale'])
+        if 'min_s' in r and key in old_times:
+            ratio = r['min_s'] / old_times[key]
+            flag = '  REGRESSION' if ratio > 1.1 else ''
+            print(f"{r['name']:22s} scale={r['scale']:<8} {old_times[key] * 1e3:10.3f} -> {r['min_s'] * 1e3:10.3f} ms"
+                  f"  x{ratio:.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='two smallest scales, two repeats')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help='output JSON (default: benchmarks/results/<time>_<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        os.chdir(ROOT)
+        report = run(args.only, args.quick, args.repeat)
+        commit = (report['metadata']['commit'] or 'nogit')[:8]
+        out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2))
+        print(f"Results saved: {out}")
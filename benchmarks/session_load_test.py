@@ -0,0 +1,87 @@
+"""Memory per Streamlit session: st.cache_data copies against the shared column store.
+
+Each mode runs in a fresh process that opens many headless sessions
+(streamlit.testing AppTest) of a page that loads the COMSOL results and
+keeps them in its session state, as a page in use would. The resident set
+size is read after one warm-up session and after all others, so one-time
+imports and cache fills are excluded from the per-session figure:
+
+    python benchmarks/session_load_test.py --sessions 10 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = {
+    # What utils.load_comsol_data did before the shared store
+    'cache_data': """
+import pandas as pd
+import streamlit as st
+
+@st.cache_data
+def load_comsol_data():
+    return pd.read_csv('ANN_dataset/comsol_results_with_efficiency.csv')
+
+df = load_comsol_data()
+st.session_state['df'] = df
+st.write(float(df['PDmax'].mean()))
+""",
+    'shared': """
+import streamlit as st
+from utils import load_comsol_data
+
+df = load_comsol_data()
+st.session_state['df'] = df
+st.write(float(df['PDmax'].mean()))
+""",
+}
+
+
+def rss_mb():
+    """Resident set size of this process (MB)."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    raise OSError("VmRSS not available")
+
+
+def measure(mode, sessions):
+    """Run in a child process: per-session RSS growth for one mode."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    apps = [AppTest.from_string(PAGES[mode], default_timeout=60).run()]
+    before = rss_mb()
+    for _ in range(sessions):
+        apps.append(AppTest.from_string(PAGES[mode], default_timeout=60).run())
+    after = rss_mb()
+    errors = sum(len(app.exception) for app in apps)
+    return {'mode': mode, 'sessions': sessions, 'rss_mb': after, 'per_session_mb': (after - before) / sessions,
+            'errors': errors}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'SESSIONS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], int(args.child[1]))))
+        sys.exit()
+
+    print(f"{'mode':12s} {'sessions':>8s} {'RSS (MB)':>10s} {'MB/session':>11s}")
+    for sessions in args.sessions:
+        for mode in PAGES:
+            out = subprocess.run([sys.executable, __file__, '--child', mode, str(sessions)],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            note = f"  ({result['errors']} session errors)" if result['errors'] else ''
+            print(f"{mode:12s} {sessions:8d} {result['rss_mb']:10.1f} {result['per_session_mb']:11.3f}{note}")
@@ -0,0 +1,72 @@
+"""Column names, parameter ranges and loaders for the 5000-run COMSOL sweep."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RESULTS_PATH = Path(__file__).resolve().parent / 'ANN_dataset' / 'comsol_results_with_efficiency.csv'
+
+# Sweep parameters as sampled in 5000parameter_gen.ipynb: (results column, low, high, scale)
+SWEEP_PARAMS = {
+    'LHT': ('LHT (mm)', 0.5, 5.0, 'linear'),
+    'HIC': ('HIC (mm)', 0.5, 3.0, 'linear'),
+    'w_p': ('w_p (mm)', 0.5, 5.0, 'linear'),
+    'w_n': ('w_n (mm)', 0.5, 5.0, 'linear'),
+    'FF': ('FF', 0.05, 0.95, 'linear'),
+    'rho_c': ('rho_c', 1e-9, 1e-7, 'log'),
+    'Th': ('Th (K)', 300.0, 500.0, 'linear'),
+}
+INPUT_COLS = [column for column, _, _, _ in SWEEP_PARAMS.values()]
+VOC_COL = 'Electric potential (V), Voc'
+VN_COL = 'Electric potential (V), Vn'
+
+
+def load_results(path=RESULTS_PATH):
+    """Load a COMSOL results CSV with stripped column names."""
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def scale_unit(u, params=None):
+    """Map points of the unit hypercube (n, d) onto the sweep ranges (log where sampled log-uniform)."""
+    params = params or list(SWEEP_PARAMS)
+    u = np.asarray(u, dtype=float)
+    X = np.empty_like(u)
+    for j, name in enumerate(params):
+        _, low, high, scale = SWEEP_PARAMS[name]
+        if scale == 'log':
+            X[:, j] = 10 ** (np.log10(low) + u[:, j] * (np.log10(high) - np.log10(low)))
+        else:
+            X[:, j] = low + u[:, j] * (high - low)
+    return X
+
+
+def to_unit(X, params=None):
+    """Inverse of scale_unit: sweep values (n, d) to unit-hypercube coordinates."""
+    params = params or list(SWEEP_PARAMS)
+    X = np.asarray(X, dtype=float)
+    u = np.empty_like(X)
+    for j, name in enumerate(params):
+        _, low, high, scale = SWEEP_PARAMS[name]
+        if scale == 'log':
+            u[:, j] = (np.log10(X[:, j]) - np.log10(low)) / (np.log10(high) - np.log10(low))
+        else:
+            u[:, j] = (X[:, j] - low) / (high - low)
+    return u
+
+
+def add_derived_metrics(df):
+    """
+    Add the page-7 performance metrics (5000simulation_analysis.ipynb) to a results table.
+
+    A is the hot-side leg area (w_p² + w_n², m²), Qin_per_A the heat flux,
+    efficiency = PDmax / Qin_per_A, V_diff = Voc - Vn and Power_W = PDmax * A.
+    """
+    df = df.copy()
+    df['A'] = (df['w_p (mm)']**2 + df['w_n (mm)']**2) * 1e-6
+    df['Qin_per_A'] = df['flux (W)'] / df['A']
+    df['efficiency'] = df['PDmax'] / df['Qin_per_A']
+    df['V_diff'] = df[VOC_COL] - df[VN_COL]
+    df['Power_W'] = df['PDmax'] * df['A']
+    return df
@@ -0,0 +1,351 @@
+"""Space-filling designs of experiments over the COMSOL sweep parameters.
+
+5000parameter_gen.ipynb draws every parameter with np.random.uniform (rho_c
+log-uniform), which leaves gaps and clusters in the 7D space. DesignSampler
+draws the same space with
+
+- 'sobol': scrambled Sobol' points (scipy.stats.qmc), taken from one engine
+  block after block;
+- 'lhs': a Latin hypercube whose per-dimension stratum permutations are keyed
+  Feistel permutations of the point index, so any block of a 10M-point design
+  is computed on its own, reproducibly, without holding the design;
+- 'maximin': the Latin hypercube with the largest minimum distance among a few
+  candidates, improved by coordinate swaps (held in memory, for COMSOL-sized
+  budgets);
+- 'random': the notebook's plain uniform sampling, for comparison.
+
+Each dimension is mapped linearly or logarithmically onto its range (the
+SWEEP_PARAMS defaults, or overrides such as a narrower FF range), constraints
+on the scaled values reject points, and designs are written block by block in
+the sweep formats:
+
+    python doe_sampler.py --method sobol --samples 5000 --out ANN_dataset/teg_param_sweep_sobol.csv
+    python doe_sampler.py --method lhs --samples 10000000 --out design.parquet --format parquet
+    python doe_sampler.py --compare --samples 2048
+"""
+import argparse
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from scipy.stats import qmc
+
+from comsol_results import SWEEP_PARAMS
+
+METHODS = ('sobol', 'lhs', 'maximin', 'random')
+FORMATS = ('comsol', 'csv', 'parquet', 'npy')
+BLOCK_SIZE = 100_000
+FEISTEL_ROUNDS = 4
+
+
+def _mix(x):
+    """splitmix64 finalizer: a well-mixed uint64 hash of each element."""
+    x = np.asarray(x, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _uniform(index, key):
+    """Uniform [0, 1) numbers hashed from (index, key)."""
+    with np.errstate(over='ignore'):
+        bits = _mix(np.asarray(index, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15) ^ np.uint64(key))
+    return (bits >> np.uint64(11)).astype(float) * 2.0**-53
+
+
+def keyed_permutation(index, n, key):
+    """
+    Image of `index` under a pseudo-random permutation of range(n).
+
+    A balanced Feistel network permutes the smallest even-bit power of two
+    holding n; values falling outside range(n) are mapped again until they
+    land inside (cycle walking), which keeps the map a bijection on range(n).
+    """
+    half = max(1, (int(n - 1).bit_length() + 1) // 2)
+    mask = np.uint64((1 << half) - 1)
+    keys = [_mix(np.uint64(key) + np.uint64(r + 1)) for r in range(FEISTEL_ROUNDS)]
+
+    def feistel(x):
+        left, right = x >> np.uint64(half), x & mask
+        for k in keys:
+            left, right = right, left ^ (_mix(right ^ k) & mask)
+        return (left << np.uint64(half)) | right
+
+    x = feistel(np.asarray(index, dtype=np.uint64))
+    outside = x >= np.uint64(n)
+    while outside.any():
+        x[outside] = feistel(x[outside])
+        outside = x >= np.uint64(n)
+    return x.astype(np.int64)
+
+
+def min_distance(u):
+    """Smallest pairwise distance of a design in unit-cube coordinates."""
+    return float(cKDTree(u).query(u, k=2)[0][:, 1].min())
+
+
+class DesignSampler:
+    """
+    Streaming design of experiments over named parameters.
+
+    Parameters:
+        method (str): one of METHODS.
+        params (list): parameter names (default: the seven SWEEP_PARAMS).
+        ranges (dict): {name: (low, high)} overriding the SWEEP_PARAMS range, e.g. {'FF': (0.2, 0.8)}.
+        scales (dict): {name: 'linear' or 'log'} overriding the sampling scale.
+        constraints (list): callables taking a DataFrame of scaled values and
+            returning a boolean mask of the rows to keep.
+        seed (int): the same seed always gives the same design.
+        candidates, swaps (int): maximin search effort.
+    """
+
+    def __init__(self, method='sobol', params=None, ranges=None, scales=None, constraints=(), seed=42,
+                 candidates=8, swaps=2000):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r}; choose from {', '.join(METHODS)}")
+        self.method = method
+        self.params = list(params or SWEEP_PARAMS)
+        self.bounds = {}
+        for name in self.params:
+            _, low, high, scale = SWEEP_PARAMS.get(name, (name, None, None, 'linear'))
+            low, high = (ranges or {}).get(name, (low, high))
+            scale = (scales or {}).get(name, scale)
+            if low is None or not low < high or (scale == 'log' and low <= 0):
+                raise ValueError(f"Invalid range for {name}: ({low}, {high}) on a {scale} scale")
+            self.bounds[name] = (low, high, scale)
+        self.constraints = list(constraints)
+        self.seed = seed
+        self.candidates = candidates
+        self.swaps = swaps
+
+    @property
+    def d(self):
+        return len(self.params)
+
+    def scale(self, u):
+        """Unit-cube points (n, d) to a DataFrame of parameter values."""
+        columns = {}
+        for j, name in enumerate(self.params):
+            low, high, scale = self.bounds[name]
+            if scale == 'log':
+                columns[name] = low * (high / low) ** u[:, j]
+            else:
+                columns[name] = low + u[:, j] * (high - low)
+        return pd.DataFrame(columns)
+
+    def unit(self, values):
+        """Inverse of scale(): parameter values to unit-cube coordinates."""
+        u = np.empty((len(values), self.d))
+        for j, name in enumerate(self.params):
+            low, high, scale = self.bounds[name]
+            x = np.asarray(values[name], dtype=float)
+            u[:, j] = np.log(x / low) / np.log(high / low) if scale == 'log' else (x - low) / (high - low)
+        return u
+
+    def lhs_block(self, start, stop, n):
+        """Rows start:stop of the n-point streaming Latin hypercube (unit cube)."""
+        index = np.arange(start, stop, dtype=np.uint64)
+        u = np.empty((stop - start, self.d))
+        for j in range(self.d):
+            key = int(_mix(np.uint64(self.seed) * np.uint64(self.d + 1) + np.uint64(j)))
+            stratum = keyed_permutation(index, n, key)
+            u[:, j] = (stratum + _uniform(index, key ^ 0x5DEECE66D)) / n
+        return u
+
+    def maximin(self, n):
+        """
+        Maximin Latin hypercube of n points (unit cube).
+
+        The best of `candidates` streaming hypercubes is improved by swapping,
+        in one dimension, a coordinate of a point of the closest pair with that
+        of a random point; swaps keep the Latin property and are accepted when
+        they increase the minimum distance.
+        """
+        rng = np.random.default_rng(self.seed)
+        best, best_d = None, -1.0
+        for c in range(self.candidates):
+            u = DesignSampler('lhs', self.params, seed=self.seed + 7919 * c).lhs_block(0, n, n)
+            dist = min_distance(u)
+            if dist > best_d:
+                best, best_d = u, dist
+        u = best
+        nn_dist, nn = cKDTree(u).query(u, k=2)
+        nn_dist, nn = nn_dist[:, 1], nn[:, 1]
+        for _ in range(self.swaps):
+            i = int(np.argmin(nn_dist))
+            i = i if rng.random() < 0.5 else int(nn[i])
+            j, k = int(rng.integers(n)), int(rng.integers(self.d))
+            if j == i:
+                continue
+            trial = u[[i, j]].copy()
+            trial[:, k] = trial[::-1, k]
+            others = np.ones(n, dtype=bool)
+            others[[i, j]] = False
+            d_new = min(np.sqrt(((u[others] - trial[0])**2).sum(axis=1)).min(),
+                        np.sqrt(((u[others] - trial[1])**2).sum(axis=1)).min(),
+                        np.sqrt(((trial[0] - trial[1])**2).sum()))
+            if d_new > nn_dist.min():
+                u[[i, j]] = trial
+                nn_dist, nn = cKDTree(u).query(u, k=2)
+                nn_dist, nn = nn_dist[:, 1], nn[:, 1]
+        return u
+
+    def _unit_stream(self, n, block_size):
+        """Unit-cube blocks covering n raw points (before constraints)."""
+        if self.method == 'maximin':
+            yield self.maximin(n)
+        elif self.method == 'lhs':
+            for start in range(0, n, block_size):
+                yield self.lhs_block(start, min(start + block_size, n), n)
+        elif self.method == 'sobol':
+            engine = qmc.Sobol(self.d, scramble=True, seed=self.seed)
+            with warnings.catch_warnings():
+                # Balance warnings for block sizes that are not powers of two
+                warnings.simplefilter('ignore', UserWarning)
+                while True:
+                    yield engine.random(block_size)
+        else:
+            rng = np.random.default_rng(self.seed)
+            while True:
+                yield rng.random((block_size, self.d))
+
+    def blocks(self, n, block_size=BLOCK_SIZE):
+        """
+        Yield the design as DataFrames of at most block_size rows.
+
+        Sobol' and random designs draw until n points satisfy the constraints;
+        hypercube designs are stratified for exactly n points, so constraints
+        leave the accepted subset of them.
+        """
+        emitted = 0
+        pending = []
+        for u in self._unit_stream(n, block_size):
+            values = self.scale(u)
+            for constraint in self.constraints:
+                values = values[np.asarray(constraint(values), dtype=bool)]
+            pending.append(values.iloc[:n - emitted])
+            buffered = sum(len(p) for p in pending)
+            while buffered >= block_size or (buffered and emitted + buffered >= n):
+                block = pd.concat(pending, ignore_index=True)
+                out, rest = block.iloc[:block_size], block.iloc[block_size:]
+                emitted += len(out)
+                yield out.reset_index(drop=True)
+                pending, buffered = [rest], len(rest)
+            if emitted >= n:
+                return
+        rest = pd.concat(pending, ignore_index=True) if pending else None
+        if rest is not None and len(rest):
+            yield rest
+
+    def sample(self, n):
+        """The whole n-point design as one DataFrame."""
+        return pd.concat(list(self.blocks(n)), ignore_index=True)
+
+    def export(self, path, n, fmt='comsol', block_size=BLOCK_SIZE):
+        """
+        Write an n-point design block by block.
+
+        Formats:
+            'comsol': the teg_param_sweep_5000.csv layout (one row per parameter,
+                name first, no header), loaded by the COMSOL parametric sweep;
+                each row is written from a fresh pass over the (reproducible) stream,
+                except for maximin designs, which are optimized once in memory.
+            'csv': one row per sample with a header of parameter names.
+            'parquet': the same table, one row group per block.
+            'npy': an (n, d) float64 array, written through a memory map.
+
+        Returns:
+            int: number of points written.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+        if fmt == 'comsol':
+            # A maximin design is built whole anyway; re-optimizing it for every row would repeat the swaps
+            design = [self.sample(n)] if self.method == 'maximin' else None
+            with open(path, 'w') as f:
+                for name in self.params:
+                    f.write(name)
+                    written = 0
+                    for block in design or self.blocks(n, block_size):
+                        f.write(',' + ','.join(map(repr, block[name].tolist())))
+                        written += len(block)
+                    f.write('\n')
+        elif fmt == 'csv':
+            for block in self.blocks(n, block_size):
+                block.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+                written += len(block)
+        elif fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            for block in self.blocks(n, block_size):
+                table = pa.Table.from_pandas(block, preserve_index=False)
+                writer = writer or pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(block)
+            if writer is not None:
+                writer.close()
+        elif fmt == 'npy':
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n, self.d))
+            for block in self.blocks(n, block_size):
+                out[written:written + len(block)] = block[self.params].to_numpy()
+                written += len(block)
+            out.flush()
+            if written < n:
+                # Constraints rejected part of a hypercube design
+                np.save(path, np.array(out[:written]))
+        else:
+            raise ValueError(f"Unknown format {fmt!r}; choose from {', '.join(FORMATS)}")
+        return written
+
+
+def compare(n=2048, seed=42, methods=METHODS):
+    """Minimum distance and centered L2 discrepancy (unit cube) of each method's n-point design."""
+    rows = []
+    for method in methods:
+        sampler = DesignSampler(method, seed=seed)
+        start = time.perf_counter()
+        u = sampler.unit(sampler.sample(n))
+        rows.append({'method': method, 'min_distance': min_distance(u),
+                     'discrepancy': qmc.discrepancy(u, method='CD'), 'seconds': time.perf_counter() - start})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--method', default='sobol', choices=METHODS)
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--range', nargs=3, action='append', default=[], metavar=('NAME', 'LOW', 'HIGH'),
+                        help='override a parameter range, e.g. --range FF 0.2 0.8')
+    parser.add_argument('--log', nargs='+', default=[], metavar='NAME', help='sample these parameters log-uniformly')
+    parser.add_argument('--linear', nargs='+', default=[], metavar='NAME', help='sample these parameters uniformly')
+    parser.add_argument('--max-width-ratio', type=float, help='keep designs with max(w_p/w_n, w_n/w_p) below this')
+    parser.add_argument('--out', help='output file')
+    parser.add_argument('--format', default='comsol', choices=FORMATS)
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE)
+    parser.add_argument('--compare', action='store_true', help='print design quality of every method')
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare(args.samples, args.seed).to_string(index=False, float_format='%.3g'))
+    else:
+        constraints = []
+        if args.max_width_ratio:
+            ratio = args.max_width_ratio
+            constraints.append(lambda d: np.maximum(d['w_p'] / d['w_n'], d['w_n'] / d['w_p']) <= ratio)
+        sampler = DesignSampler(args.method, ranges={name: (float(lo), float(hi)) for name, lo, hi in args.range},
+                                scales={**{name: 'log' for name in args.log}, **{name: 'linear' for name in args.linear}},
+                                constraints=constraints, seed=args.seed)
+        start = time.perf_counter()
+        if args.out:
+            written = sampler.export(args.out, args.samples, args.format, args.block_size)
+            print(f"{written} points written to {args.out} in {time.perf_counter() - start:.1f} s")
+        else:
+            print(sampler.sample(args.samples).describe().T.to_string())
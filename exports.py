@@ -0,0 +1,100 @@
+"""Download payloads generated on demand, in chunks, and cached on disk by data hash.
+
+Building a CSV string on every rerun costs CPU and memory whether or not
+anybody downloads it. The download buttons in utils instead hand Streamlit a
+callable, so nothing is produced until a click; the export itself is then
+written block by block (CSV, gzip-compressed CSV or Parquet row groups) into
+.cache/exports under a hash of the data, and later clicks from any session
+reuse the file.
+
+    python exports.py ANN_dataset/comsol_results_with_efficiency.csv --format parquet
+"""
+import argparse
+import functools
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+EXPORT_DIR = Path(__file__).resolve().parent / '.cache' / 'exports'
+CHUNK_ROWS = 100_000
+# Format: (file suffix, MIME type)
+FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def fingerprint(df, chunk_rows=CHUNK_ROWS):
+    """Hash of a DataFrame's columns, dtypes and values (row index excluded)."""
+    digest = hashlib.sha256()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode())
+    for start in range(0, len(df), chunk_rows):
+        digest.update(pd.util.hash_pandas_object(df.iloc[start:start + chunk_rows], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:20]
+
+
+def write_export(df, path, fmt='csv', chunk_rows=CHUNK_ROWS):
+    """Write df to path in the given format, chunk_rows rows at a time."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(FORMATS)}")
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, max(len(df), 1), chunk_rows))
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        writer.close()
+    else:
+        # Level 1 compresses CSV nearly as well as the default 9 at several times the speed
+        opener = functools.partial(gzip.open, compresslevel=1) if fmt == 'csv.gz' else open
+        with opener(path, 'wt', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+
+
+def export_file(df, fmt='csv', key=None, export_dir=EXPORT_DIR):
+    """
+    Path of the cached export of df, written first if it does not exist yet.
+
+    Parameters:
+        key (str): cache key to use instead of hashing the data, e.g. a source file's hash.
+    """
+    export_dir = Path(export_dir)
+    path = export_dir / f"{key or fingerprint(df)}{FORMATS[fmt][0]}"
+    if not path.exists():
+        export_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=export_dir, suffix=FORMATS[fmt][0])
+        os.close(fd)
+        try:
+            write_export(df, tmp, fmt)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', help='table to export')
+    parser.add_argument('--format', default='csv.gz', choices=list(FORMATS))
+    parser.add_argument('--repeat', type=int, default=1, help='stack the table this many times (size test)')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    df = pd.concat([df] * args.repeat, ignore_index=True) if args.repeat > 1 else df
+    for attempt in ('first', 'cached'):
+        start = time.perf_counter()
+        path = export_file(df, args.format)
+        print(f"{attempt}: {len(df):,} rows -> {path.name} ({path.stat().st_size / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,398 @@
+"""Finite-volume thermoelectric solver for the COMSOL p-n unicouple.
+
+The geometry follows the 5000-run sweep: square p and n legs of height LHT on
+copper pads of height HIC, joined on the hot side by a copper bridge whose
+length follows from the fill factor. The hot face of the bridge and the cold
+faces of the pads are held at Th and Tc, everything else is adiabatic. The n
+pad is grounded and a current can be injected at the p pad.
+
+On a tensor grid aligned with the material boundaries, the current and heat
+leaving cell i towards its neighbour j are
+
+    I_ij = G_ij [(φ_i - φ_j) + S_ij (T_i - T_j)]
+    Q_ij = K_ij (T_i - T_j) + S_ij T_ij I_ij
+
+with harmonic-mean face conductances, and every face dissipates
+I_ij (φ_i - φ_j), shared between its two cells. Temperature-dependent properties
+are handled by Picard iteration: properties at the current temperature, then
+the potential, then the temperature with the Peltier and Joule terms lagged.
+
+The system matrices depend only on the property fields, so sweeps that only
+change Th, Tc or the current reuse one sparse LU factorization. When the
+properties drift during Picard iterations the cached factorization serves as a
+preconditioner for GMRES, and it is refreshed only if GMRES stalls.
+
+    python fd_solver.py --th 373 --tc 273
+"""
+import argparse
+import hashlib
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from teg_model import KAPPA_CU, PBTE_SNSE, SIGMA_CU
+
+VOID, P_LEG, N_LEG, COPPER = 0, 1, 2, 3
+
+
+def constant_material(S, sigma, kappa):
+    """Material with temperature-independent properties (S in V/K)."""
+    def props(T):
+        ones = np.ones_like(T)
+        return S * ones, sigma * ones, kappa * ones
+    return props
+
+
+def estm_material(index, formula, method='pchip'):
+    """Temperature-dependent material from a materials.PropertyIndex (clamped outside the tabulated range)."""
+    from materials import KAPPA, SEEBECK, SIGMA
+
+    formula_id = index.formula_ids([formula])[0]
+
+    def props(T):
+        values = index.query(formula_id, T, [SEEBECK, SIGMA, KAPPA], method)
+        return values[..., 0] * 1e-6, values[..., 1], values[..., 2]
+    return props
+
+
+COPPER_PROPS = constant_material(0.0, SIGMA_CU, KAPPA_CU)
+
+
+def _edges(segments, cells_per_mm, min_cells=2):
+    """Cell edges (m) over consecutive segments given as lengths in mm."""
+    edges = [0.0]
+    for length in segments:
+        n = max(int(np.ceil(length * cells_per_mm)), min_cells)
+        edges.extend(edges[-1] + np.linspace(0, length, n + 1)[1:])
+    return np.array(edges) * 1e-3
+
+
+class UnicoupleGrid:
+    """Tensor grid, material map and face connectivity of one unicouple geometry (lengths in mm)."""
+
+    def __init__(self, LHT=5.0, HIC=1.0, w_p=3.16, w_n=3.16, FF=0.5, cells_per_mm=4):
+        self.geometry = {'LHT': LHT, 'HIC': HIC, 'w_p': w_p, 'w_n': w_n, 'FF': FF}
+        pitch = np.sqrt((w_p**2 + w_n**2) / FF)
+        gap = max(pitch - 0.5 * (w_p + w_n), 0.1)
+        w_min, w_max = min(w_p, w_n), max(w_p, w_n)
+        x = _edges([w_p, gap, w_n], cells_per_mm)
+        y = _edges([w_min] + ([w_max - w_min] if w_max > w_min else []), cells_per_mm)
+        z = _edges([HIC, LHT, HIC], cells_per_mm)
+        self.x, self.y, self.z = x, y, z
+        xc, yc, zc = (0.5 * (e[1:] + e[:-1]) for e in (x, y, z))
+        X, Y, Z = np.meshgrid(xc, yc, zc, indexing='ij')
+
+        mm = 1e-3
+        in_p = (X < w_p * mm) & (Y < w_p * mm)
+        in_n = (X > (w_p + gap) * mm) & (Y < w_n * mm)
+        pads = Z < HIC * mm
+        legs = (Z > HIC * mm) & (Z < (HIC + LHT) * mm)
+        bridge = Z > (HIC + LHT) * mm
+        material = np.full(X.shape, VOID)
+        material[(in_p | in_n) & pads] = COPPER
+        material[in_p & legs] = P_LEG
+        material[in_n & legs] = N_LEG
+        material[bridge] = COPPER
+        self.shape = material.shape
+
+        active = material != VOID
+        self.index = np.full(material.shape, -1)
+        self.index[active] = np.arange(active.sum())
+        self.material = material[active]
+        self.n = int(active.sum())
+        self.centers = np.column_stack([X[active], Y[active], Z[active]])
+
+        # Interior faces between active neighbours: cell pairs, face area and half-distances
+        d = [np.diff(x), np.diff(y), np.diff(z)]
+        faces_i, faces_j, area, h_i, h_j = [], [], [], [], []
+        for axis in range(3):
+            lo = [slice(None)] * 3
+            hi = [slice(None)] * 3
+            lo[axis], hi[axis] = slice(None, -1), slice(1, None)
+            i, j = self.index[tuple(lo)], self.index[tuple(hi)]
+            both = (i >= 0) & (j >= 0)
+            widths = np.meshgrid(*d, indexing='ij')
+            face = np.prod([widths[a] for a in range(3) if a != axis], axis=0)
+            faces_i.append(i[both])
+            faces_j.append(j[both])
+            area.append(face[tuple(lo)][both])
+            h_i.append(0.5 * widths[axis][tuple(lo)][both])
+            h_j.append(0.5 * widths[axis][tuple(hi)][both])
+        self.face_i, self.face_j = np.concatenate(faces_i), np.concatenate(faces_j)
+        self.face_area = np.concatenate(area)
+        self.face_h_i, self.face_h_j = np.concatenate(h_i), np.concatenate(h_j)
+
+        # Boundary faces: hot top of the bridge, cold bottoms of the two pads
+        dx, dy = np.meshgrid(d[0], d[1], indexing='ij')
+        top, bottom = self.index[:, :, -1], self.index[:, :, 0]
+        self.hot_cells = top[top >= 0]
+        self.hot_area = (dx * dy)[top >= 0]
+        self.hot_h = np.full(len(self.hot_cells), 0.5 * d[2][-1])
+        cold = bottom >= 0
+        self.cold_cells = bottom[cold]
+        self.cold_area = (dx * dy)[cold]
+        self.cold_h = np.full(len(self.cold_cells), 0.5 * d[2][0])
+        x_cold = X[:, :, 0][cold]
+        self.p_terminal = x_cold < w_p * mm
+        self.n_terminal = ~self.p_terminal
+
+
+class _CachedSolver:
+    """Sparse solves that reuse an LU factorization exactly, or as a GMRES preconditioner."""
+
+    def __init__(self, rtol=1e-8, maxiter=50):
+        self.rtol = rtol
+        self.maxiter = maxiter
+        self.key = None
+        self.lu = None
+        self.stats = {'factorizations': 0, 'exact_reuse': 0, 'preconditioned': 0, 'gmres_iterations': 0}
+
+    def solve(self, A, b, key):
+        if self.lu is not None and key == self.key:
+            self.stats['exact_reuse'] += 1
+            return self.lu.solve(b)
+        if self.lu is not None:
+            iterations = []
+            M = spla.LinearOperator(A.shape, self.lu.solve)
+            x, info = spla.gmres(A, b, x0=self.lu.solve(b), M=M, rtol=self.rtol, atol=0.0,
+                                 restart=self.maxiter, maxiter=1, callback=iterations.append,
+                                 callback_type='pr_norm')
+            if info == 0:
+                self.stats['preconditioned'] += 1
+                self.stats['gmres_iterations'] += len(iterations)
+                return x
+        self.lu = spla.splu(A.tocsc())
+        self.key = key
+        self.stats['factorizations'] += 1
+        return self.lu.solve(b)
+
+
+def _fingerprint(*arrays):
+    digest = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        digest.update(np.ascontiguousarray(a).tobytes())
+    return digest.hexdigest()
+
+
+class UnicoupleSolver:
+    """
+    Coupled potential/temperature solver on a UnicoupleGrid.
+
+    Parameters:
+        grid (UnicoupleGrid): geometry.
+        p_material, n_material (callable): T -> (S, sigma, kappa), see
+            constant_material / estm_material. Default: the PbTe/SnSe couple.
+        rho_c (float): contact resistivity (Ω·m²) on the four leg/copper interfaces.
+
+    Factorizations are kept between calls, so repeated solves with new
+    boundary temperatures or currents on the same solver are cheap.
+    """
+
+    def __init__(self, grid, p_material=None, n_material=None, rho_c=0.0):
+        self.grid = grid
+        self.materials = {
+            P_LEG: p_material or constant_material(PBTE_SNSE['S_p'], PBTE_SNSE['sigma_p'], PBTE_SNSE['kappa_p']),
+            N_LEG: n_material or constant_material(PBTE_SNSE['S_n'], PBTE_SNSE['sigma_n'], PBTE_SNSE['kappa_n']),
+            COPPER: COPPER_PROPS,
+        }
+        self.rho_c = rho_c
+        g = grid
+        mat_i, mat_j = g.material[g.face_i], g.material[g.face_j]
+        self._contact = ((mat_i == COPPER) != (mat_j == COPPER))
+        self.electric = _CachedSolver()
+        self.thermal = _CachedSolver()
+
+    def properties(self, T):
+        """Per-cell S, sigma, kappa at temperature T."""
+        S, sigma, kappa = np.zeros(self.grid.n), np.zeros(self.grid.n), np.zeros(self.grid.n)
+        for mat, props in self.materials.items():
+            cells = self.grid.material == mat
+            S[cells], sigma[cells], kappa[cells] = props(T[cells])
+        return S, sigma, kappa
+
+    def _face_conductance(self, prop):
+        g = self.grid
+        return g.face_area / (g.face_h_i / prop[g.face_i] + g.face_h_j / prop[g.face_j])
+
+    def _laplacian(self, weights, diag_extra):
+        g = self.grid
+        n = g.n
+        rows = np.concatenate([g.face_i, g.face_j, g.face_i, g.face_j])
+        cols = np.concatenate([g.face_j, g.face_i, g.face_i, g.face_j])
+        vals = np.concatenate([-weights, -weights, weights, weights])
+        A = sp.coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsr()
+        return A + sp.diags(diag_extra)
+
+    def solve(self, Th, Tc, current=0.0, T_init=None, tol=1e-6, max_iter=50):
+        """
+        Steady state for one set of boundary values.
+
+        Parameters:
+            Th, Tc (float): hot/cold boundary temperatures (K).
+            current (float): current injected at the p terminal (A); 0 is open circuit.
+
+        Returns:
+            dict: T and phi per cell, terminal voltage, Q_hot / Q_cold (W),
+            electrical power delivered (W), Picard iterations and the relative
+            energy balance error.
+        """
+        g = self.grid
+        T = np.full(g.n, 0.5 * (Th + Tc)) if T_init is None else T_init.copy()
+        for iteration in range(1, max_iter + 1):
+            S, sigma, kappa = self.properties(T)
+
+            # Electric conductances, with the contact layers in series on leg/copper faces
+            G = self._face_conductance(sigma)
+            G = 1 / (1 / G + self.rho_c / g.face_area * self._contact)
+            # Face Seebeck coefficient and temperature from heat-flux continuity over the two half cells
+            R_i, R_j = g.face_h_i / kappa[g.face_i], g.face_h_j / kappa[g.face_j]
+            w_i = R_i / (R_i + R_j)
+            S_face = w_i * S[g.face_i] + (1 - w_i) * S[g.face_j]
+            ground = np.zeros(g.n)
+            np.add.at(ground, g.cold_cells[g.n_terminal],
+                      g.cold_area[g.n_terminal] / (g.cold_h[g.n_terminal] / sigma[g.cold_cells[g.n_terminal]]))
+            A_e = self._laplacian(G, ground)
+
+            # Seebeck EMF and the injected current on the right-hand side
+            emf = G * S_face * (T[g.face_i] - T[g.face_j])
+            b_e = np.zeros(g.n)
+            np.add.at(b_e, g.face_i, -emf)
+            np.add.at(b_e, g.face_j, emf)
+            p_area = g.cold_area[g.p_terminal]
+            np.add.at(b_e, g.cold_cells[g.p_terminal], current * p_area / p_area.sum())
+            phi = self.electric.solve(A_e, b_e, _fingerprint(G, ground))
+
+            I_face = G * ((phi[g.face_i] - phi[g.face_j]) + S_face * (T[g.face_i] - T[g.face_j]))
+            joule = I_face * (phi[g.face_i] - phi[g.face_j])
+            T_face = (1 - w_i) * T[g.face_i] + w_i * T[g.face_j]
+            peltier = S_face * T_face * I_face
+
+            # Heat: conduction matrix with Dirichlet faces; Joule and Peltier lagged
+            K = self._face_conductance(kappa)
+            hot = g.hot_area / (g.hot_h / kappa[g.hot_cells])
+            cold = g.cold_area / (g.cold_h / kappa[g.cold_cells])
+            diag = np.zeros(g.n)
+            np.add.at(diag, g.hot_cells, hot)
+            np.add.at(diag, g.cold_cells, cold)
+            A_t = self._laplacian(K, diag)
+            b_t = np.zeros(g.n)
+            np.add.at(b_t, g.hot_cells, hot * Th)
+            np.add.at(b_t, g.cold_cells, cold * Tc)
+            np.add.at(b_t, g.face_i, 0.5 * joule - peltier)
+            np.add.at(b_t, g.face_j, 0.5 * joule + peltier)
+            T_new = self.thermal.solve(A_t, b_t, _fingerprint(K, diag))
+
+            change = np.abs(T_new - T).max()
+            T = T_new
+            if change < tol and iteration > 1:
+                break
+
+        Q_hot = float((hot * (Th - T[g.hot_cells])).sum())
+        Q_cold = float((cold * (T[g.cold_cells] - Tc)).sum())
+        V = float(np.average(phi[g.cold_cells[g.p_terminal]], weights=p_area))
+        power = -V * current
+        return {
+            'T': T,
+            'phi': phi,
+            'voltage': V,
+            'current': current,
+            'power': power,
+            'Q_hot': Q_hot,
+            'Q_cold': Q_cold,
+            'energy_balance': (Q_hot - Q_cold - power) / max(abs(Q_hot), 1e-30),
+            'iterations': iteration,
+        }
+
+    def performance(self, Th, Tc, test_current=None, progress=None):
+        """
+        Open-circuit voltage, internal resistance and matched-load operating point.
+
+        The V(I) line comes from an open-circuit solve and one loaded solve;
+        the matched point is then solved self-consistently. progress(fraction,
+        message), if given, is called after each of the three solves.
+        """
+        progress = progress or (lambda fraction, message='': None)
+        open_circuit = self.solve(Th, Tc, 0.0)
+        progress(1 / 3, 'open circuit solved')
+        V_oc = open_circuit['voltage']
+        if test_current is None:
+            test_current = -abs(V_oc)  # any load point will do: V(I) is close to linear
+        loaded = self.solve(Th, Tc, test_current, T_init=open_circuit['T'])
+        progress(2 / 3, 'loaded point solved')
+        R_int = (loaded['voltage'] - V_oc) / test_current
+        matched = self.solve(Th, Tc, -V_oc / (2 * R_int), T_init=open_circuit['T'])
+        progress(1.0, 'matched load solved')
+        return {
+            'voc': V_oc,
+            'r_int': R_int,
+            'current': -matched['current'],
+            'voltage': matched['voltage'],
+            'power': matched['power'],
+            'q_hot': matched['Q_hot'],
+            'efficiency': matched['power'] / matched['Q_hot'],
+            'energy_balance': matched['energy_balance'],
+            'T': matched['T'],
+        }
+
+    def sweep(self, Th_values, Tc):
+        """performance() over hot-side temperatures, sharing the factorizations."""
+        return [self.performance(Th, Tc) for Th in np.atleast_1d(Th_values)]
+
+
+def run_unicouple(Th=373.0, Tc=273.0, LHT=5.0, HIC=1.0, w_p=3.16, w_n=3.16, FF=0.5, rho_c=0.0, cells_per_mm=4,
+                  progress=None):
+    """
+    Solve one unicouple as shown on the COMSOL page.
+
+    Returns:
+        tuple: scalar results (dict, with the cell count) and the temperature on
+        the y mid-plane of the legs (DataFrame, z by x in mm).
+    """
+    import pandas as pd
+
+    grid = UnicoupleGrid(LHT, HIC, w_p, w_n, FF, cells_per_mm)
+    result = UnicoupleSolver(grid, rho_c=rho_c).performance(Th, Tc, progress=progress)
+    y_mid = 0.5 * (grid.y[1:] + grid.y[:-1])
+    j = np.argmin(np.abs(y_mid - 0.5 * min(w_p, w_n) * 1e-3))
+    cells = grid.index[:, j, :]
+    T = np.where(cells >= 0, result['T'][np.maximum(cells, 0)], np.nan)
+    slice_df = pd.DataFrame(T.T, index=0.5 * (grid.z[1:] + grid.z[:-1]) * 1e3,
+                            columns=0.5 * (grid.x[1:] + grid.x[:-1]) * 1e3)
+    scalars = {k: float(v) for k, v in result.items() if k != 'T'}
+    scalars['cells'] = grid.n
+    return scalars, slice_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--th', type=float, nargs='+', default=[373.0])
+    parser.add_argument('--tc', type=float, default=273.0)
+    parser.add_argument('--lht', type=float, default=5.0, help='leg height (mm)')
+    parser.add_argument('--hic', type=float, default=1.0, help='interconnect height (mm)')
+    parser.add_argument('--wp', type=float, default=3.16, help='p-leg width (mm)')
+    parser.add_argument('--wn', type=float, default=3.16, help='n-leg width (mm)')
+    parser.add_argument('--ff', type=float, default=0.5, help='fill factor')
+    parser.add_argument('--rho-c', type=float, default=0.0, help='contact resistivity (ohm m^2)')
+    parser.add_argument('--cells-per-mm', type=float, default=4)
+    parser.add_argument('--estm', nargs=2, metavar=('P_FORMULA', 'N_FORMULA'),
+                        help='temperature-dependent legs from estm.xlsx instead of the PbTe/SnSe constants')
+    args = parser.parse_args()
+
+    grid = UnicoupleGrid(args.lht, args.hic, args.wp, args.wn, args.ff, args.cells_per_mm)
+    materials = {}
+    if args.estm:
+        from materials import PropertyIndex, load_estm
+        index = PropertyIndex(load_estm())
+        materials = {'p_material': estm_material(index, args.estm[0]), 'n_material': estm_material(index, args.estm[1])}
+    solver = UnicoupleSolver(grid, rho_c=args.rho_c, **materials)
+    print(f"{grid.n} cells")
+    for Th in args.th:
+        start = time.perf_counter()
+        result = solver.performance(Th, args.tc)
+        print(f"Th={Th:.0f} K  Voc={result['voc']:.5f} V  R={result['r_int']:.4g} Ω  "
+              f"P={result['power'] * 1e3:.4g} mW  η={result['efficiency'] * 100:.3f} %  "
+              f"energy balance {result['energy_balance']:.1e}  ({time.perf_counter() - start:.2f} s)")
+    print("electric:", solver.electric.stats)
+    print("thermal:", solver.thermal.stats)
@@ -0,0 +1,216 @@
+"""Replay logged hot/cold-side temperatures through TEG models to get harvested energy.
+
+Logs are read chunk by chunk (CSV or Parquet), every candidate design is
+evaluated on the whole chunk at once, and only per-design running totals are
+kept, so memory does not grow with the length of the log.
+
+Example:
+    python field_replay.py site_log.parquet --designs designs.csv --threshold 1e-3
+"""
+import argparse
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from teg_model import SURROGATE_INPUTS, SurrogateModel, couple_performance, design_columns
+
+
+def iter_temperature_chunks(path, time_col='time', hot_col='T_hot', cold_col='T_cold', chunksize=1_000_000):
+    """
+    Yield (t, T_hot, T_cold) float arrays from a CSV or Parquet log, one chunk at a time.
+
+    The time column may hold seconds or anything pandas can parse as a datetime;
+    it is returned in seconds.
+    """
+    path = Path(path)
+    columns = [time_col, hot_col, cold_col]
+    if path.suffix in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+
+        batches = (batch.to_pandas() for batch in
+                   pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns))
+    else:
+        batches = pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+    for chunk in batches:
+        t = chunk[time_col]
+        if not pd.api.types.is_numeric_dtype(t):
+            t = pd.to_datetime(t).astype('int64') / 1e9
+        yield (t.to_numpy(dtype=float), chunk[hot_col].to_numpy(dtype=float),
+               chunk[cold_col].to_numpy(dtype=float))
+
+
+class ReplayAccumulator:
+    """Running energy, peak power and time-above-threshold totals for n designs."""
+
+    def __init__(self, n_designs, threshold=0.0, max_gap=None):
+        self.threshold = threshold
+        self.max_gap = max_gap  # gaps longer than this (s) are not integrated
+        self.energy = np.zeros(n_designs)
+        self.peak_power = np.zeros(n_designs)
+        self.peak_time = np.full(n_designs, np.nan)
+        self.time_above = np.zeros(n_designs)
+        self.out_of_domain = np.zeros(n_designs, dtype=np.int64)
+        self.duration = 0.0
+        self.samples = 0
+        self._last_t = None
+        self._last_power = None
+
+    def update(self, t, power, out_of_domain=None):
+        """
+        Add one chunk: t has shape (n,), power has shape (n_designs, n).
+
+        out_of_domain (bool, like power) marks samples the model could not evaluate;
+        they are only counted, their power is expected to be zero already.
+        """
+        if len(t) == 0:
+            return
+        if out_of_domain is not None:
+            self.out_of_domain += out_of_domain.sum(axis=1)
+        # Stitch the chunk to the previous one so no interval is lost at the boundary
+        if self._last_t is None:
+            t_prev = np.concatenate(([t[0]], t[:-1]))
+            p_prev = np.concatenate((power[:, :1], power[:, :-1]), axis=1)
+        else:
+            t_prev = np.concatenate(([self._last_t], t[:-1]))
+            p_prev = np.concatenate((self._last_power, power[:, :-1]), axis=1)
+        dt = t - t_prev
+        if self.max_gap is not None:
+            dt = np.where(dt > self.max_gap, 0.0, dt)
+        dt = np.clip(dt, 0.0, None)
+
+        # Trapezoidal energy, threshold time counted on the closing sample (strictly above,
+        # so samples without harvest never count, whatever the threshold)
+        self.energy += (0.5 * (power + p_prev) * dt).sum(axis=1)
+        self.time_above += ((power > self.threshold) * dt).sum(axis=1)
+        self.duration += dt.sum()
+        self.samples += len(t)
+
+        idx = power.argmax(axis=1)
+        chunk_peak = power[np.arange(len(power)), idx]
+        better = chunk_peak > self.peak_power
+        self.peak_power[better] = chunk_peak[better]
+        self.peak_time[better] = t[idx[better]]
+
+        self._last_t = t[-1]
+        self._last_power = power[:, -1:].copy()
+
+    def summary(self):
+        """Per-design totals as a DataFrame."""
+        hours = self.duration / 3600
+        return pd.DataFrame({
+            'energy_Wh': self.energy / 3600,
+            'mean_power_W': self.energy / self.duration if self.duration else np.nan,
+            'peak_power_W': self.peak_power,
+            'peak_time_s': self.peak_time,
+            'hours_above_threshold': self.time_above / 3600,
+            'fraction_above_threshold': self.time_above / self.duration if self.duration else np.nan,
+            'duration_h': hours,
+            'samples': self.samples,
+            'out_of_domain_fraction': self.out_of_domain / self.samples if self.samples else np.nan,
+        })
+
+
+def analytic_power(designs):
+    """Return a chunk evaluator for the analytic couple model over all designs."""
+    params = design_columns(designs)
+
+    def evaluate(T_hot, T_cold):
+        return couple_performance(T_hot[None, :], T_cold[None, :], **params)['power'], None
+    return evaluate
+
+
+def surrogate_power(designs, surrogate=None):
+    """
+    Return a chunk evaluator for the neural-network surrogate over all designs.
+
+    Designs need the surrogate geometry columns (everything in SURROGATE_INPUTS
+    except Delta_T, rho_c on the TEG_data.csv scale); Delta_T is taken from the
+    log. The evaluator returns power and a mask of the samples outside the
+    network's training ranges (SurrogateModel.domain), whose power is set to zero
+    rather than extrapolated.
+    """
+    surrogate = surrogate or SurrogateModel()
+    geometry_cols = [c for c in SURROGATE_INPUTS if c != 'Delta_T (K)']
+    geometry = pd.DataFrame(designs)[geometry_cols].to_numpy(dtype=float)
+    geometry_pos = [SURROGATE_INPUTS.index(c) for c in geometry_cols]
+    dT_pos = SURROGATE_INPUTS.index('Delta_T (K)')
+
+    def evaluate(T_hot, T_cold):
+        X = np.empty((len(T_hot), len(SURROGATE_INPUTS)))
+        X[:, dT_pos] = T_hot - T_cold
+        power = np.zeros((len(geometry), len(T_hot)))
+        outside = np.empty(power.shape, dtype=bool)
+        # One design per predict call, so the network's inputs and activations stay chunk-sized
+        for i, row in enumerate(geometry):
+            X[:, geometry_pos] = row
+            inside = surrogate.in_domain(X)
+            outside[i] = ~inside
+            if inside.any():
+                power[i, inside] = surrogate.predict(X[inside])[:, 0]
+        return np.clip(power, 0, None, out=power), outside
+    return evaluate
+
+
+def replay(path, designs, model='analytic', threshold=0.0, max_gap=None, chunksize=1_000_000,
+           time_col='time', hot_col='T_hot', cold_col='T_cold', n_modules=1):
+    """
+    Replay a temperature log through every design and summarise the harvest.
+
+    Parameters:
+        path (str or Path): CSV or Parquet log with time, hot- and cold-side temperature.
+        designs (DataFrame): one row per candidate design.
+        model (str): 'analytic' or 'surrogate'.
+        threshold (float): power (W) above which time is counted as useful.
+        max_gap (float): logger gaps longer than this (s) contribute no energy.
+        n_modules (int): identical couples per design; scales power and energy.
+
+    Returns:
+        DataFrame: one summary row per design, joined to the design table;
+        out_of_domain_fraction is the share of samples with a forward gradient
+        that the surrogate could not evaluate (no energy is counted for them).
+    """
+    designs = pd.DataFrame(designs).reset_index(drop=True)
+    evaluate = analytic_power(designs) if model == 'analytic' else surrogate_power(designs)
+    acc = ReplayAccumulator(len(designs), threshold=threshold, max_gap=max_gap)
+
+    for t, T_hot, T_cold in iter_temperature_chunks(path, time_col, hot_col, cold_col, chunksize):
+        power, outside = evaluate(T_hot, T_cold)
+        # Logged gradients can reverse (e.g. at night); no harvest then, and nothing to evaluate
+        forward = (T_hot > T_cold)[None, :]
+        power = np.where(forward, n_modules * power, 0.0)
+        acc.update(t, power, None if outside is None else outside & forward)
+
+    summary = acc.summary()
+    if summary['out_of_domain_fraction'].max() > 0:
+        warnings.warn(f"Up to {summary['out_of_domain_fraction'].max():.1%} of the samples of a design are outside "
+                      "the surrogate's training domain and count as no harvest (see out_of_domain_fraction)")
+    return pd.concat([designs, summary], axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', help='CSV or Parquet temperature log')
+    parser.add_argument('--designs', help='CSV of candidate designs (default: PbTe/SnSe couple)')
+    parser.add_argument('--model', choices=['analytic', 'surrogate'], default='analytic')
+    parser.add_argument('--threshold', type=float, default=0.0, help='power threshold (W)')
+    parser.add_argument('--max-gap', type=float, default=None, help='ignore gaps longer than this (s)')
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--time-col', default='time')
+    parser.add_argument('--hot-col', default='T_hot')
+    parser.add_argument('--cold-col', default='T_cold')
+    parser.add_argument('--n-modules', type=int, default=1)
+    parser.add_argument('--out', help='write the summary CSV here instead of printing it')
+    args = parser.parse_args()
+
+    designs = pd.read_csv(args.designs) if args.designs else pd.DataFrame([{}])
+    result = replay(args.log, designs, model=args.model, threshold=args.threshold,
+                    max_gap=args.max_gap, chunksize=args.chunksize, time_col=args.time_col,
+                    hot_col=args.hot_col, cold_col=args.cold_col, n_modules=args.n_modules)
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f"Summary saved: {args.out}")
+    else:
+        print(result.to_string(index=False))
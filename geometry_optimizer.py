@@ -0,0 +1,203 @@
+"""Closed-form unicouple geometry optimization, checked against the 5000 COMSOL runs.
+
+With area-specific leg resistances r = ρL + c' (c' = 2ρc plus the copper pads)
+the matched-load power per unit leg area is maximized at A_n/A_p = √(r_n / r_p),
+and for efficiency at A_n/A_p = √(r_n κ_p / (r_p κ_n)). The copper interconnects
+of height h leave a share L / (L + a) of ΔT over the legs, a = 2hκ/κ_Cu, so the
+power density ∝ L² / ((L + a)² (ρL + c')) peaks at
+
+    L* = a/2 + √(a²/4 + 2ac'/ρ)
+
+with the couple's ρ and c' combined as (√x_p + √x_n)². Every function
+broadcasts, so millions of material/temperature cases are solved in one call.
+The optimum is then evaluated with teg_model.unicouple_performance, which also
+includes the top bridge.
+
+    python geometry_optimizer.py --validate
+    python geometry_optimizer.py --cases 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from comsol_results import INPUT_COLS, SWEEP_PARAMS, load_results
+from teg_model import KAPPA_CU, PBTE_SNSE, SIGMA_CU, T_COLD_COMSOL, unicouple_performance
+
+MATERIAL_KEYS = ('S_p', 'S_n', 'sigma_p', 'sigma_n', 'kappa_p', 'kappa_n')
+
+
+def optimal_geometry(Th, Tc=T_COLD_COMSOL, rho_c=1e-8, HIC=1.0, FF=0.5, objective='power',
+                     L_bounds=(0.5, 5.0), w_bounds=(0.5, 5.0), **materials):
+    """
+    Best leg length and widths of the COMSOL unicouple for each case.
+
+    Parameters:
+        Th, Tc (array): hot/cold temperatures (K).
+        rho_c (array): contact resistivity (Ω·m²).
+        HIC (array): interconnect height (mm).
+        FF (array): fill factor (only used when evaluating the optimum).
+        objective (str): 'power' (power density) or 'efficiency'.
+        L_bounds, w_bounds (tuple): leg height and width limits (mm), the
+            sweep ranges by default. The wider leg is set to the upper width.
+        materials: couple_performance material keywords (PbTe/SnSe by default).
+
+    Returns:
+        dict: 'LHT (mm)', 'w_p (mm)', 'w_n (mm)', 'area_ratio' (A_n/A_p of
+        those widths) and the unicouple_performance outputs at that geometry.
+    """
+    props = {k: materials.get(k, PBTE_SNSE[k]) for k in MATERIAL_KEYS}
+    rho_p, rho_n = 1 / np.asarray(props['sigma_p']), 1 / np.asarray(props['sigma_n'])
+    h = np.asarray(HIC, dtype=float) * 1e-3
+
+    # Area-specific series terms: two contacts and two copper pads per leg
+    c = 2 * np.asarray(rho_c, dtype=float) + 2 * h / SIGMA_CU
+    kappa_leg = 0.5 * (props['kappa_p'] + props['kappa_n'])
+    a = 2 * h * kappa_leg / KAPPA_CU
+
+    if objective == 'power':
+        rho_eff = (np.sqrt(rho_p) + np.sqrt(rho_n))**2
+        c_eff = c * 4  # (√c + √c)² for equal contacts on both legs
+        L = a / 2 + np.sqrt(a**2 / 4 + 2 * a * c_eff / rho_eff)
+    elif objective == 'efficiency':
+        # Longer legs only reduce the contact and interconnect losses
+        L = np.full(np.broadcast(a, c).shape, L_bounds[1] * 1e-3)
+    else:
+        raise ValueError(f"Unknown objective: {objective}")
+    L = np.clip(L, L_bounds[0] * 1e-3, L_bounds[1] * 1e-3)
+
+    r_p, r_n = rho_p * L + c, rho_n * L + c
+    ratio = r_n / r_p if objective == 'power' else r_n * props['kappa_p'] / (r_p * props['kappa_n'])
+    ratio = np.sqrt(ratio)
+    w_ratio = np.sqrt(ratio)  # w_n / w_p
+    w_p = np.clip(w_bounds[1] / np.maximum(w_ratio, 1.0), *w_bounds)
+    w_n = np.clip(w_p * w_ratio, *w_bounds)
+
+    L_mm = L * 1e3
+    result = unicouple_performance(L_mm, HIC, w_p, w_n, FF, rho_c, Th, Tc, **props)
+    # The area ratio actually built, after clipping the widths to their bounds
+    result.update({'LHT (mm)': L_mm, 'w_p (mm)': w_p, 'w_n (mm)': w_n, 'area_ratio': (w_n / w_p)**2})
+    return result
+
+
+def _predict_rows(df, **materials):
+    X = [df[col].to_numpy() for col in INPUT_COLS]
+    return unicouple_performance(*X, **materials)
+
+
+def validate(results=None, **materials):
+    """
+    Reduced-order predictions against every COMSOL run.
+
+    Returns:
+        DataFrame: per row, the predicted PDmax and flux, their relative errors,
+        and the optimality gap (model power density of the row's geometry
+        over the model optimum for its Th, rho_c, HIC and FF; <= 1 when the
+        closed form is right).
+        dict: summary statistics.
+    """
+    df = load_results() if results is None else results
+    predicted = _predict_rows(df, **materials)
+    best = optimal_geometry(df['Th (K)'].to_numpy(), rho_c=df['rho_c'].to_numpy(), HIC=df['HIC (mm)'].to_numpy(),
+                            FF=df['FF'].to_numpy(), **materials)
+
+    rows = pd.DataFrame({
+        'PDmax (COMSOL)': df['PDmax'],
+        'PDmax (model)': predicted['pd_max'],
+        'flux (COMSOL)': df['flux (W)'],
+        'flux (model)': predicted['q_hot'],
+        'optimal LHT (mm)': best['LHT (mm)'],
+        'optimal w_p (mm)': best['w_p (mm)'],
+        'optimal w_n (mm)': best['w_n (mm)'],
+        'optimal PDmax (model)': best['pd_max'],
+    }, index=df.index)
+    rows['PDmax error'] = rows['PDmax (model)'] / rows['PDmax (COMSOL)'] - 1
+    rows['flux error'] = rows['flux (model)'] / rows['flux (COMSOL)'] - 1
+    rows['optimality gap'] = rows['PDmax (model)'] / rows['optimal PDmax (model)']
+    rows = pd.concat([df[INPUT_COLS], rows], axis=1)
+
+    summary = {}
+    for name in ('PDmax', 'flux'):
+        error = rows[f'{name} error']
+        summary[f'{name} median |error|'] = float(error.abs().median())
+        summary[f'{name} log correlation'] = float(np.corrcoef(np.log(rows[f'{name} (model)']),
+                                                             np.log(rows[f'{name} (COMSOL)']))[0, 1])
+    summary['rows above model optimum'] = int((rows['optimality gap'] > 1 + 1e-9).sum())
+    summary['max optimality gap'] = float(rows['optimality gap'].max())
+    return rows, summary
+
+
+def calibrate(results=None, train_fraction=0.8, seed=0, **materials):
+    """
+    Fit a power-law correction PDmax_COMSOL ≈ PDmax_model · exp(c0) · Π x_j^c_j.
+
+    The exponents over the seven sweep inputs (ΔT instead of Th) are fitted by
+    least squares in log space on a random training split, and the held-out
+    rows measure how much of the model-COMSOL gap is systematic.
+
+    Returns:
+        Series: coefficients.
+        dict: median |error| on the held-out rows before and after correction.
+    """
+    df = load_results() if results is None else results
+    predicted = _predict_rows(df, **materials)['pd_max']
+    features = df[INPUT_COLS].to_numpy(dtype=float).copy()
+    features[:, INPUT_COLS.index(SWEEP_PARAMS['Th'][0])] -= T_COLD_COMSOL
+    design = np.column_stack([np.ones(len(df)), np.log(features)])
+    target = np.log(df['PDmax'].to_numpy() / predicted)
+
+    train = np.random.default_rng(seed).random(len(df)) < train_fraction
+    coef, *_ = np.linalg.lstsq(design[train], target[train], rcond=None)
+    corrected = predicted * np.exp(design @ coef)
+    test = ~train
+    report = {
+        'held-out median |error| (model)': float(np.median(np.abs(predicted[test] / df['PDmax'][test] - 1))),
+        'held-out median |error| (calibrated)': float(np.median(np.abs(corrected[test] / df['PDmax'][test] - 1))),
+    }
+    names = ['intercept'] + [f'log {col}' for col in INPUT_COLS]
+    names[1 + INPUT_COLS.index(SWEEP_PARAMS['Th'][0])] = 'log ΔT (K)'
+    return pd.Series(coef, index=names), report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--validate', action='store_true', help='compare against comsol_results_with_efficiency.csv')
+    parser.add_argument('--out', help='per-row validation CSV')
+    parser.add_argument('--cases', type=int, default=0, help='time the optimizer on this many random cases')
+    parser.add_argument('--objective', default='power', choices=['power', 'efficiency'])
+    args = parser.parse_args()
+
+    if args.validate:
+        rows, summary = validate()
+        for key, value in summary.items():
+            print(f"{key:32s} {value:.4g}")
+        coef, report = calibrate()
+        print("\nPower-law correction (log PDmax_COMSOL - log PDmax_model):")
+        print(coef.round(3).to_string())
+        for key, value in report.items():
+            print(f"{key:40s} {value:.4g}")
+        if args.out:
+            rows.to_csv(args.out, index=False)
+            print(f"Per-row errors saved: {args.out}")
+    if args.cases:
+        rng = np.random.default_rng(0)
+        n = args.cases
+        cases = {
+            'Th': rng.uniform(300, 500, n),
+            'rho_c': 10 ** rng.uniform(-9, -7, n),
+            'HIC': rng.uniform(0.5, 3.0, n),
+            'FF': rng.uniform(0.05, 0.95, n),
+            'S_p': rng.uniform(100e-6, 400e-6, n),
+            'S_n': -rng.uniform(100e-6, 400e-6, n),
+            'sigma_p': 10 ** rng.uniform(2, 5, n),
+            'sigma_n': 10 ** rng.uniform(2, 5, n),
+            'kappa_p': rng.uniform(0.5, 3.0, n),
+            'kappa_n': rng.uniform(0.5, 3.0, n),
+        }
+        start = time.perf_counter()
+        best = optimal_geometry(objective=args.objective, **cases)
+        elapsed = time.perf_counter() - start
+        print(f"{n} cases in {elapsed:.2f} s ({n / elapsed:,.0f} cases/s); "
+              f"median optimal LHT {np.median(best['LHT (mm)']):.2f} mm, "
+              f"median A_n/A_p {np.median(best['area_ratio']):.2f}")
@@ -0,0 +1,106 @@
+"""Resized image derivatives for display, built once and cached on disk by source hash.
+
+The pages show photos and COMSOL/matplotlib figures several times larger
+than they are drawn (a 3072x4080 team photo at 200 px, a 5400x3000 plot in
+half a column). derivative() scales a source down to the width it is
+displayed at (times DEVICE_PIXEL_RATIO for high-density screens) and
+re-encodes it: photos (JPEG or WebP sources) as lossy WebP, figures as
+lossless WebP so text and lines stay sharp, or PNG on request. Files are written to .cache/images
+named by a hash of the source bytes and the output settings, so an edited
+source gets new derivatives and unchanged ones are never rebuilt.
+
+    python image_assets.py Images comsol --width 400
+"""
+import argparse
+import hashlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+ROOT = Path(__file__).resolve().parent
+ASSET_DIR = ROOT / '.cache' / 'images'
+DEVICE_PIXEL_RATIO = 2
+FULL_WIDTH = 1200  # display width assumed for images stretched to their container
+PHOTO_QUALITY = 80
+PHOTO_FORMATS = ('JPEG', 'MPO', 'WEBP')
+SOURCE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def derivative_key(path, pixels, fmt):
+    """Short sha256 of a source file's bytes and the output settings."""
+    digest = hashlib.sha256(Path(path).read_bytes())
+    digest.update(f"{pixels}:{fmt}:{PHOTO_QUALITY}".encode())
+    return digest.hexdigest()[:16]
+
+
+def render(path, pixels, fmt='webp'):
+    """
+    Encode a source image scaled down to at most `pixels` wide.
+
+    Parameters:
+        fmt (str): 'webp' (lossy for photos, lossless otherwise) or 'png'.
+
+    Returns:
+        bytes: the encoded image.
+    """
+    with Image.open(path) as image:
+        photo = image.format in PHOTO_FORMATS
+        if photo:
+            # Let the JPEG decoder skip detail that the resize would discard anyway
+            image.draft('RGB', (pixels, pixels * image.height // image.width))
+        image = ImageOps.exif_transpose(image)
+        if image.width > pixels:
+            image = image.resize((pixels, max(1, round(image.height * pixels / image.width))), Image.LANCZOS)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        buffer = io.BytesIO()
+        if fmt == 'png':
+            image.save(buffer, 'PNG', optimize=True)
+        elif photo:
+            image.save(buffer, 'WEBP', quality=PHOTO_QUALITY, method=4)
+        else:
+            image.save(buffer, 'WEBP', lossless=True, method=4)
+    return buffer.getvalue()
+
+
+def derivative(path, width=None, fmt='webp', asset_dir=ASSET_DIR):
+    """
+    Path of the derivative of an image for display at `width` CSS pixels, built first if needed.
+
+    Parameters:
+        width (int): display width in CSS pixels (default: FULL_WIDTH).
+        fmt (str): 'webp' or 'png'.
+    """
+    path = Path(path)
+    pixels = (width or FULL_WIDTH) * DEVICE_PIXEL_RATIO
+    asset_dir = Path(asset_dir)
+    target = asset_dir / f"{path.stem}-{pixels}w-{derivative_key(path, pixels, fmt)}.{fmt}"
+    if not target.exists():
+        asset_dir.mkdir(parents=True, exist_ok=True)
+        data = render(path, pixels, fmt)
+        fd, tmp = tempfile.mkstemp(dir=asset_dir, suffix='.' + fmt)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sources', nargs='+', type=Path, help='image files or directories')
+    parser.add_argument('--width', type=int, default=None, help='display width in CSS pixels (default: full width)')
+    parser.add_argument('--format', default='webp', choices=['webp', 'png'])
+    args = parser.parse_args()
+
+    files = [f for source in args.sources
+             for f in (sorted(source.iterdir()) if source.is_dir() else [source])
+             if f.suffix.lower() in SOURCE_SUFFIXES]
+    for f in files:
+        start = time.perf_counter()
+        target = derivative(f, args.width, args.format)
+        print(f"{str(f):45s} {f.stat().st_size / 1e3:8.1f} kB -> {target.stat().st_size / 1e3:7.1f} kB "
+              f"in {time.perf_counter() - start:.2f} s")
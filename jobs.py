@@ -0,0 +1,264 @@
+"""Background jobs for long computations started from the app.
+
+A Streamlit script that runs a sweep or a large solve blocks its session
+until it returns. JobQueue runs such calls in a bounded process pool
+instead: pages submit a job, keep its id in session state and poll it.
+
+- Admission control: at most max_pending jobs may be queued or running;
+  further submissions raise QueueFull instead of piling up.
+- Deduplication: a job is keyed by a hash of its function and arguments, so
+  identical requests from different sessions share one run, and finished
+  results stay cached (least recently used first out) for later requests.
+  Failed and cancelled jobs are kept for failed_ttl seconds so that their
+  pages can still report them; an identical request runs them again.
+- Progress and cancellation: a job function that takes a `progress`
+  argument gets a callable progress(fraction, message); cancelling a running
+  job makes its next progress call raise JobCancelled. Queued jobs are
+  cancelled before they start.
+
+Held in st.cache_resource (utils.job_queue), one queue serves every session
+of the server process.
+"""
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+
+class QueueFull(RuntimeError):
+    """Raised by JobQueue.submit when max_pending jobs are already unfinished."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled."""
+
+
+def job_key(func, kwargs):
+    """Hash of a function and its keyword arguments (JSON, with repr() for other values)."""
+    payload = json.dumps([f"{func.__module__}.{func.__qualname__}", kwargs], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@contextmanager
+def _without_main():
+    """
+    Start processes without re-running __main__ in them.
+
+    Spawned children import the parent's __main__ by path; under Streamlit that
+    is the page script, so a stand-in module is put in its place meanwhile.
+    """
+    main = sys.modules.get('__main__')
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def _run(func, kwargs, key, state, cancelled):
+    """Worker-process entry point."""
+    def progress(fraction, message=''):
+        state[key] = (float(fraction), str(message))
+        if key in cancelled:
+            raise JobCancelled(key)
+
+    state[key] = (0.0, 'started')
+    if key in cancelled:
+        raise JobCancelled(key)
+    if 'progress' in inspect.signature(func).parameters:
+        kwargs = dict(kwargs, progress=progress)
+    return func(**kwargs)
+
+
+class Job:
+    """Handle on one submitted computation."""
+
+    def __init__(self, key, name, future, queue):
+        self.id = key
+        self.name = name
+        self.future = future
+        self.submitted = time.time()
+        self.finished = None
+        self._queue = queue
+        future.add_done_callback(self._finish)
+
+    def _finish(self, future):
+        self.finished = time.time()
+
+    @property
+    def status(self):
+        if self.future.cancelled():
+            return CANCELLED
+        if self.future.done():
+            error = self.future.exception()
+            return DONE if error is None else CANCELLED if isinstance(error, JobCancelled) else FAILED
+        return RUNNING if self.id in self._queue._state else QUEUED
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def progress(self):
+        """(fraction, message) last reported by the job."""
+        if self.status == DONE:
+            return 1.0, 'done'
+        return self._queue._state.get(self.id, (0.0, self.status))
+
+    @property
+    def error(self):
+        if not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def result(self, timeout=None):
+        """The job's return value (blocks until it is done; raises its exception if it failed)."""
+        return self.future.result(timeout)
+
+    def cancel(self):
+        """Cancel the job: at once if it is still queued, at its next progress call if it is running."""
+        if not self.future.cancel() and not self.future.done():
+            self._queue._cancelled[self.id] = True
+        return self.future.cancelled() or self.id in self._queue._cancelled
+
+
+class JobQueue:
+    """
+    Bounded process pool with admission control, deduplication and a result cache.
+
+    Parameters:
+        max_workers (int): worker processes (default: all cores but one, at least one).
+        max_pending (int): unfinished jobs allowed at once.
+        cache_size (int): finished jobs kept for repeated requests.
+        failed_ttl (float): seconds failed and cancelled jobs are kept after they end.
+    """
+
+    def __init__(self, max_workers=None, max_pending=8, cache_size=64, failed_ttl=600.0):
+        context = mp.get_context('spawn')
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.failed_ttl = failed_ttl
+        with _without_main():
+            self._manager = context.Manager()
+        self._state = self._manager.dict()  # job id -> (fraction, message), once started
+        self._cancelled = self._manager.dict()  # job id -> True
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        # Failed and cancelled jobs go once failed_ttl has passed (their pages read
+        # the error until then); the oldest finished ones go once the cache is full.
+        now = time.time()
+        for key, job in list(self._jobs.items()):
+            if job.done and job.status != DONE and now - (job.finished or now) > self.failed_ttl:
+                self._forget(key)
+        finished = [key for key, job in self._jobs.items() if job.done]
+        for key in finished[:max(0, len(finished) - self.cache_size)]:
+            self._forget(key)
+
+    def _forget(self, key):
+        self._jobs.pop(key, None)
+        self._state.pop(key, None)
+        self._cancelled.pop(key, None)
+
+    def submit(self, func, name=None, **kwargs):
+        """
+        Run func(**kwargs) in the pool, or return the identical job already queued, running or done
+        (a failed or cancelled one is run again).
+
+        func must be importable by the worker processes (a module-level function
+        outside the running script).
+
+        Raises:
+            QueueFull: max_pending jobs are unfinished.
+        """
+        key = job_key(func, kwargs)
+        with self._lock:
+            self._prune()
+            if key in self._jobs:
+                if self._jobs[key].status not in (FAILED, CANCELLED):
+                    self._jobs.move_to_end(key)
+                    return self._jobs[key]
+                self._forget(key)
+            if self.pending >= self.max_pending:
+                raise QueueFull(f"{self.pending} jobs are already waiting or running; try again shortly")
+            with _without_main():
+                # Workers are started on demand by submit()
+                future = self._executor.submit(_run, func, kwargs, key, self._state, self._cancelled)
+            job = self._jobs[key] = Job(key, name or func.__name__, future, self)
+            return job
+
+    def get(self, job_id):
+        """The job with this id, or None if it was never submitted or has been evicted."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def pending(self):
+        """Number of queued or running jobs."""
+        return sum(not job.done for job in self._jobs.values())
+
+    def jobs(self):
+        """Summary of every known job: id, name, status, progress and age."""
+        now = time.time()
+        with self._lock:
+            return [{'id': job.id, 'name': job.name, 'status': job.status, 'progress': job.progress[0],
+                     'message': job.progress[1], 'age_s': now - job.submitted} for job in self._jobs.values()]
+
+    def shutdown(self, cancel=True):
+        with self._lock:
+            for job in self._jobs.values():
+                if cancel:
+                    job.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        self._manager.shutdown()
+
+
+def _demo_task(seconds=2.0, steps=10, progress=None):
+    """Sleep in steps, reporting progress (used by the command-line check)."""
+    for i in range(steps):
+        time.sleep(seconds / steps)
+        progress((i + 1) / steps, f"step {i + 1}/{steps}")
+    return seconds
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Workers must find the job functions by module name, not in this script
+    from jobs import DONE, JobQueue, QueueFull, _demo_task
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=6, help='distinct demo jobs to submit')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-pending', type=int, default=4)
+    args = parser.parse_args()
+
+    queue = JobQueue(args.workers, args.max_pending)
+    submitted = []
+    for i in range(args.jobs):
+        try:
+            submitted.append(queue.submit(_demo_task, seconds=1.0 + 0.1 * i))
+        except QueueFull as error:
+            print(f"job {i}: rejected ({error})")
+    duplicate = queue.submit(_demo_task, seconds=1.0)
+    print(f"duplicate request shares job {duplicate.id}: {duplicate is submitted[0]}")
+    submitted[-1].cancel()
+    while queue.pending:
+        print('  '.join(f"{row['status']}:{row['progress']:.0%}" for row in queue.jobs()))
+        time.sleep(0.5)
+    for job in submitted:
+        print(job.id, job.status, job.result() if job.status == DONE else job.error)
+    queue.shutdown()
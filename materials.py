@@ -0,0 +1,221 @@
+"""Access to the estm thermoelectric property database (estm.xlsx)."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ESTM_PATH = Path(__file__).resolve().parent / 'estm.xlsx'
+
+# estm column names
+FORMULA = 'Formula'
+TEMPERATURE = 'temperature(K)'
+SEEBECK = 'seebeck_coefficient(μV/K)'
+SIGMA = 'electrical_conductivity(S/m)'
+KAPPA = 'thermal_conductivity(W/mK)'
+ZT = 'ZT'
+REFERENCE = 'reference'
+
+
+def load_estm(path=ESTM_PATH):
+    """Load the estm property table."""
+    return pd.read_excel(path)
+
+
+def reference_scatter(data, formula, temperature, min_rel_std=0.0):
+    """
+    Spread of a material's properties between the references that report it.
+
+    Each reference's curve is linearly interpolated to `temperature` (references
+    whose temperature range does not cover it are skipped unless none does, in
+    which case the nearest tabulated values are used). Seebeck is returned in V/K.
+
+    Parameters:
+        data (DataFrame): estm table.
+        formula (str): material formula, e.g. 'SnSe'.
+        temperature (float): temperature (K).
+        min_rel_std (float): lower bound on the relative standard deviation,
+            for materials reported by a single reference.
+
+    Returns:
+        dict: {'S', 'sigma', 'kappa'} -> (mean, std), plus 'n_references'.
+    """
+    material = data[data[FORMULA] == formula]
+    if material.empty:
+        raise ValueError(f"Material not found in estm: {formula}")
+
+    values = []
+    for _, ref_data in material.groupby(REFERENCE):
+        ref_data = ref_data.sort_values(TEMPERATURE)
+        T = ref_data[TEMPERATURE].to_numpy()
+        covered = T[0] <= temperature <= T[-1]
+        values.append((covered, [np.interp(temperature, T, ref_data[col].to_numpy())
+                                 for col in (SEEBECK, SIGMA, KAPPA)]))
+    if any(covered for covered, _ in values):
+        values = [v for covered, v in values if covered]
+    else:
+        values = [v for _, v in values]
+    values = np.array(values)
+    values[:, 0] *= 1e-6  # μV/K -> V/K
+
+    mean = values.mean(axis=0)
+    std = values.std(axis=0, ddof=1) if len(values) > 1 else np.zeros(3)
+    std = np.maximum(std, min_rel_std * np.abs(mean))
+    scatter = {name: (mean[i], std[i]) for i, name in enumerate(('S', 'sigma', 'kappa'))}
+    scatter['n_references'] = len(values)
+    return scatter
+
+
+def screen_pairs(data, temperature):
+    """
+    Rank every p-type / n-type pair tabulated at one temperature.
+
+    Vectorized version of the screening in COMSOL_TEG_material_selection.ipynb:
+    the power figure (T²(Sp - Sn)²/(ρp + ρn)) and the combined ZT are computed
+    on the full p x n grid at once.
+
+    Returns:
+        DataFrame: p-type, n-type, Seebeck difference, power figure and
+        combined ZT, sorted best first.
+    """
+    at_T = data[data[TEMPERATURE] == temperature]
+    p_types = at_T[at_T[SEEBECK] > 0]
+    n_types = at_T[at_T[SEEBECK] < 0]
+
+    S_p = p_types[SEEBECK].to_numpy()[:, None] * 1e-6
+    S_n = n_types[SEEBECK].to_numpy()[None, :] * 1e-6
+    rho_p = 1 / p_types[SIGMA].to_numpy()[:, None]
+    rho_n = 1 / n_types[SIGMA].to_numpy()[None, :]
+    k_p = p_types[KAPPA].to_numpy()[:, None]
+    k_n = n_types[KAPPA].to_numpy()[None, :]
+
+    dS = S_p - S_n
+    power = temperature**2 * dS**2 / (rho_p + rho_n)
+    combined_ZT = dS**2 * temperature / (np.sqrt(rho_n * k_n) + np.sqrt(rho_p * k_p))**2
+
+    pairs = pd.DataFrame({
+        'p-type': np.repeat(p_types[FORMULA].to_numpy(), len(n_types)),
+        'n-type': np.tile(n_types[FORMULA].to_numpy(), len(p_types)),
+        'Seebeck Difference (V/K)': dS.ravel(),
+        'Power Output (P)': power.ravel(),
+        'Combined ZT': combined_ZT.ravel(),
+    })
+    return pairs.sort_values(by=['Power Output (P)', 'Combined ZT'], ascending=[False, False], ignore_index=True)
+
+
+def _pchip_slopes(T, values, offsets):
+    """Fritsch-Carlson node derivatives (as scipy's PchipInterpolator) for every material segment."""
+    h = np.diff(T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = np.diff(values, axis=0) / h[:, None]  # entries across material boundaries are unused
+    d = np.zeros_like(values)
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        n = stop - start
+        if n < 2:
+            continue
+        hk, dk = h[start:stop - 1, None], delta[start:stop - 1]
+        if n == 2:
+            d[start:stop] = dk
+            continue
+        # Interior nodes: weighted harmonic mean, zero at local extrema
+        w1 = 2 * hk[1:] + hk[:-1]
+        w2 = hk[1:] + 2 * hk[:-1]
+        same_sign = np.sign(dk[:-1]) * np.sign(dk[1:]) > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            harmonic = (w1 + w2) / (w1 / dk[:-1] + w2 / dk[1:])
+        d[start + 1:stop - 1] = np.where(same_sign, harmonic, 0.0)
+        # End nodes: shape-preserving three-point estimate
+        for node, h0, h1, d0, d1 in ((start, hk[0], hk[1], dk[0], dk[1]),
+                                     (stop - 1, hk[-1], hk[-2], dk[-1], dk[-2])):
+            end = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+            end = np.where(np.sign(end) != np.sign(d0), 0.0, end)
+            end = np.where((np.sign(d0) != np.sign(d1)) & (np.abs(end) > 3 * np.abs(d0)), 3 * d0, end)
+            d[node] = end
+    return d
+
+
+class PropertyIndex:
+    """
+    Batched (formula, T) interpolation over the estm table.
+
+    Every material's curve is stored sorted by temperature in one contiguous
+    array, with offsets marking where each formula starts; values reported at
+    the same temperature by several references are averaged. Queries locate
+    their interval with a single searchsorted over the composite key
+    formula_id * span + T and interpolate linearly or with PCHIP. Temperatures
+    outside a material's range are clamped to its end values.
+
+    Example:
+        index = PropertyIndex(load_estm())
+        S = index.query(index.formula_ids(['SnSe', 'PbTe']), [450, 600], [SEEBECK])
+    """
+
+    def __init__(self, data, columns=(SEEBECK, SIGMA, KAPPA, ZT)):
+        self.columns = list(columns)
+        table = (data.groupby([FORMULA, TEMPERATURE], sort=True)[self.columns].mean()
+                 .dropna().reset_index())
+        self.formulas = pd.Index(table[FORMULA].unique())
+        ids = self.formulas.get_indexer(table[FORMULA])
+        self.offsets = np.searchsorted(ids, np.arange(len(self.formulas) + 1))
+        self.T = table[TEMPERATURE].to_numpy(dtype=float)
+        self.values = table[self.columns].to_numpy(dtype=float)
+        self.T_min = self.T[self.offsets[:-1]]
+        self.T_max = self.T[self.offsets[1:] - 1]
+
+        self._origin = self.T.min()
+        self._span = self.T.max() - self._origin + 1.0
+        self._keys = ids * self._span + (self.T - self._origin)
+        self._slopes = None
+
+    def formula_ids(self, formulas):
+        """Integer ids of formula names; raises ValueError for unknown materials."""
+        ids = self.formulas.get_indexer(np.atleast_1d(formulas))
+        if (ids < 0).any():
+            missing = np.atleast_1d(formulas)[ids < 0]
+            raise ValueError(f"Materials not found in estm: {', '.join(map(str, missing[:5]))}")
+        return ids
+
+    def query(self, formula_ids, T, columns=None, method='linear'):
+        """
+        Interpolated properties for broadcast (formula_id, T) pairs.
+
+        Parameters:
+            formula_ids (array): ids from formula_ids().
+            T (array): temperatures (K).
+            columns (list): subset of the indexed columns (default: all).
+            method (str): 'linear' or 'pchip'.
+
+        Returns:
+            ndarray: shape broadcast(formula_ids, T) + (n_columns,), in estm units.
+        """
+        formula_ids, T = np.broadcast_arrays(np.asarray(formula_ids, dtype=int), np.asarray(T, dtype=float))
+        cols = [self.columns.index(c) for c in (columns or self.columns)]
+        start, stop = self.offsets[formula_ids], self.offsets[formula_ids + 1]
+        T_c = np.clip(T, self.T_min[formula_ids], self.T_max[formula_ids])
+
+        # Left node of the bracketing interval, kept inside the material's own segment
+        i = np.searchsorted(self._keys, formula_ids * self._span + (T_c - self._origin), side='right') - 1
+        i = np.clip(i, start, np.maximum(stop - 2, start))
+        j = np.minimum(i + 1, stop - 1)
+
+        T0, T1 = self.T[i], self.T[j]
+        h = np.where(j > i, T1 - T0, 1.0)
+        t = ((T_c - T0) / h)[..., None]
+        values = self.values[:, cols]
+        y0, y1 = values[i], values[j]
+        if method == 'linear':
+            return y0 + t * (y1 - y0)
+        if method != 'pchip':
+            raise ValueError(f"Unknown interpolation method: {method}")
+
+        if self._slopes is None:
+            self._slopes = _pchip_slopes(self.T, self.values, self.offsets)
+        slopes = self._slopes[:, cols]
+        d0, d1 = slopes[i], slopes[j]
+        h = h[..., None]
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * y0 + (t3 - 2 * t2 + t) * h * d0
+                + (-2 * t3 + 3 * t2) * y1 + (t3 - t2) * h * d1)
+
+    def lookup(self, formulas, T, columns=None, method='linear'):
+        """query() by formula name."""
+        return self.query(self.formula_ids(formulas), T, columns, method)
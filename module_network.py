@@ -0,0 +1,178 @@
+"""I-V-P curves of series/parallel networks of mismatched couples.
+
+Every couple is a Norton source: a current Voc/R driven from its negative to
+its positive node in parallel with a conductance 1/R, so a whole array is one
+linear nodal system G v = b. The negative terminal is grounded and the
+positive terminal is held at the load voltage; the internal-node block of G is
+factorized once and every load point (and every set of couple EMFs) is a
+column of one batched right-hand side. Couples are linear, without bypass
+diodes, so a badly mismatched couple can be driven in reverse and absorb power.
+
+    python module_network.py --series 50 --parallel 100 --dt-spread 15
+"""
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from teg_model import couple_performance
+
+
+class ModuleNetwork:
+    """
+    Graph of couples between numbered nodes.
+
+    Parameters:
+        n_nodes (int): number of nodes.
+        negative, positive (array): per couple, the node on its negative and positive side.
+        terminal_negative, terminal_positive (int): output terminals (the negative one is grounded).
+    """
+
+    def __init__(self, n_nodes, negative, positive, terminal_negative=0, terminal_positive=1):
+        self.n_nodes = n_nodes
+        self.negative = np.asarray(negative)
+        self.positive = np.asarray(positive)
+        self.terminals = (terminal_negative, terminal_positive)
+        self.internal = np.setdiff1d(np.arange(n_nodes), self.terminals)
+        self._r_key = None
+        self._lu = None
+
+    @property
+    def n_couples(self):
+        return len(self.negative)
+
+    def _factorize(self, r_int):
+        # Reuse the factorization while the couple resistances are unchanged
+        key = r_int.tobytes()
+        if key == self._r_key:
+            return
+        g = 1 / r_int
+        a, b = self.negative, self.positive
+        G = sp.coo_matrix((np.concatenate([g, g, -g, -g]),
+                           (np.concatenate([a, b, a, b]), np.concatenate([a, b, b, a]))),
+                          shape=(self.n_nodes, self.n_nodes)).tocsr()
+        self._G_ii = G[self.internal][:, self.internal].tocsc()
+        self._G_it = G[self.internal][:, self.terminals[1]].toarray().ravel()
+        self._G_t = G[self.terminals[1]]
+        self._lu = spla.splu(self._G_ii) if len(self.internal) else None
+        self._r_key = key
+
+    def _injections(self, voc, r_int):
+        """Norton currents into every node, shape (n_nodes, n_cases)."""
+        source = voc / r_int[:, None]
+        b = np.zeros((self.n_nodes, source.shape[1]))
+        np.add.at(b, self.positive, source)
+        np.add.at(b, self.negative, -source)
+        return b
+
+    def terminal_current(self, voc, r_int, V):
+        """
+        Current delivered at the positive terminal for every case and load voltage.
+
+        Parameters:
+            voc (array): couple EMFs, (n_couples,) or (n_couples, n_cases).
+            r_int (array): couple resistances (n_couples,), shared by all cases.
+            V (array): terminal voltages (n_points,).
+
+        Returns:
+            ndarray: (n_cases, n_points) currents (A).
+        """
+        r_int = np.asarray(r_int, dtype=float)
+        voc = np.asarray(voc, dtype=float)
+        voc = voc[:, None] if voc.ndim == 1 else voc
+        V = np.atleast_1d(np.asarray(V, dtype=float))
+        n_cases, n_points = voc.shape[1], len(V)
+        self._factorize(r_int)
+        b = self._injections(voc, r_int)
+
+        # One right-hand side column per (case, load voltage)
+        v = np.zeros((self.n_nodes, n_cases, n_points))
+        v[self.terminals[1]] = V
+        if self._lu is not None:
+            rhs = b[self.internal][:, :, None] - self._G_it[:, None, None] * V
+            v[self.internal] = self._lu.solve(rhs.reshape(len(self.internal), -1)).reshape(-1, n_cases, n_points)
+        # KCL at the positive terminal: injected source current minus what flows back into the network
+        flow = self._G_t @ v.reshape(self.n_nodes, -1)
+        return (b[self.terminals[1]][:, None] - flow.reshape(n_cases, n_points))
+
+    def iv_curve(self, voc, r_int, n_points=200):
+        """
+        Full I-V-P curve from short circuit to open circuit.
+
+        Returns:
+            dict: V, I, P arrays (n_cases, n_points), the maximum power point
+            (V_mp, I_mp, P_max), V_oc and I_sc per case.
+        """
+        voc = np.asarray(voc, dtype=float)
+        squeeze = voc.ndim == 1
+        # The network is linear: two load points give the open-circuit voltage
+        I0, I1 = self.terminal_current(voc, r_int, [0.0, 1.0]).T
+        V_oc = I0 / (I0 - I1)
+        V = np.linspace(0, 1, n_points) * V_oc[:, None]
+        I = np.empty_like(V)
+        for case in range(len(V_oc)):  # each case has its own voltage grid
+            voc_case = voc if squeeze else voc[:, case]
+            I[case] = self.terminal_current(voc_case, r_int, V[case])[0]
+        P = V * I
+        best = P.argmax(axis=1)
+        rows = np.arange(len(V_oc))
+        result = {'V': V, 'I': I, 'P': P, 'V_oc': V_oc, 'I_sc': I0,
+                  'V_mp': V[rows, best], 'I_mp': I[rows, best], 'P_max': P[rows, best]}
+        return {k: v[0] for k, v in result.items()} if squeeze else result
+
+    def mismatch_loss(self, voc, r_int):
+        """Share of the couples' summed matched-load power lost to the network, per case."""
+        voc = np.asarray(voc, dtype=float)
+        r_int = np.asarray(r_int, dtype=float)
+        I0, I1 = self.terminal_current(voc, r_int, [0.0, 1.0]).T
+        V_oc = I0 / (I0 - I1)
+        P_network = V_oc * I0 / 4  # linear source: maximum power at half the open-circuit voltage
+        P_couples = (voc**2 / (4 * r_int[:, None] if voc.ndim == 2 else 4 * r_int)).sum(axis=0)
+        return 1 - P_network / P_couples
+
+
+def series_parallel(n_series, n_parallel):
+    """n_parallel strings of n_series couples, joined at the two terminals (nodes 0 and 1)."""
+    n_internal = n_series - 1
+    string_nodes = np.arange(n_parallel * n_internal).reshape(n_parallel, n_internal) + 2
+    chain = np.column_stack([np.zeros(n_parallel, dtype=int), string_nodes, np.ones(n_parallel, dtype=int)])
+    return ModuleNetwork(2 + n_parallel * n_internal, chain[:, :-1].ravel(), chain[:, 1:].ravel(), 0, 1)
+
+
+def parallel_series(n_series, n_parallel):
+    """n_series blocks in series, each of n_parallel couples in parallel (terminals 0 and n_series)."""
+    block = np.repeat(np.arange(n_series), n_parallel)
+    return ModuleNetwork(n_series + 1, block, block + 1, 0, n_series)
+
+
+def couples_from_temperatures(T_hot, T_cold, **properties):
+    """Voc and internal resistance of each couple from couple_performance."""
+    result = couple_performance(T_hot, T_cold, **properties)
+    return result['voc'], np.broadcast_to(result['r_int'], np.shape(result['voc'])).copy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, default=50)
+    parser.add_argument('--parallel', type=int, default=100)
+    parser.add_argument('--dt', type=float, default=100.0, help='mean ΔT (K)')
+    parser.add_argument('--dt-spread', type=float, default=15.0, help='standard deviation of ΔT between couples (K)')
+    parser.add_argument('--t-cold', type=float, default=300.0)
+    parser.add_argument('--points', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.series * args.parallel
+    delta_T = np.clip(rng.normal(args.dt, args.dt_spread, n), 0, None)
+    voc, r_int = couples_from_temperatures(args.t_cold + delta_T, args.t_cold)
+    for name, build in (('series strings in parallel', series_parallel), ('parallel blocks in series', parallel_series)):
+        network = build(args.series, args.parallel)
+        start = time.perf_counter()
+        curve = network.iv_curve(voc, r_int, args.points)
+        elapsed = time.perf_counter() - start
+        loss = network.mismatch_loss(voc, r_int)[0]
+        print(f"{name:28s} {n} couples, {args.points} load points: Voc={curve['V_oc']:.3f} V  "
+              f"Isc={curve['I_sc']:.4f} A  Pmax={curve['P_max'] * 1e3:.3f} mW  "
+              f"mismatch loss {loss * 100:.2f} %  ({elapsed * 1e3:.1f} ms)")
@@ -0,0 +1,234 @@
+"""Monte Carlo uncertainty propagation for the unicouple.
+
+Material properties are drawn from the spread between estm references and the
+geometry (w_p, w_n, LHT, rho_c) from manufacturing tolerances. Samples are
+evaluated in chunks and only streaming quantile sketches are kept, so the
+sample count is limited by time, not memory.
+
+Example:
+    python monte_carlo.py --samples 10000000 --p SnSe --n PbTe --Th 373
+"""
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from materials import load_estm, reference_scatter
+from teg_model import SurrogateModel, T_COLD_COMSOL, unicouple_performance
+
+# Nominal unicouple (sweep units) and its tolerances: (nominal, spread, distribution).
+# 'normal' spread is a standard deviation, 'uniform' a half-width and
+# 'lognormal' a relative standard deviation.
+NOMINAL_DESIGN = {
+    'LHT': (2.0, 0.02, 'normal'),
+    'HIC': (1.0, 0.0, 'normal'),
+    'w_p': (2.0, 0.02, 'normal'),
+    'w_n': (2.0, 0.02, 'normal'),
+    'FF': (0.5, 0.0, 'normal'),
+    'rho_c': (1e-8, 0.5, 'lognormal'),
+}
+# The surrogate takes rho_c on the (unitless) TEG_data.csv scale, not in Ω·m²;
+# this is the middle of its training range
+SURROGATE_RHO_C = (1.0, 0.5, 'lognormal')
+
+
+class StreamingQuantiles:
+    """
+    Mergeable quantile sketch using log-spaced bins on either side of zero.
+
+    Positive and negative values are binned by magnitude in mirrored bins,
+    so quantiles are accurate to one bin, i.e. a relative error of about
+    ln(10) / bins_per_decade, whatever the sign. Magnitudes below `low`
+    count as zero; exact count, mean, min and max are tracked alongside.
+    """
+
+    def __init__(self, low=1e-15, high=1e3, bins_per_decade=1000):
+        self.low = low
+        self.bins_per_decade = bins_per_decade
+        self.n_bins = int(np.ceil(np.log10(high / low) * bins_per_decade))
+        # Per sign: [below low, bins..., overflow]
+        self.positive = np.zeros(self.n_bins + 2, dtype=np.int64)
+        self.negative = np.zeros(self.n_bins + 2, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _bins(self, magnitudes):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            idx = np.floor(np.log10(magnitudes / self.low) * self.bins_per_decade) + 1
+        idx = np.where(magnitudes >= self.low, np.clip(idx, 1, self.n_bins + 1), 0).astype(np.int64)
+        return np.bincount(idx, minlength=self.n_bins + 2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        negative = values < 0
+        self.positive += self._bins(values[~negative])
+        self.negative += self._bins(-values[negative])
+        self.count += values.size
+        self.total += values.sum()
+        self.total_sq += (values**2).sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    def merge(self, other):
+        self.positive += other.positive
+        self.negative += other.negative
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Approximate quantile(s) q in [0, 1] (geometric bin centres)."""
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        idx = np.arange(self.n_bins + 2)
+        centres = np.where(idx == 0, 0.0, self.low * 10 ** ((idx - 0.5) / self.bins_per_decade))
+        # Ascending order: most negative bin first
+        counts = np.concatenate([self.negative[::-1], self.positive])
+        values = np.concatenate([-centres[::-1], centres])
+        at = np.searchsorted(np.cumsum(counts), q * self.count, side='left').clip(0, counts.size - 1)
+        result = np.clip(values[at], self.min, self.max)
+        return result if result.size > 1 else result[0]
+
+    def summary(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        mean = self.total / self.count
+        std = np.sqrt(max(self.total_sq / self.count - mean**2, 0.0))
+        row = {'count': self.count, 'mean': mean, 'std': std, 'min': self.min, 'max': self.max}
+        row.update({f'q{round(100 * q):02d}': v for q, v in zip(quantiles, np.atleast_1d(self.quantile(quantiles)))})
+        return row
+
+
+def sample_design(rng, n, design=None):
+    """Draw n unicouple geometries from the tolerance distributions."""
+    design = {**NOMINAL_DESIGN, **(design or {})}
+    samples = {}
+    for name, (nominal, spread, dist) in design.items():
+        if spread == 0:
+            samples[name] = np.full(n, float(nominal))
+        elif dist == 'normal':
+            samples[name] = rng.normal(nominal, spread, n)
+        elif dist == 'uniform':
+            samples[name] = rng.uniform(nominal - spread, nominal + spread, n)
+        elif dist == 'lognormal':
+            sigma = np.sqrt(np.log1p(spread**2))
+            samples[name] = nominal * rng.lognormal(-0.5 * sigma**2, sigma, n)
+        else:
+            raise ValueError(f"Unknown distribution: {dist}")
+    # A tolerance cannot produce a negative dimension
+    for name in ('LHT', 'HIC', 'w_p', 'w_n'):
+        samples[name] = np.clip(samples[name], 1e-3, None)
+    samples['FF'] = np.clip(samples['FF'], 1e-3, 1.0)
+    return samples
+
+
+def sample_properties(rng, n, scatter_p, scatter_n):
+    """Draw n property sets: Seebeck normal, conductivities lognormal (always positive)."""
+    def lognormal(mean, std):
+        if std == 0:
+            return np.full(n, mean)
+        sigma = np.sqrt(np.log1p((std / mean)**2))
+        return mean * rng.lognormal(-0.5 * sigma**2, sigma, n)
+
+    props = {}
+    for leg, scatter in (('p', scatter_p), ('n', scatter_n)):
+        props[f'S_{leg}'] = rng.normal(*scatter['S'], n)
+        props[f'sigma_{leg}'] = lognormal(*scatter['sigma'])
+        props[f'kappa_{leg}'] = lognormal(*scatter['kappa'])
+    return props
+
+
+def run_monte_carlo(n_samples, p_formula='SnSe', n_formula='PbTe', Th=373.0, Tc=T_COLD_COMSOL,
+                    design=None, model='analytic', chunk_size=1_000_000, seed=42,
+                    min_rel_std=0.05, data=None):
+    """
+    Propagate material scatter and geometric tolerances to power and efficiency.
+
+    Parameters:
+        n_samples (int): total number of samples.
+        p_formula, n_formula (str): estm formulas of the p and n legs.
+        Th, Tc (float): hot- and cold-side temperatures (K).
+        design (dict): overrides of NOMINAL_DESIGN entries.
+        model (str): 'analytic', or 'surrogate' (geometry and rho_c only;
+            the network has no material inputs). Surrogate samples outside the
+            training-data ranges (SurrogateModel.domain) are left out of the
+            statistics and counted in the 'out_of_domain' column; the surrogate's
+            rho_c is on the TEG_data.csv scale (SURROGATE_RHO_C by default).
+        chunk_size (int): samples evaluated per batch.
+        min_rel_std (float): floor on the material scatter, for single-reference materials.
+
+    Returns:
+        DataFrame: streaming statistics per output (rows) and the sketches themselves.
+    """
+    rng = np.random.default_rng(seed)
+    if model == 'analytic':
+        data = load_estm() if data is None else data
+        T_mean = 0.5 * (Th + Tc)
+        scatter_p = reference_scatter(data, p_formula, T_mean, min_rel_std)
+        scatter_n = reference_scatter(data, n_formula, T_mean, min_rel_std)
+    else:
+        surrogate = SurrogateModel()
+        design = {'rho_c': SURROGATE_RHO_C, **(design or {})}
+        outside = np.zeros(len(surrogate.domain), dtype=np.int64)
+    rejected = 0
+
+    outputs = ('power_W', 'pd_max_W_m2', 'efficiency') if model == 'analytic' else ('power_W', 'voltage_V')
+    sketches = {name: StreamingQuantiles() for name in outputs}
+
+    for start in range(0, n_samples, chunk_size):
+        n = min(chunk_size, n_samples - start)
+        geometry = sample_design(rng, n, design)
+        if model == 'analytic':
+            props = sample_properties(rng, n, scatter_p, scatter_n)
+            result = unicouple_performance(geometry['LHT'], geometry['HIC'], geometry['w_p'], geometry['w_n'],
+                                           geometry['FF'], geometry['rho_c'], Th, Tc, **props)
+            sketches['power_W'].update(result['power'])
+            sketches['pd_max_W_m2'].update(result['pd_max'])
+            sketches['efficiency'].update(result['efficiency'])
+        else:
+            X = np.column_stack([geometry['HIC'], geometry['LHT'], geometry['w_p'], geometry['w_n'],
+                                 np.full(n, Th - Tc), geometry['rho_c']])
+            inside = surrogate.in_domain(X, per_input=True)
+            outside += (~inside).sum(axis=0)
+            keep = inside.all(axis=1)
+            rejected += n - keep.sum()
+            y = surrogate.predict(X[keep])
+            sketches['power_W'].update(y[:, 0])
+            sketches['voltage_V'].update(y[:, 1])
+
+    if rejected:
+        ranges = surrogate.domain.assign(outside=outside / n_samples)
+        ranges = ', '.join(f"{name} {row['outside']:.2%} outside [{row['min']:g}, {row['max']:g}]"
+                           for name, row in ranges.iterrows() if row['outside'])
+        if rejected == n_samples:
+            raise ValueError(f"No sample lies inside the surrogate's training domain: {ranges}")
+        warnings.warn(f"{rejected} of {n_samples} samples are outside the surrogate's training domain "
+                      f"and were left out: {ranges}")
+
+    summary = pd.DataFrame({name: sketch.summary() for name, sketch in sketches.items()}).T
+    summary['out_of_domain'] = rejected
+    return summary, sketches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    parser.add_argument('--p', default='SnSe', help='p-leg formula in estm')
+    parser.add_argument('--n', default='PbTe', help='n-leg formula in estm')
+    parser.add_argument('--Th', type=float, default=373.0)
+    parser.add_argument('--Tc', type=float, default=T_COLD_COMSOL)
+    parser.add_argument('--model', choices=['analytic', 'surrogate'], default='analytic')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    summary, _ = run_monte_carlo(args.samples, args.p, args.n, args.Th, args.Tc, model=args.model,
+                                 chunk_size=args.chunk_size, seed=args.seed)
+    print(summary.to_string())
@@ -0,0 +1,125 @@
+"""Nearest simulated configurations, near-duplicates and an IDW baseline surrogate.
+
+The 4985 COMSOL runs are indexed with a KD-tree in unit-hypercube coordinates
+of the seven sweep parameters (log-scaled rho_c, as sampled), so "which run
+is closest to my design" is an O(log n) query, all near-duplicate pairs come
+from one batched radius search, and inverse-distance weighting of the k
+nearest runs gives a surrogate with no training at all.
+
+    python nearest_configs.py --duplicates 0.1 --loo
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from comsol_results import INPUT_COLS, VOC_COL, add_derived_metrics, load_results, to_unit
+
+OUTPUT_COLS = [VOC_COL, 'PDmax', 'flux (W)', 'efficiency']
+
+
+class ConfigIndex:
+    """
+    KD-tree over the normalized sweep parameters of a results table.
+
+    Parameters:
+        results (DataFrame): COMSOL results (default: comsol_results_with_efficiency.csv).
+        outputs (list): columns served by interpolate().
+    """
+
+    def __init__(self, results=None, outputs=OUTPUT_COLS):
+        df = load_results() if results is None else results
+        self.results = (df if 'efficiency' in df else add_derived_metrics(df)).reset_index(drop=True)
+        self.outputs = list(outputs)
+        self.points = to_unit(self.results[INPUT_COLS].to_numpy())
+        self.tree = cKDTree(self.points)
+
+    def _unit(self, designs):
+        if isinstance(designs, pd.DataFrame):
+            designs = designs[INPUT_COLS].to_numpy()
+        return to_unit(np.atleast_2d(np.asarray(designs, dtype=float)))
+
+    def nearest(self, designs, k=1):
+        """
+        The k closest runs to each design.
+
+        Parameters:
+            designs (DataFrame or array): rows of the seven INPUT_COLS values.
+            k (int): neighbours per design.
+
+        Returns:
+            DataFrame: 'query', 'rank', 'distance' (unit-cube) and the matched result rows.
+        """
+        distance, index = self.tree.query(self._unit(designs), k=k)
+        distance, index = distance.reshape(-1, k), index.reshape(-1, k)
+        matches = self.results.iloc[index.ravel()].reset_index().rename(columns={'index': 'row'})
+        matches.insert(0, 'distance', distance.ravel())
+        matches.insert(0, 'rank', np.tile(np.arange(1, k + 1), len(index)))
+        matches.insert(0, 'query', np.repeat(np.arange(len(index)), k))
+        return matches
+
+    def duplicates(self, radius=0.02):
+        """
+        All pairs of runs closer than radius (unit-cube distance).
+
+        Returns:
+            DataFrame: row indices i < j, their distance and the relative PDmax
+            difference, closest pairs first.
+        """
+        pairs = self.tree.query_pairs(radius, output_type='ndarray')
+        i, j = pairs.T if len(pairs) else (np.array([], dtype=int),) * 2
+        pd_max = self.results['PDmax'].to_numpy()
+        out = pd.DataFrame({
+            'i': i,
+            'j': j,
+            'distance': np.linalg.norm(self.points[i] - self.points[j], axis=1),
+            'PDmax difference': np.abs(pd_max[i] - pd_max[j]) / (0.5 * (pd_max[i] + pd_max[j])),
+        })
+        return out.sort_values('distance', ignore_index=True)
+
+    def _weights(self, distance, power):
+        # An exact match takes all the weight
+        with np.errstate(divide='ignore'):
+            w = 1 / distance**power
+        exact = ~np.isfinite(w)
+        w = np.where(exact.any(axis=1, keepdims=True), exact.astype(float), w)
+        return w / w.sum(axis=1, keepdims=True)
+
+    def interpolate(self, designs, k=8, power=2):
+        """Inverse-distance-weighted outputs of the k nearest runs, one row per design."""
+        distance, index = self.tree.query(self._unit(designs), k=k)
+        distance, index = distance.reshape(-1, k), index.reshape(-1, k)
+        values = self.results[self.outputs].to_numpy()[index]
+        return pd.DataFrame(np.einsum('nk,nkc->nc', self._weights(distance, power), values), columns=self.outputs)
+
+    def leave_one_out(self, k=8, power=2):
+        """Median relative error of interpolate() when every run is predicted from the others."""
+        distance, index = self.tree.query(self.points, k=k + 1)
+        # Drop each run itself (not necessarily first if it has exact duplicates)
+        own = index == np.arange(len(index))[:, None]
+        own[~own.any(axis=1), -1] = True
+        distance = distance[~own].reshape(len(index), k)
+        index = index[~own].reshape(len(index), k)
+        values = self.results[self.outputs].to_numpy()
+        predicted = np.einsum('nk,nkc->nc', self._weights(distance, power), values[index])
+        return pd.Series(np.median(np.abs(predicted / values - 1), axis=0), index=self.outputs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duplicates', type=float, default=0.1, help='near-duplicate radius (unit-cube distance)')
+    parser.add_argument('--loo', action='store_true', help='leave-one-out error of the IDW surrogate')
+    parser.add_argument('-k', type=int, default=8)
+    parser.add_argument('--power', type=float, default=2.0)
+    args = parser.parse_args()
+
+    index = ConfigIndex()
+    pairs = index.duplicates(args.duplicates)
+    print(f"{len(pairs)} pairs of runs within {args.duplicates} of each other "
+          f"({len(np.unique(pairs[['i', 'j']]))} runs involved)")
+    if len(pairs):
+        print(pairs.head(10).to_string(index=False))
+    if args.loo:
+        print(f"\nLeave-one-out median relative error (k={args.k}, power={args.power}):")
+        print(index.leave_one_out(args.k, args.power).to_string())
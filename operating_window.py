@@ -0,0 +1,200 @@
+"""Best operating temperature window of every material (or p/n pair) in the library.
+
+Page 4 evaluates the maximum-efficiency formula at six tabulated PbTe
+temperatures with a fixed ±50 K window. Here ZT(T) is interpolated from the
+estm table (materials.PropertyIndex) and the mean temperature, and optionally
+ΔT, are searched continuously, inside each material's measured range and
+any source/sink limits. The search is a batched bounded maximization: a
+coarse grid brackets the best cell of every material, then golden-section
+steps refine all of them at once.
+
+    python operating_window.py --delta-t 100
+    python operating_window.py --t-cold-min 300 --t-hot-max 800 --pairs 200
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from materials import FORMULA, KAPPA, SEEBECK, SIGMA, ZT, PropertyIndex, load_estm
+from teg_model import max_efficiency
+
+GOLDEN = (np.sqrt(5) - 1) / 2
+# Gauss-Legendre nodes/weights on [0, 1] for window-averaged ZT
+_NODES, _WEIGHTS = np.polynomial.legendre.leggauss(5)
+_NODES, _WEIGHTS = 0.5 * (_NODES + 1), 0.5 * _WEIGHTS
+
+
+def golden_max(f, lo, hi, grid=33, iterations=40):
+    """
+    Maximize f independently for every row on [lo, hi].
+
+    Parameters:
+        f (callable): maps x of shape (n, k) to values of the same shape.
+        lo, hi (array): (n,) bounds; rows with lo > hi are infeasible.
+        grid (int): points of the bracketing scan (guards against multiple local maxima).
+        iterations (int): golden-section steps after the scan.
+
+    Returns:
+        tuple: arg max (n,) and max (n,), NaN for infeasible rows.
+    """
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    feasible = lo <= hi
+    hi_f = np.where(feasible, hi, lo)
+    x = lo[:, None] + (hi_f - lo)[:, None] * np.linspace(0, 1, grid)
+    values = f(x)
+    best = np.nanargmax(np.where(np.isnan(values), -np.inf, values), axis=1)
+    rows = np.arange(len(lo))
+    a = x[rows, np.maximum(best - 1, 0)]
+    b = x[rows, np.minimum(best + 1, grid - 1)]
+
+    c, d = b - GOLDEN * (b - a), a + GOLDEN * (b - a)
+    fc, fd = f(np.column_stack([c, d])).T
+    for _ in range(iterations):
+        # One new evaluation per row: the maximum is in [a, d] or in [c, b]
+        left = fc > fd
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        new = np.where(left, b - GOLDEN * (b - a), a + GOLDEN * (b - a))
+        f_new = f(new[:, None])[:, 0]
+        c, d, fc, fd = (np.where(left, new, d), np.where(left, c, new),
+                        np.where(left, f_new, fd), np.where(left, fc, f_new))
+
+    x_best = np.where(fc > fd, c, d)
+    f_best = np.fmax(fc, fd)
+    # Keep the scan's best point if refinement did not improve on it
+    scan_best = values[rows, best]
+    better_scan = scan_best > f_best
+    x_best = np.where(better_scan, x[rows, best], x_best)
+    f_best = np.where(better_scan, scan_best, f_best)
+    return np.where(feasible, x_best, np.nan), np.where(feasible, f_best, np.nan)
+
+
+class OperatingWindows:
+    """
+    Efficiency of materials or p/n pairs as a function of their temperature window.
+
+    Parameters:
+        index (PropertyIndex): interpolation index (ZT for materials; Seebeck,
+            conductivities for pairs).
+        formulas (list): materials to evaluate (default: every material with a ZT curve).
+        pairs (list): (p-type, n-type) formula tuples, evaluated instead of formulas.
+        zt (str): 'midpoint' (ZT at the mean temperature, as on page 4) or
+            'average' (ZT averaged over the window).
+        method (str): PropertyIndex interpolation, 'linear' or 'pchip'.
+    """
+
+    def __init__(self, index, formulas=None, pairs=None, zt='midpoint', method='linear'):
+        self.index = index
+        self.zt_mode = zt
+        self.method = method
+        if pairs is not None:
+            p, n = zip(*pairs)
+            self.ids = np.column_stack([index.formula_ids(list(p)), index.formula_ids(list(n))])
+            self.labels = pd.DataFrame({'p-type': p, 'n-type': n})
+            self.T_min = np.maximum(index.T_min[self.ids[:, 0]], index.T_min[self.ids[:, 1]])
+            self.T_max = np.minimum(index.T_max[self.ids[:, 0]], index.T_max[self.ids[:, 1]])
+        else:
+            formulas = list(index.formulas) if formulas is None else list(formulas)
+            self.ids = index.formula_ids(formulas)[:, None]
+            self.labels = pd.DataFrame({FORMULA: formulas})
+            self.T_min, self.T_max = index.T_min[self.ids[:, 0]], index.T_max[self.ids[:, 0]]
+
+    def zt_at(self, rows, T):
+        """ZT of items `rows` (broadcast against T)."""
+        if self.ids.shape[1] == 1:
+            return self.index.query(self.ids[rows, 0], T, [ZT], self.method)[..., 0]
+        cols = [SEEBECK, SIGMA, KAPPA]
+        S_p, sigma_p, kappa_p = np.moveaxis(self.index.query(self.ids[rows, 0], T, cols, self.method), -1, 0)
+        S_n, sigma_n, kappa_n = np.moveaxis(self.index.query(self.ids[rows, 1], T, cols, self.method), -1, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Z = ((S_p - S_n) * 1e-6)**2 / (np.sqrt(kappa_p / sigma_p) + np.sqrt(kappa_n / sigma_n))**2
+        return Z * T
+
+    def window_zt(self, rows, T_mean, delta_T):
+        if self.zt_mode == 'midpoint':
+            return self.zt_at(rows, T_mean)
+        T = (T_mean - delta_T / 2)[..., None] + np.asarray(delta_T)[..., None] * _NODES
+        return (self.zt_at(rows[..., None], T) * _WEIGHTS).sum(axis=-1)
+
+    def efficiency(self, rows, T_mean, delta_T):
+        zt = np.maximum(self.window_zt(rows, T_mean, delta_T), 0.0)
+        return max_efficiency(T_mean + delta_T / 2, T_mean - delta_T / 2, zt)
+
+    def _best_mean(self, rows, delta_T, T_cold_min, T_hot_max):
+        lo = np.maximum(self.T_min[rows], T_cold_min) + delta_T / 2
+        hi = np.minimum(self.T_max[rows], T_hot_max) - delta_T / 2
+        return golden_max(lambda T_mean: self.efficiency(rows[:, None], T_mean, delta_T[:, None]), lo, hi)
+
+    def optimize(self, delta_T=100.0, T_cold_min=-np.inf, T_hot_max=np.inf, delta_T_min=10.0):
+        """
+        Best window of every item.
+
+        Parameters:
+            delta_T (float): fixed ΔT (K), or None to optimize it too.
+            T_cold_min, T_hot_max (float): sink and source limits (K); the
+                window also stays inside each material's measured range.
+            delta_T_min (float): smallest ΔT considered when optimizing it.
+
+        Returns:
+            DataFrame: items with T_cold, T_hot, T_mean, ΔT, ZT and efficiency,
+            best first; items whose range cannot hold the window are dropped.
+        """
+        rows = np.arange(len(self.ids))
+        span = np.minimum(self.T_max, T_hot_max) - np.maximum(self.T_min, T_cold_min)
+        if delta_T is not None:
+            dT = np.full(len(rows), float(delta_T))
+        else:
+            # Outer search over ΔT, each candidate solved for its best mean temperature
+            def outer(dT_grid):
+                n, k = dT_grid.shape
+                return self._best_mean(np.repeat(rows, k), dT_grid.ravel(), T_cold_min, T_hot_max)[1].reshape(n, k)
+            dT, _ = golden_max(outer, np.full(len(rows), delta_T_min), span, grid=17, iterations=30)
+        T_mean, eta = self._best_mean(rows, np.nan_to_num(dT), T_cold_min, T_hot_max)
+
+        result = self.labels.copy()
+        result['T_cold (K)'] = T_mean - dT / 2
+        result['T_hot (K)'] = T_mean + dT / 2
+        result['T_mean (K)'] = T_mean
+        result['ΔT (K)'] = dT
+        result['ZT'] = self.window_zt(rows, np.nan_to_num(T_mean), np.nan_to_num(dT))
+        result['efficiency'] = eta
+        return result.dropna(subset=['efficiency']).sort_values('efficiency', ascending=False, ignore_index=True)
+
+
+def optimal_windows(data=None, delta_T=100.0, T_cold_min=-np.inf, T_hot_max=np.inf, pairs=None, **kwargs):
+    """One call for the whole library: OperatingWindows(PropertyIndex(estm)).optimize(...)."""
+    index = PropertyIndex(load_estm() if data is None else data)
+    return OperatingWindows(index, pairs=pairs, **kwargs).optimize(delta_T, T_cold_min, T_hot_max)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delta-t', type=float, default=None, help='fixed ΔT (K); optimized when omitted')
+    parser.add_argument('--t-cold-min', type=float, default=-np.inf)
+    parser.add_argument('--t-hot-max', type=float, default=np.inf)
+    parser.add_argument('--zt', default='midpoint', choices=['midpoint', 'average'])
+    parser.add_argument('--pairs', type=int, default=0, help='also rank the best N p/n pairs of the top materials')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    data = load_estm()
+    index = PropertyIndex(data)
+    start = time.perf_counter()
+    windows = OperatingWindows(index, zt=args.zt).optimize(args.delta_t, args.t_cold_min, args.t_hot_max)
+    elapsed = time.perf_counter() - start
+    print(f"{len(windows)} materials in {elapsed:.2f} s")
+    print(windows.head(args.top).round(4).to_string(index=False))
+
+    if args.pairs:
+        # Pair the best p- and n-type materials by their mean Seebeck sign
+        sign = data.groupby(FORMULA)[SEEBECK].mean()
+        ranked = windows[FORMULA]
+        p_types = [f for f in ranked if sign[f] > 0][:int(np.sqrt(args.pairs)) + 1]
+        n_types = [f for f in ranked if sign[f] < 0][:int(np.sqrt(args.pairs)) + 1]
+        pairs = [(p, n) for p in p_types for n in n_types][:args.pairs]
+        start = time.perf_counter()
+        best_pairs = OperatingWindows(index, pairs=pairs, zt=args.zt).optimize(args.delta_t, args.t_cold_min,
+                                                                               args.t_hot_max)
+        print(f"\n{len(best_pairs)} pairs in {time.perf_counter() - start:.2f} s")
+        print(best_pairs.head(args.top).round(4).to_string(index=False))
@@ -3,12 +3,15 @@ import numpy as np
 import matplotlib
 import pandas as pd
 from PIL import Image
+from utils import show_image, start_page_timer, stop_page_timer
+
+start_page_timer('Meet The Team')
 st.header('Team presentation')
 st.write('**Web developper**') 
 col1,col2=st.columns([0.3,0.7],gap='small',vertical_alignment='center')
 with col1:
     #image=Image.open('.\images\test.jpeg') # For Linux
-   st.image("Images/Hedir.jpeg", width=200)  
+   show_image("Images/Hedir.jpeg", width=200)  
 with col2:
     st.write('**Hedir OUARDI**')
     st.markdown( """ <div style="text-align: justify;">
@@ -19,7 +22,7 @@ with col2:
 st.write('**Project manager**')
 col1,col2=st.columns([0.3,0.7],gap='small',vertical_alignment='center')
 with col1:
-    st.image("Images/Anna.jpeg", width=200)
+    show_image("Images/Anna.jpeg", width=200)
 with col2:
     st.write('**Anna SMIRNOVA**')
     st.markdown( """ <div style="text-align: justify;">
@@ -30,10 +33,11 @@ st.write('**Project supervisor**')
 col1,col2=st.columns([0.3,0.7],gap='small',vertical_alignment='center')
 with col1:
     #image=Image.open('.\images\test.jpeg') #for linux
-    st.image("Images/Koly.jpg", width=200)    
+    show_image("Images/Koly.jpg", width=200)    
 with col2:
     st.write('**Tanzila Akter KOLY**')
     st.markdown( """ <div style="text-align: justify;">
                 Tanzila is the project supervisor. She is a first year masters student in Grenoble INP-Phelma from Bangladesh. She is responsible for tracking if the work progresses as expected and reminding of deadlines.
                 </div>""", unsafe_allow_html=True) #Here is the place to put a few words of presentation
 
+stop_page_timer()
@@ -3,6 +3,9 @@ import numpy as np
 import matplotlib
 import pandas as pd
 from PIL import Image
+from utils import show_image, start_page_timer, stop_page_timer
+
+start_page_timer('Introduction')
 
 st.header('Introduction')
 
@@ -21,10 +24,10 @@ st.markdown(""" \n """)
 col1, col2 = st.columns(2)
 
 with col1:
-    st.image("Images/XCPh9Vp.jpg", caption="Thermoelectric Generator, https://www.sciencedirect.com/science/article/pii/S2666523923000144", width=300)
+    show_image("Images/XCPh9Vp.jpg", caption="Thermoelectric Generator, https://www.sciencedirect.com/science/article/pii/S2666523923000144", width=300)
 
 with col2:
-    st.image("Images/1-s2.0-S0921510723008644-ga1_lrg.jpg", caption="TEG Couple Module, https://www.sciencedirect.com/science/article/abs/pii/S0921510723008644", width=350)
+    show_image("Images/1-s2.0-S0921510723008644-ga1_lrg.jpg", caption="TEG Couple Module, https://www.sciencedirect.com/science/article/abs/pii/S0921510723008644", width=350)
 
 st.subheader('Types of Thermoelectric Material')
 st.markdown("""
@@ -84,3 +87,4 @@ st.markdown( """ <div style="text-align: justify;">
     **Article 5**: Petsagkourakis et al., Thermoelectric materials and applications for energy harvesting power generation, Science and Technology of Advanced Materials 19, 836-862 (2018).
     </div>""", unsafe_allow_html=True)
 
+stop_page_timer()
@@ -3,6 +3,13 @@ import numpy as np
 import pandas as pd
 import math
 import matplotlib.pyplot as plt
+from utils import material_operating_windows, start_page_timer, stop_page_timer, timer
+from heat_exchanger import junction_temperatures
+from materials import KAPPA, SEEBECK, SIGMA, TEMPERATURE as TEMPERATURE_COL, PropertyIndex
+from module_network import parallel_series, series_parallel
+from operating_window import OperatingWindows
+
+start_page_timer('TEG Module')
 
 st.header('Designing a TEG Module')
 
@@ -70,12 +77,36 @@ df_ZTs["max_efficiency"] = efficiency
 
 # Plot of power efficiency
 st.subheader("Power efficiency vs T")
+# Continuous search over the mean temperature with ZT interpolated between the tabulated points
+PbTe_index = PropertyIndex(df_ZTs.rename(columns={
+    "temperature [K]": TEMPERATURE_COL, "seebeck_coefficient [μV/K]": SEEBECK,
+    "electrical_conductivity [S/m]": SIGMA, "thermal_conductivity [W/mK]": KAPPA}).assign(Formula='PbTe'))
+PbTe_windows = OperatingWindows(PbTe_index)
+T_mean_grid = np.linspace(temperature.min() + 50, temperature.max() - 50, 200)
+PbTe_best = PbTe_windows.optimize(delta_T=100.0).iloc[0]
+
 fig0, ax0 = plt.subplots()
-ax0.plot(temperature, efficiency, linestyle='-', marker='o')
+ax0.plot(temperature, efficiency, linestyle='', marker='o', label='tabulated ZT, ±50 K')
+ax0.plot(T_mean_grid, PbTe_windows.efficiency(np.zeros(1, dtype=int), T_mean_grid, 100.0), label='interpolated ZT(T)')
+ax0.plot(PbTe_best['T_mean (K)'], PbTe_best['efficiency'], marker='*', markersize=12, linestyle='', label='optimum')
 ax0.set_xlabel("Temperature [K]")
 ax0.set_ylabel("Efficiency [$\eta$]")
+ax0.legend(fontsize=7)
 fig0.set_size_inches(5, 3)
 st.pyplot(fig0, use_container_width=False)
+st.write(f"Searching continuously over the mean temperature (ΔT = 100 K, ZT interpolated between the tabulated "
+         f"points), PbTe is most efficient between {PbTe_best['T_cold (K)']:.0f} K and "
+         f"{PbTe_best['T_hot (K)']:.0f} K, with η = {PbTe_best['efficiency']:.2%}.")
+
+with st.expander("Optimal operating window of every material in the estm library"):
+    window_cols = st.columns(4)
+    optimize_dT = window_cols[0].checkbox("Optimize ΔT too", value=False)
+    window_dT = window_cols[1].number_input("ΔT [K]", 10.0, 800.0, 100.0, 10.0, disabled=optimize_dT)
+    window_Tc = window_cols[2].number_input("Heat sink, min T_cold [K]", 0.0, 1500.0, 0.0, 10.0)
+    window_Th = window_cols[3].number_input("Heat source, max T_hot [K]", 300.0, 2000.0, 2000.0, 10.0)
+    windows = material_operating_windows(None if optimize_dT else window_dT, window_Tc, window_Th)
+    st.write(f"{len(windows)} materials whose measured range holds the window, best first:")
+    st.dataframe(windows.head(20).round(4), hide_index=True)
 
 st.markdown("""<div style= "text-align:justify;">
             In this project we are building a TEG module for the application of charging a phone. Considering our application we have to work at the average temperature 323K although our material has the highest efficiency at the temprature range 500-600K. The equation for average temperature Tm is given:
@@ -84,6 +115,7 @@ st.latex(r'''
 T_{\text{m}} = \frac{T_{\text{hot}} + T_{\text{cold}}}{2}
 ''')
 st.write('Here thermal gradient 100K.')
+T_mean = 323  # Average temperature of the phone-charging application in K
 st.latex(r'''
 T_{\text{cold}} = T_{\text{m}} - 50K = 273K
 ''')
@@ -176,41 +208,42 @@ st.write(f"**Current at Optimal R_L:** {optimal_current:.2f} A")
 # Plotting results
 st.subheader("Plots")
 
-# Voltage vs Load Resistance
-st.subheader("Voltage vs Load Resistance")
-fig1, ax1 = plt.subplots()
-ax1.plot(R_L_values, V_L_values, label="Voltage (V)", linewidth=2)
-ax1.set_title("Voltage vs Load Resistance")
-ax1.set_xlabel("Load Resistance ($R_L$) [Ohms]")
-ax1.set_ylabel("Voltage [V]")
-ax1.grid()
-ax1.legend()
-fig1.set_size_inches(5, 3)
-st.pyplot(fig1, use_container_width=False)
-
-# Current vs Load Resistance
-st.subheader("Current vs Load Resistance")
-fig2, ax2 = plt.subplots()
-ax2.plot(R_L_values, I_values, label="Current (I)", linewidth=2)
-ax2.set_title("Current vs Load Resistance")
-ax2.set_xlabel("Load Resistance ($R_L$) [Ohms]")
-ax2.set_ylabel("Current [A]")
-ax2.grid()
-ax2.legend()
-fig2.set_size_inches(5, 3)
-st.pyplot(fig2, use_container_width=False)
-
-# Power vs Load Resistance
-st.subheader("Power vs Load Resistance")
-fig3, ax3 = plt.subplots()
-ax3.plot(R_L_values, P_values, label="Power (P)", linewidth=2, color='orange')
-ax3.set_title("Power vs Load Resistance")
-ax3.set_xlabel("Load Resistance ($R_L$) [Ohms]")
-ax3.set_ylabel("Power [W]")
-ax3.grid()
-ax3.legend()
-fig3.set_size_inches(5, 3)
-st.pyplot(fig3, use_container_width=False)
+with timer('single-module plots'):
+    # Voltage vs Load Resistance
+    st.subheader("Voltage vs Load Resistance")
+    fig1, ax1 = plt.subplots()
+    ax1.plot(R_L_values, V_L_values, label="Voltage (V)", linewidth=2)
+    ax1.set_title("Voltage vs Load Resistance")
+    ax1.set_xlabel("Load Resistance ($R_L$) [Ohms]")
+    ax1.set_ylabel("Voltage [V]")
+    ax1.grid()
+    ax1.legend()
+    fig1.set_size_inches(5, 3)
+    st.pyplot(fig1, use_container_width=False)
+
+    # Current vs Load Resistance
+    st.subheader("Current vs Load Resistance")
+    fig2, ax2 = plt.subplots()
+    ax2.plot(R_L_values, I_values, label="Current (I)", linewidth=2)
+    ax2.set_title("Current vs Load Resistance")
+    ax2.set_xlabel("Load Resistance ($R_L$) [Ohms]")
+    ax2.set_ylabel("Current [A]")
+    ax2.grid()
+    ax2.legend()
+    fig2.set_size_inches(5, 3)
+    st.pyplot(fig2, use_container_width=False)
+
+    # Power vs Load Resistance
+    st.subheader("Power vs Load Resistance")
+    fig3, ax3 = plt.subplots()
+    ax3.plot(R_L_values, P_values, label="Power (P)", linewidth=2, color='orange')
+    ax3.set_title("Power vs Load Resistance")
+    ax3.set_xlabel("Load Resistance ($R_L$) [Ohms]")
+    ax3.set_ylabel("Power [W]")
+    ax3.grid()
+    ax3.legend()
+    fig3.set_size_inches(5, 3)
+    st.pyplot(fig3, use_container_width=False)
 
 
 st.subheader('Designing a TEG Couple Module')
@@ -319,44 +352,45 @@ st.write(f"**Current at Optimal R_L:** {optimal_current_couple :.4f} A")
 # Plotting the results
 plt.figure(figsize=(10, 6))
 
-# Voltage vs. Load Resistance for TEG Couple
-
-st.subheader("Voltage vs Load Resistance")
-fig1, ax1 = plt.subplots()
-ax1.plot(R_L_values_couple, V_L_couple, label="Voltage (V)", linewidth=2)
-ax1.set_title("Voltage vs Load Resistance (PbTe-SnSe Couple)")
-ax1.set_xlabel("Load Resistance ($R_L$) [Ohms]")
-ax1.set_ylabel("Voltage [V]")
-ax1.grid()
-ax1.legend()
-fig1.set_size_inches(5, 3)
-st.pyplot(fig1, use_container_width=False)
-
-# Current vs. Load Resistance for TEG Couple
-
-st.subheader("Current vs Load Resistance")
-fig2, ax2 = plt.subplots()
-ax2.plot(R_L_values_couple, I_couple, label="Current (I)", linewidth=2)
-ax2.set_title("Current vs Load Resistance (PbTe-SnSe Couple)")
-ax2.set_xlabel("Load Resistance ($R_L$) [Ohms]")
-ax2.set_ylabel("Current [A]")
-ax2.grid()
-ax2.legend()
-fig2.set_size_inches(5, 3)
-st.pyplot(fig2, use_container_width=False)
-
-# Power vs. Load Resistance for TEG Couple
-
-st.subheader("Power vs Load Resistance")
-fig3, ax3 = plt.subplots()
-ax3.plot(R_L_values_couple, P_couple,  label="Power (P)", linewidth=2, color='orange')
-ax3.set_title("Power vs Load Resistance (PbTe-SnSe Couple)")
-ax3.set_xlabel("Load Resistance ($R_L$) [Ohms]")
-ax3.set_ylabel("Power [W]")
-ax3.grid()
-ax3.legend()
-fig3.set_size_inches(5, 3)
-st.pyplot(fig3, use_container_width=False)
+with timer('couple plots'):
+    # Voltage vs. Load Resistance for TEG Couple
+
+    st.subheader("Voltage vs Load Resistance")
+    fig1, ax1 = plt.subplots()
+    ax1.plot(R_L_values_couple, V_L_couple, label="Voltage (V)", linewidth=2)
+    ax1.set_title("Voltage vs Load Resistance (PbTe-SnSe Couple)")
+    ax1.set_xlabel("Load Resistance ($R_L$) [Ohms]")
+    ax1.set_ylabel("Voltage [V]")
+    ax1.grid()
+    ax1.legend()
+    fig1.set_size_inches(5, 3)
+    st.pyplot(fig1, use_container_width=False)
+
+    # Current vs. Load Resistance for TEG Couple
+
+    st.subheader("Current vs Load Resistance")
+    fig2, ax2 = plt.subplots()
+    ax2.plot(R_L_values_couple, I_couple, label="Current (I)", linewidth=2)
+    ax2.set_title("Current vs Load Resistance (PbTe-SnSe Couple)")
+    ax2.set_xlabel("Load Resistance ($R_L$) [Ohms]")
+    ax2.set_ylabel("Current [A]")
+    ax2.grid()
+    ax2.legend()
+    fig2.set_size_inches(5, 3)
+    st.pyplot(fig2, use_container_width=False)
+
+    # Power vs. Load Resistance for TEG Couple
+
+    st.subheader("Power vs Load Resistance")
+    fig3, ax3 = plt.subplots()
+    ax3.plot(R_L_values_couple, P_couple,  label="Power (P)", linewidth=2, color='orange')
+    ax3.set_title("Power vs Load Resistance (PbTe-SnSe Couple)")
+    ax3.set_xlabel("Load Resistance ($R_L$) [Ohms]")
+    ax3.set_ylabel("Power [W]")
+    ax3.grid()
+    ax3.legend()
+    fig3.set_size_inches(5, 3)
+    st.pyplot(fig3, use_container_width=False)
 
 
 
@@ -399,4 +433,60 @@ st.latex(r'''
 )
 st.write(f"**Time needed to charge  the phone:** {t:.2f} h")
 st.markdown(f"""<div style= "text-align:justify;"> It would take {t:.2f}  hours to charge a Samsung Galaxy S20 with our TEG module. It seems pretty good although we can improve the efficiency and reduced the time adjusting the geometry, temperature gradient and other variables.  
-</div>""", unsafe_allow_html=True)
\ No newline at end of file
+</div>""", unsafe_allow_html=True)
+
+st.subheader("Mismatch between modules")
+st.markdown("""<div style= "text-align:justify;"> The calculation above assumes that every module sees exactly ΔT = 100 K. In a real array the heat source is never perfectly uniform, so each module produces a slightly different voltage, and modules connected together force each other away from their own best operating point. Below, every module gets its own ΔT drawn around the nominal value and the whole array is solved as an electrical network.
+</div>""", unsafe_allow_html=True)
+dt_spread = st.slider("Standard deviation of ΔT between modules (K)", 0.0, 40.0, 10.0, 1.0)
+wiring = st.radio("Wiring", ["Series strings in parallel", "Parallel blocks in series"], horizontal=True)
+with timer('module network'):
+    n_s = max(1, int(math.fabs(math.floor(n_series))))
+    n_p = max(1, int(math.fabs(math.floor(n_parralel))))
+    build = series_parallel if wiring == "Series strings in parallel" else parallel_series
+    network = build(n_s, n_p)
+    module_dT = np.clip(np.random.default_rng(0).normal(Delta_T, dt_spread, n_s * n_p), 0, None)
+    module_voc = V_OC_couple * module_dT / Delta_T
+    module_r = np.full(n_s * n_p, R_couple)
+    curve = network.iv_curve(module_voc, module_r)
+    loss = network.mismatch_loss(module_voc, module_r)[0]
+
+    fig4, ax4 = plt.subplots()
+    ax4.plot(curve['V'], curve['P'], linewidth=2, color='orange', label="Array power")
+    ax4.axvline(curve['V_mp'], linestyle='--', color='gray', label="Maximum power point")
+    ax4.set_xlabel("Array voltage [V]")
+    ax4.set_ylabel("Power [W]")
+    ax4.grid()
+    ax4.legend()
+    fig4.set_size_inches(5, 3)
+    st.pyplot(fig4, use_container_width=False)
+st.write(f"**Maximum array power:** {curve['P_max']:.2f} W at {curve['V_mp']:.2f} V and {curve['I_mp']:.2f} A")
+st.write(f"**Mismatch loss:** {loss * 100:.2f} % of the power the {n_s * n_p} modules would give on their own matched loads")
+
+st.subheader("Finite heat exchangers")
+st.markdown("""<div style= "text-align:justify;"> So far the legs themselves were held at a 100 K difference. In practice heat reaches the hot junction through a heat exchanger and leaves the cold junction through a heat sink, and both have a thermal resistance. The junction temperatures then settle where the exchangers carry exactly the heat the couple draws and rejects, so the couple sees less than the full 100 K between source and sink. The sink is held at the 273 K cold side and the source at 373 K, as above.
+</div>""", unsafe_allow_html=True)
+R_exchanger = st.slider("Thermal resistance of each exchanger per couple (K/W)", 0.0, 200.0, 50.0, 5.0)
+with timer('heat exchangers'):
+    couple_props = dict(S_p=S_SnSe, S_n=S, sigma_p=sigma_SnSe, sigma_n=sigma, kappa_p=kappa_SnSe, kappa_n=kappa,
+                        A_p=A, A_n=A, L=L, rho_c=0.0)
+    T_sink = T_mean - Delta_T / 2
+    R_values = np.linspace(0, 200, 101)
+    sweep = junction_temperatures(T_sink + Delta_T, T_sink, R_values, R_values, **couple_props)
+    chosen = junction_temperatures(T_sink + Delta_T, T_sink, R_exchanger, R_exchanger, **couple_props)
+
+    fig5, ax5 = plt.subplots()
+    ax5.plot(R_values, sweep['power'] / sweep['power'][0], linewidth=2, label="Power")
+    ax5.plot(R_values, (sweep['T_hot'] - sweep['T_cold']) / Delta_T, linewidth=2, linestyle='--', label="Junction ΔT")
+    ax5.axvline(R_exchanger, color='gray', linestyle=':')
+    ax5.set_xlabel("Exchanger thermal resistance [K/W]")
+    ax5.set_ylabel("Fraction of the ideal value")
+    ax5.grid()
+    ax5.legend()
+    fig5.set_size_inches(5, 3)
+    st.pyplot(fig5, use_container_width=False)
+st.write(f"**Junction temperatures:** {float(chosen['T_hot']):.1f} K hot, {float(chosen['T_cold']):.1f} K cold "
+         f"(ΔT = {float(chosen['T_hot'] - chosen['T_cold']):.1f} K, solved in {int(chosen['iterations'])} Newton iterations)")
+st.write(f"**Couple power:** {float(chosen['power']) * 1e3:.3f} mW instead of {float(sweep['power'][0]) * 1e3:.3f} mW with ideal exchangers")
+
+stop_page_timer()
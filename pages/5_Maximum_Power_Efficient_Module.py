@@ -3,7 +3,9 @@ import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import create_interactive_plot, display_metric_card, create_parameter_slider
+from utils import create_download_button, create_file_download_button, create_interactive_plot, display_metric_card, create_parameter_slider, start_page_timer, stop_page_timer
+
+start_page_timer('Maximum Power Efficient Module')
 
 # Page configuration
 st.set_page_config(
@@ -160,17 +162,9 @@ st.markdown("---")
 st.header("Download Resources")
 col1, col2 = st.columns(2)
 with col1:
-    with open("cal.ipynb", "rb") as file:
-        st.download_button(
-            label="Download Calculation Notebook",
-            data=file,
-            file_name="power_calculation.ipynb",
-            mime="application/x-ipynb+json"
-        )
+    create_file_download_button("cal.ipynb", "power_calculation.ipynb", "Download Calculation Notebook",
+                                mime="application/x-ipynb+json")
 with col2:
-    st.download_button(
-        label="Download Material Data",
-        data=pd.DataFrame(best_pair).to_csv(index=False),
-        file_name="material_properties.csv",
-        mime="text/csv"
-    )
\ No newline at end of file
+    create_download_button(pd.DataFrame(best_pair), "material_properties.csv", "Download Material Data")
+
+stop_page_timer()
@@ -3,7 +3,11 @@ import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import load_comsol_data, create_interactive_plot, display_metric_card
+from fd_solver import run_unicouple
+from jobs import QueueFull
+from utils import load_comsol_data, create_file_download_button, show_image, create_interactive_plot, display_metric_card, job_queue, start_page_timer, stop_page_timer
+
+start_page_timer('COMSOL')
 
 # Page configuration
 st.set_page_config(
@@ -40,7 +44,7 @@ with tab1:
     """, unsafe_allow_html=True)
     
     # Display polynomial fit
-    st.image("ANN_dataset/polynomial_fits.png", caption="Polynomial fits for PbTe and SnSe", use_container_width=True)
+    show_image("ANN_dataset/polynomial_fits.png", caption="Polynomial fits for PbTe and SnSe")
     
     # Interactive plot of property vs temperature
     # TODO: Add interactive plot here
@@ -77,7 +81,7 @@ with tab2:
     
     col1, col2 = st.columns([1,1])
     with col1:
-        st.image("comsol/Tgradient.png", caption="Temperature Distribution", use_container_width=True)
+        show_image("comsol/Tgradient.png", caption="Temperature Distribution")
     with col2:
         st.markdown("""
         <div style="text-align: justify;">
@@ -100,7 +104,7 @@ with tab3:
     
     col1, col2 = st.columns([1,1])
     with col1:
-        st.image("comsol/Vgradient.png", caption="Voltage Distribution", use_container_width=True)
+        show_image("comsol/Vgradient.png", caption="Voltage Distribution")
     with col2:
         st.latex(r'''
         V_{\text{oc}} = \Delta T \cdot \left(S_{\text{p-type}} - S_{\text{n-type}}\right)
@@ -172,26 +176,68 @@ with tab4:
             fig.update_layout(title_x=0.5, title_font_size=20, showlegend=True)
             st.plotly_chart(fig, use_container_width=False)
 
+# Local re-run of the single-couple case without COMSOL
+st.markdown("---")
+st.header("Run the Unicouple Locally")
+st.markdown("""
+<div style="text-align: justify;">
+The same PbTe–SnSe unicouple can be solved without a COMSOL licence by the open finite-volume solver
+(<code>fd_solver.py</code>): coupled potential and temperature fields on a 3D grid of the legs, copper pads and bridge,
+with the Seebeck, Peltier and Joule effects.
+</div>
+""", unsafe_allow_html=True)
+col1, col2, col3, col4 = st.columns(4)
+fd_th = col1.number_input("Hot side temperature (K)", value=373.0, min_value=280.0, max_value=900.0, step=5.0)
+fd_tc = col2.number_input("Cold side temperature (K)", value=273.0, min_value=200.0, max_value=600.0, step=5.0)
+fd_rho_c = col3.number_input("Contact resistivity (Ω·m²)", value=0.0, min_value=0.0, max_value=1e-6, format="%.1e")
+fd_cells = col4.selectbox("Mesh (cells per mm)", [4, 6, 8], help="Finer meshes take from seconds (4) to about a minute (8)")
+st.caption("Runs go to a background queue shared by all visitors, so the page stays responsive while they solve; "
+           "identical runs are solved once and reused.")
+if st.button("Run simulation"):
+    if fd_th <= fd_tc:
+        st.error("The hot side must be warmer than the cold side.")
+    else:
+        try:
+            job = job_queue().submit(run_unicouple, name='unicouple', Th=fd_th, Tc=fd_tc, rho_c=fd_rho_c,
+                                     cells_per_mm=fd_cells)
+            st.session_state['fd_job'] = job.id
+        except QueueFull as error:
+            st.warning(f"The solver queue is full: {error}.")
+
+fd_job = job_queue().get(st.session_state['fd_job']) if 'fd_job' in st.session_state else None
+if fd_job is not None and not fd_job.done:
+    @st.fragment(run_every=1)
+    def fd_job_progress():
+        if fd_job.done:
+            st.rerun()
+        fraction, message = fd_job.progress
+        st.progress(fraction, text=f"Solving ({fd_job.status}): {message}")
+        if st.button("Cancel run"):
+            fd_job.cancel()
+
+    fd_job_progress()
+elif fd_job is not None and fd_job.status == 'done':
+    fd_result, fd_slice = fd_job.result()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Voc", f"{fd_result['voc']:.4f} V")
+    col2.metric("Internal resistance", f"{fd_result['r_int']:.3f} Ω")
+    col3.metric("Max power", f"{fd_result['power'] * 1e3:.3f} mW")
+    col4.metric("Efficiency", f"{fd_result['efficiency'] * 100:.3f} %")
+    fig = px.imshow(fd_slice, origin='lower', aspect='equal', color_continuous_scale='inferno',
+                    labels={'x': 'x (mm)', 'y': 'z (mm)', 'color': 'T (K)'},
+                    title=f"Temperature on the mid-plane at matched load ({fd_result['cells']:,} cells)")
+    st.plotly_chart(fig, use_container_width=True)
+elif fd_job is not None:
+    st.info(f"The last run was {fd_job.status}" + (f": {fd_job.error}" if fd_job.status == 'failed' else "."))
+
 # Download section
 st.markdown("---")
 st.header("Download Resources")
 col1, col2 = st.columns(2)
 with col1:
-    with open("comsol/teg1.mph", "rb") as file:
-        st.download_button(
-            label="Download Basic TEG Model",
-            data=file,
-            file_name="TEG_simulation.mph",
-            mime="application/octet-stream"
-        )
+    create_file_download_button("comsol/teg1.mph", "TEG_simulation.mph", "Download Basic TEG Model")
 with col2:
-    with open("comsol/TEGBestP.mph", "rb") as file:
-        st.download_button(
-            label="Download Optimized TEG Model",
-            data=file,
-            file_name="Max_Efficient_TEG.mph",
-            mime="application/octet-stream"
-        )
+    create_file_download_button("comsol/TEGBestP.mph", "Max_Efficient_TEG.mph", "Download Optimized TEG Model")
 
 # Bibliography
 st.markdown("---")
@@ -200,4 +246,6 @@ st.markdown("""
 1. Singh, N. K.; Bathula, S.; Gahtori, B.; Tyagi, K.; Haranath, D.; Dhar, A. The Effect of Doping on Thermoelectric Performance of P-Type SnSe: Promising Thermoelectric Material. Journal of Alloys and Compounds 2016, 668, 152–158. https://doi.org/10.1016/j.jallcom.2016.01.190.
 
 2. Cao, Y.; Bai, H.; Li, Z.; Zhang, Z.; Tang, Y.; Su, X.; Wu, J.; Tang, X. Zn-Induced Defect Complexity for the High Thermoelectric Performance of n-Type PbTe Compounds. ACS Appl. Mater. Interfaces 2021, 13 (36), 43134–43143. https://doi.org/10.1021/acsami.1c14518.
-""")
\ No newline at end of file
+""")
+
+stop_page_timer()
@@ -3,6 +3,12 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import math 
+from comsol_results import SWEEP_PARAMS
+from precompute import DENSITY_DEFAULT, HISTOGRAM_BINS, density_figure, parameter_histogram
+from utils import create_download_button, dataset_aggregates, load_comsol_data, load_config_index, load_snapshot, start_page_timer, stop_page_timer
+from sweep_tracker import SNAPSHOT_PATH, read_snapshot
+
+start_page_timer('5000 COMSOL Simulations')
 
 st.header('Using COMSOL to Predict Optimal Device Geometry')
 
@@ -46,7 +52,45 @@ df = pd.DataFrame(data)
 # Display the table in Streamlit
 st.dataframe(df, use_container_width=True)
 
-st.image("ANN_dataset/teg_parameter_distributions.png", caption="Histograms of 5000 parameter distributions", use_container_width=True)
+# Parameter distributions from precomputed bins (the counts, not the rows, go to the browser);
+# figures come from the precompute snapshot when there is a current one
+snapshot = load_snapshot('comsol_distributions')
+n_bins = st.select_slider("Histogram bins", options=list(HISTOGRAM_BINS), value=32)
+hist_cols = st.columns(4)
+for i, (column, _, _, scale) in enumerate(SWEEP_PARAMS.values()):
+    if snapshot is not None:
+        fig = snapshot['figures'][f"{column}@{n_bins}"]
+    else:
+        fig = parameter_histogram(dataset_aggregates('comsol'), column, n_bins, log_x=scale == 'log')
+    hist_cols[i % 4].plotly_chart(fig, use_container_width=True)
+meta = snapshot['meta'] if snapshot is not None else {'rows': dataset_aggregates('comsol').stats['Th (K)']['count'],
+                                                      'columns': dataset_aggregates('comsol').columns}
+st.caption(f"Histograms of the {meta['rows']} simulated parameter sets")
+
+with st.expander("Joint distribution of two columns"):
+    col1, col2 = st.columns(2)
+    x_col = col1.selectbox("x", meta['columns'], index=meta['columns'].index(DENSITY_DEFAULT[0]))
+    y_col = col2.selectbox("y", meta['columns'], index=meta['columns'].index(DENSITY_DEFAULT[1]))
+    key = f"density:{x_col}|{y_col}"
+    if snapshot is not None and key in snapshot['figures']:
+        fig = snapshot['figures'][key]
+    else:
+        fig = density_figure(dataset_aggregates('comsol'), x_col, y_col)
+    st.plotly_chart(fig, use_container_width=True)
+    summary = snapshot['summary'] if snapshot is not None else dataset_aggregates('comsol').summary()
+    st.dataframe(summary.round(6), use_container_width=True)
+
+# Exports are written on the first click and cached on disk, so these buttons cost nothing per rerun
+results = load_comsol_data()
+if results is not None:
+    st.markdown("**Download the simulation results**")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        create_download_button(results, "comsol_results.csv", "CSV")
+    with col2:
+        create_download_button(results, "comsol_results.csv.gz", "Compressed CSV", fmt='csv.gz')
+    with col3:
+        create_download_button(results, "comsol_results.parquet", "Parquet", fmt='parquet')
 
 st.header('Model Configuration')
 
@@ -136,6 +180,53 @@ for metric in ['V_diff', 'PDmax', 'Efficiency', 'Power_W']:
     group1 = group.drop(columns=['Metric'])
     st.dataframe(group1, use_container_width=True)
 
+st.subheader("Closest Simulated Configuration")
+st.markdown("""
+<div style="text-align: justify;">
+Enter a design to find the COMSOL runs closest to it. Distances are measured with every parameter scaled to its sweep range (contact resistivity on a log scale), so 1 is the full width of one parameter. The estimate weights the eight nearest runs by inverse squared distance; it needs no training, but it is only as good as the sampling density around the design.
+</div>
+""", unsafe_allow_html=True)
+index = load_config_index()
+columns = st.columns(4)
+design = {}
+for i, (name, (column, low, high, scale)) in enumerate(SWEEP_PARAMS.items()):
+    default = np.sqrt(low * high) if scale == 'log' else 0.5 * (low + high)
+    design[column] = columns[i % 4].number_input(column, min_value=low, max_value=high, value=float(default),
+                                                 format='%.2e' if scale == 'log' else '%.3f', key=f'nearest_{name}')
+design = pd.DataFrame([design])
+neighbours = index.nearest(design, k=5).drop(columns=['query'])
+st.dataframe(neighbours, use_container_width=True, hide_index=True)
+st.markdown("**Inverse-distance estimate**")
+st.dataframe(index.interpolate(design), use_container_width=True, hide_index=True)
+
+st.subheader("Live Sweep Monitor")
+st.markdown("""
+<div style="text-align: justify;">
+A long local sweep does not have to finish before its best configurations are known. Running <code>python sweep_tracker.py results.csv --follow</code> next to the sweep keeps the top configurations per metric and the PDmax-efficiency Pareto front up to date as rows are written, and this section refreshes from its snapshot every few seconds.
+</div>
+""", unsafe_allow_html=True)
+
+
+# Poll only while a tracker has written a snapshot; otherwise the section renders once
+# and the next full rerun of the page picks up a newly started sweep
+@st.fragment(run_every=5 if SNAPSHOT_PATH.exists() else None)
+def live_sweep():
+    snapshot = read_snapshot()
+    if snapshot is None:
+        st.info(f"No sweep is being tracked (no snapshot at {SNAPSHOT_PATH.name}). Reload the page after starting one.")
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rows processed", f"{snapshot['rows_seen']:,}")
+    col2.metric("Pareto-optimal configurations", len(snapshot['pareto']))
+    col3.metric("Last update", pd.Timestamp(snapshot['updated'], unit='s').strftime('%H:%M:%S'))
+    metric = st.selectbox("Metric", list(snapshot['top']), key='live_metric')
+    st.dataframe(snapshot['top'][metric], use_container_width=True)
+    st.markdown(f"**Pareto front** ({' vs '.join(snapshot['pareto_metrics'])})")
+    st.dataframe(snapshot['pareto'], use_container_width=True)
+
+
+live_sweep()
+
 st.markdown(""" 
 <div style="text-align: justify;">
 The choice of performance metric to optimize depends on the application. 
@@ -150,4 +241,6 @@ st.markdown("""
 - **Power Output (`Power_W`)**: Maximize `Power_W` when your goal is to extract as much total electrical energy as possible from an abundant heat source, regardless of efficiency.
 
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+stop_page_timer()
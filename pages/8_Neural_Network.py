@@ -3,7 +3,9 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import load_teg_data, create_interactive_plot, display_metric_card
+from utils import create_download_button, create_file_download_button, load_snapshot, load_teg_data, dataset_aggregates, create_histogram_plot, create_interactive_plot, display_metric_card, start_page_timer, stop_page_timer, timer
+
+start_page_timer('Neural Network')
 
 # Page configuration
 st.set_page_config(
@@ -60,15 +62,15 @@ with tab1:
         st.dataframe(pd.DataFrame(stats))
     with col2:
         # Load and display data distribution
-        teg_data = load_teg_data()
-        if teg_data is not None:
-            fig = px.histogram(
-                teg_data,
-                x="Power Output (Watts)",
-                title="Power Output Distribution",
-                nbins=50
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        # Binned on the server: only the bin counts are sent to the browser
+        snapshot = load_snapshot('teg_distributions')
+        if snapshot is not None:
+            st.plotly_chart(snapshot['figures']['power'], use_container_width=True)
+        elif load_teg_data() is not None:
+            with timer('power histogram'):
+                hist = dataset_aggregates('teg').histogram("Power Output (Watts)", bins=64)
+                fig = create_histogram_plot(hist, "Power Output Distribution", "Power Output (Watts)")
+                st.plotly_chart(fig, use_container_width=True)
 
 with tab2:
     st.header("Neural Network Architecture")
@@ -150,16 +152,9 @@ st.markdown("---")
 st.header("Download Resources")
 col1, col2 = st.columns(2)
 with col1:
-    st.download_button(
-        label="Download Training Data",
-        data=pd.DataFrame(stats).to_csv(index=False),
-        file_name="normalization_stats.csv",
-        mime="text/csv"
-    )
+    create_download_button(pd.DataFrame(stats), "normalization_stats.csv", "Download Training Data")
 with col2:
-    st.download_button(
-        label="Download Model Architecture",
-        data=open("ANN_dataset/ANNcode.ipynb", "rb").read(),
-        file_name="model_architecture.ipynb",
-        mime="application/x-ipynb+json"
-    )
\ No newline at end of file
+    create_file_download_button("ANN_dataset/ANNcode.ipynb", "model_architecture.ipynb", "Download Model Architecture",
+                                mime="application/x-ipynb+json")
+
+stop_page_timer()
@@ -0,0 +1,55 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from utils import timing_records, timing_summary, cache_memory_stats, TIMING_BUFFER_SIZE
+
+# Page configuration
+st.set_page_config(
+    page_title="Diagnostics - TEG Project",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+# Only shown with ?diagnostics=1 in the URL; visitors get an empty page
+if st.query_params.get("diagnostics") != "1":
+    st.info("Nothing to see here. Open this page with `?diagnostics=1` to view app timings.")
+    st.stop()
+
+st.title("Diagnostics")
+st.markdown(f"""
+Latency of page renders, data loaders, image loading and figure rendering recorded in this server
+process (last {TIMING_BUFFER_SIZE:,} events). Cached loaders count a **hit** when `st.cache_data`
+served the result and a **miss** when the function body ran.
+""")
+
+records = timing_records()
+if records.empty:
+    st.warning("No timings recorded yet. Visit a few pages first.")
+else:
+    summary = timing_summary(records)
+
+    st.header("Page render time")
+    pages = summary[summary['name'] == 'page render'].drop(columns=['name', 'hits', 'misses'])
+    st.dataframe(pages.round(2), use_container_width=True, hide_index=True)
+
+    st.header("Functions and blocks")
+    functions = summary[summary['name'] != 'page render']
+    st.dataframe(functions.round(3), use_container_width=True, hide_index=True)
+
+    st.header("Recent events")
+    recent = records.tail(500).assign(
+        time=lambda df: pd.to_datetime(df['time'], unit='s'),
+        ms=lambda df: df['seconds'] * 1e3
+    )
+    fig = px.scatter(recent, x='time', y='ms', color='name', hover_data=['page', 'cache'],
+                     log_y=True, title="Latency of the last 500 events", template='plotly_white')
+    st.plotly_chart(fig, use_container_width=True)
+
+st.header("Cache memory")
+memory = cache_memory_stats()
+if memory.empty:
+    st.write("No cache statistics available.")
+else:
+    memory['MB'] = memory['bytes'] / 1e6
+    st.dataframe(memory.sort_values('bytes', ascending=False).round(3), use_container_width=True, hide_index=True)
+    st.metric("Total cache memory", f"{memory['MB'].sum():,.2f} MB")
@@ -0,0 +1,227 @@
+"""Headless precompute of the app's static results into versioned snapshots.
+
+The parts of the pages that do not depend on any widget (distribution
+figures of the sweep tables, their summary statistics, the library-wide
+operating-window ranking at its default inputs) are computed here ahead of
+time and written under snapshots/<task>/<version>/, tables as Parquet and
+figures as Plotly JSON specs. A task's version is a hash of its input files
+(data and code), recorded in snapshots/manifest.json; utils.load_snapshot
+only serves a snapshot whose version matches the files on disk, and pages
+compute live otherwise and for any non-default widget input.
+
+    python precompute.py            # every task
+    python precompute.py --list
+    python precompute.py comsol_distributions --force
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent
+SNAPSHOT_DIR = ROOT / 'snapshots'
+MANIFEST = 'manifest.json'
+HISTOGRAM_BINS = (8, 16, 32, 64, 128)
+DENSITY_DEFAULT = ('Th (K)', 'PDmax')
+OPERATING_WINDOW_DEFAULTS = {'delta_T': 100.0, 'T_cold_min': 0.0, 'T_hot_max': 2000.0, 'zt': 'midpoint'}
+
+
+def parameter_histogram(aggregates, column, bins, log_x=False):
+    """Page-7 histogram figure of one sweep parameter."""
+    from utils import create_histogram_plot
+
+    fig = create_histogram_plot(aggregates.histogram(column, bins), column, column, log_x=log_x)
+    fig.update_layout(height=250, margin=dict(l=10, r=10, t=40, b=10), title_font_size=14)
+    return fig
+
+
+def density_figure(aggregates, x, y, bins=32):
+    """Page-7 joint-density heatmap of two columns."""
+    import plotly.express as px
+
+    tile = aggregates.density(x, y, bins=bins)
+    x_mid = 0.5 * (tile['x_edges'][1:] + tile['x_edges'][:-1])
+    y_mid = 0.5 * (tile['y_edges'][1:] + tile['y_edges'][:-1])
+    return px.imshow(tile['counts'].T, x=x_mid, y=y_mid, origin='lower', aspect='auto',
+                     labels={'x': x, 'y': y, 'color': 'Count'}, color_continuous_scale='Viridis')
+
+
+def _aggregates(name):
+    from aggregates import DatasetAggregates
+    from shared_data import ColumnStore
+    from utils import DATA_FILES
+
+    return DatasetAggregates(ColumnStore(ROOT / DATA_FILES[name]))
+
+
+def comsol_distributions():
+    """Page 7: parameter histograms at every bin option, summary table, default joint density."""
+    from comsol_results import SWEEP_PARAMS
+
+    aggregates = _aggregates('comsol')
+    figures = {f"{column}@{bins}": parameter_histogram(aggregates, column, bins, log_x=scale == 'log')
+               for column, _, _, scale in SWEEP_PARAMS.values() for bins in HISTOGRAM_BINS}
+    figures['density:' + '|'.join(DENSITY_DEFAULT)] = density_figure(aggregates, *DENSITY_DEFAULT)
+    return {'figures': figures, 'summary': aggregates.summary(),
+            'meta': {'rows': int(aggregates.stats['Th (K)']['count']), 'columns': aggregates.columns}}
+
+
+def teg_distributions():
+    """Page 8: power output histogram."""
+    from utils import create_histogram_plot
+
+    hist = _aggregates('teg').histogram("Power Output (Watts)", bins=64)
+    return {'figures': {'power': create_histogram_plot(hist, "Power Output Distribution", "Power Output (Watts)")}}
+
+
+def operating_windows():
+    """Page 4: best operating window of every estm material at the page's default inputs."""
+    from operating_window import optimal_windows
+
+    return {'windows': optimal_windows(**OPERATING_WINDOW_DEFAULTS)}
+
+
+# Task name: (function, input files whose content defines the snapshot version)
+TASKS = {
+    'comsol_distributions': (comsol_distributions, ['ANN_dataset/comsol_results_with_efficiency.csv',
+                                                    'aggregates.py', 'shared_data.py', 'comsol_results.py',
+                                                    'utils.py']),
+    'teg_distributions': (teg_distributions, ['ANN_dataset/TEG_data.csv', 'aggregates.py', 'shared_data.py',
+                                              'utils.py']),
+    'operating_windows': (operating_windows, ['estm.xlsx', 'operating_window.py', 'materials.py',
+                                              'teg_model.py']),
+}
+
+
+def task_version(name):
+    """Short hash of precompute.py and the task's input files."""
+    digest = hashlib.sha256()
+    for path in ['precompute.py'] + TASKS[name][1]:
+        digest.update(path.encode())
+        digest.update((ROOT / path).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def snapshot_stamp(name, snapshot_dir=SNAPSHOT_DIR):
+    """Modification times of the manifest and the task's inputs (changes whenever a snapshot may appear or go stale)."""
+    paths = [Path(snapshot_dir) / MANIFEST] + [ROOT / path for path in ['precompute.py'] + TASKS[name][1]]
+    return tuple(path.stat().st_mtime_ns if path.exists() else 0 for path in paths)
+
+
+def _write(value, path):
+    """Write one artifact; returns its kind."""
+    import plotly.graph_objects as go
+
+    if isinstance(value, pd.DataFrame):
+        value.to_parquet(path.with_suffix('.parquet'))
+        return 'table'
+    if isinstance(value, dict) and value and all(isinstance(v, go.Figure) for v in value.values()):
+        path.with_suffix('.json').write_text(json.dumps({k: v.to_json() for k, v in value.items()}))
+        return 'figures'
+    path.with_suffix('.json').write_text(json.dumps(value))
+    return 'json'
+
+
+class Figures(dict):
+    """Figure specs by name, each turned into a Plotly figure only when a page asks for it."""
+
+    def __getitem__(self, key):
+        import plotly.io as pio
+
+        return pio.from_json(super().__getitem__(key))
+
+
+def _read(path, kind):
+    if kind == 'table':
+        return pd.read_parquet(path.with_suffix('.parquet'))
+    value = json.loads(path.with_suffix('.json').read_text())
+    return Figures(value) if kind == 'figures' else value
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        return json.loads((Path(snapshot_dir) / MANIFEST).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'tasks': {}}
+
+
+def _write_manifest(manifest, snapshot_dir):
+    fd, tmp = tempfile.mkstemp(dir=snapshot_dir, suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, Path(snapshot_dir) / MANIFEST)
+
+
+def run_task(name, snapshot_dir=SNAPSHOT_DIR, force=False):
+    """
+    Compute one task and write its snapshot (skipped when the current version exists).
+
+    Returns:
+        dict: the task's manifest entry.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    version = task_version(name)
+    manifest = read_manifest(snapshot_dir)
+    entry = manifest['tasks'].get(name)
+    target = snapshot_dir / name / version
+    if entry and entry['version'] == version and target.exists() and not force:
+        return entry
+
+    start = time.perf_counter()
+    artifacts = TASKS[name][0]()
+    seconds = time.perf_counter() - start
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=version + '.'))
+    kinds = {artifact: _write(value, tmp / artifact) for artifact, value in artifacts.items()}
+    shutil.rmtree(target, ignore_errors=True)
+    os.rename(tmp, target)
+    # Older versions of this task are no longer served
+    for old in target.parent.iterdir():
+        if old != target:
+            shutil.rmtree(old, ignore_errors=True)
+
+    entry = {'version': version, 'created': time.time(), 'seconds': seconds, 'artifacts': kinds}
+    manifest = read_manifest(snapshot_dir)
+    manifest['tasks'][name] = entry
+    _write_manifest(manifest, snapshot_dir)
+    return entry
+
+
+def read_task(name, snapshot_dir=SNAPSHOT_DIR):
+    """Artifacts of one task's snapshot, or None when it is missing or older than its inputs."""
+    entry = read_manifest(snapshot_dir)['tasks'].get(name)
+    if entry is None or entry['version'] != task_version(name):
+        return None
+    path = Path(snapshot_dir) / name / entry['version']
+    try:
+        return {artifact: _read(path / artifact, kind) for artifact, kind in entry['artifacts'].items()}
+    except FileNotFoundError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('tasks', nargs='*', help='tasks to run (default: all)')
+    parser.add_argument('--out', default=SNAPSHOT_DIR, type=Path)
+    parser.add_argument('--force', action='store_true', help='recompute even if the snapshot is current')
+    parser.add_argument('--list', action='store_true', help='show tasks and whether their snapshots are current')
+    args = parser.parse_args()
+
+    if args.list:
+        manifest = read_manifest(args.out)
+        for name in TASKS:
+            entry = manifest['tasks'].get(name)
+            state = 'missing' if entry is None else 'current' if entry['version'] == task_version(name) else 'stale'
+            print(f"{name:24s} {state}")
+    else:
+        for name in args.tasks or TASKS:
+            start = time.perf_counter()
+            entry = run_task(name, args.out, args.force)
+            print(f"{name:24s} {entry['version']}  computed in {entry['seconds']:.2f} s, "
+                  f"done in {time.perf_counter() - start:.2f} s")
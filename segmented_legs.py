@@ -0,0 +1,271 @@
+"""Choose segmented p/n legs from the estm library for a hot/cold temperature window.
+
+Each leg is a stack of up to three materials from hot to cold. With a constant
+heat flux q through the leg, dx = κ dT / q, so the leg's open-circuit voltage,
+resistance and thermal conductance only depend on the temperature integrals
+
+    a = ∫ |S| dT,   r = ∫ ρκ dT   (ρ = 1/σ),   k = ∫ κ dT
+
+and its effective figure of merit is Z = a² / (ΔT r). Segment lengths are
+proportional to their ∫ κ dT. Thomson heat and the temperature dependence of
+the flux are neglected, as in the usual engineering-ZT treatment.
+
+The search is a branch-and-bound over (material, interface temperature):
+partial stacks are dropped when an optimistic completion cannot beat the
+current k-th best leg. Since a²/r = max_λ (2λa - λ²r), the unfinished part is
+bounded by the best additive 2λa - λ²r over stacks with the remaining number of
+segments, tabulated per λ interval by dynamic programming (LegLibrary.bound).
+Adjacent segments must have compatibility factors within a factor
+of two at their interface.
+
+    python segmented_legs.py --t-hot 800 --t-cold 300
+"""
+import argparse
+import heapq
+import time
+
+import numpy as np
+import pandas as pd
+
+from materials import KAPPA, SEEBECK, SIGMA, PropertyIndex, load_estm
+from teg_model import max_efficiency
+
+
+class LegLibrary:
+    """Cumulative temperature integrals of every usable p- or n-type material on a common grid."""
+
+    def __init__(self, index, leg, T_cold, T_hot, step=10.0, method='linear', max_segments=3, top_k=10,
+                 n_lambda=128):
+        self.leg = leg
+        self.T = np.linspace(T_cold, T_hot, max(int(round((T_hot - T_cold) / step)), 1) + 1)
+        ids = np.arange(len(index.formulas))
+        S, sigma, kappa = np.moveaxis(index.query(ids[:, None], self.T[None, :], [SEEBECK, SIGMA, KAPPA], method), -1, 0)
+        S = S * 1e-6
+        sign = 1 if leg == 'p' else -1
+
+        # A node is usable when it lies inside the material's tabulated range and has the right sign
+        ok = ((self.T >= index.T_min[:, None]) & (self.T <= index.T_max[:, None])
+              & (sign * S > 0) & (sigma > 0) & (kappa > 0))
+        keep = ok.sum(axis=1) >= 2
+        self.formulas = index.formulas[keep].to_numpy()
+        ok, S, sigma, kappa = ok[keep], np.abs(S[keep]), sigma[keep], kappa[keep]
+        rho_kappa = np.where(ok, kappa / np.where(ok, sigma, 1.0), np.inf)
+
+        dT = np.diff(self.T)
+        def cumulative(f):
+            f = np.where(ok, f, 0.0)
+            return np.concatenate([np.zeros((len(f), 1)), np.cumsum(0.5 * (f[:, 1:] + f[:, :-1]) * dT, axis=1)], axis=1)
+        self.C_S, self.C_rk, self.C_k = cumulative(S), cumulative(rho_kappa), cumulative(kappa)
+        self.bad = np.concatenate([np.zeros((len(ok), 1), dtype=int), np.cumsum(~ok, axis=1)], axis=1)
+
+        # Compatibility factor s = (sqrt(1 + zT) - 1) / (S T) with z = S²/(ρκ)
+        z = np.where(ok, S**2 / rho_kappa, 0.0)
+        self.compat = np.where(ok, (np.sqrt(1 + z * self.T) - 1) / np.where(ok, S * self.T, 1.0), np.nan)
+
+        # Completion bounds. For any stack a²/r = max_λ (2λa - λ²r) with the
+        # maximum at λ = a/r. Only stacks beating the top_k-th uniform leg (score
+        # F0) matter; as a <= ∫ max|S| and a²/r <= ∫ max S²/(ρκ) =: F1 while
+        # r >= ∫ min ρκ, their λ lies in [F0 / ∫ max|S|, sqrt(F1 / ∫ min ρκ)].
+        # U[k, i, g] bounds Σ (2λa - λ²r) over stacks of at most k segments
+        # covering nodes 0..g for λ in [λ_i, λ_i+1] (2λ_i+1 a - λ_i² r per
+        # segment); it is built by dynamic programming over the interface node,
+        # ignoring compatibility.
+        G = len(self.T) - 1
+        a, r, valid = self.segments(0, G)
+        uniform = np.sort(np.where(valid, a**2 / r, 0.0))[::-1]
+        F0 = uniform[min(top_k, len(uniform)) - 1]
+        def integral(f):
+            return (0.5 * (f[1:] + f[:-1]) * dT).sum()
+        F1 = integral(z.max(axis=0))
+        lam_min = max(F0, 1e-300) / integral(np.where(ok, S, 0.0).max(axis=0))
+        lam_max = np.sqrt(F1 / integral(np.where(ok, rho_kappa, np.inf).min(axis=0)))
+        lam = np.geomspace(lam_min, max(lam_max, lam_min * (1 + 1e-9)), n_lambda + 1)
+        self.lam_lo, self.lam_hi = lam[:-1], lam[1:]
+        U = np.full((max_segments + 1, n_lambda, G + 1), -np.inf)
+        U[:, :, 0] = 0.0
+        for g in range(1, G + 1):
+            lo = np.arange(g)
+            a, r, valid = self.segments(lo, g)
+            gain = np.where(valid, 2 * self.lam_hi[:, None, None] * a - self.lam_lo[:, None, None]**2 * r,
+                            -np.inf).max(axis=1)  # (λ, lo): best material for segment lo..g
+            for k in range(1, max_segments + 1):
+                U[k, :, g] = np.maximum(U[k - 1, :, g], (gain + U[k - 1, :, :g]).max(axis=1))
+        self.U = U
+
+    def bound(self, a0, r0, lo, segments_left):
+        """Upper bound on a²/r of any stack extending (a0, r0) to the cold end from node lo."""
+        a0, r0 = np.asarray(a0)[..., None], np.asarray(r0)[..., None]
+        U = np.moveaxis(self.U[segments_left][:, lo], 0, -1)
+        return (2 * self.lam_hi * a0 - self.lam_lo**2 * r0 + U).max(axis=-1)
+
+    def segments(self, lo, hi):
+        """a, r and validity of every material over grid nodes lo..hi; shape (materials,) + broadcast(lo, hi)."""
+        lo, hi = np.broadcast_arrays(lo, hi)
+        a = self.C_S[:, hi] - self.C_S[:, lo]
+        r = self.C_rk[:, hi] - self.C_rk[:, lo]
+        valid = (self.bad[:, hi + 1] - self.bad[:, lo]) == 0
+        return a, r, valid
+
+
+def _compatible(lib, upper, lower, node, max_ratio):
+    """Compatibility-factor test between the segment above and the materials below an interface."""
+    if max_ratio is None:
+        return np.ones(len(lower), dtype=bool)
+    ratio = lib.compat[lower, node] / lib.compat[upper, node]
+    return (ratio <= max_ratio) & (ratio >= 1 / max_ratio)
+
+
+def optimize_leg(lib, max_segments=3, top_k=10, max_compat_ratio=2.0):
+    """
+    Best segmented stacks for one leg.
+
+    Parameters:
+        lib (LegLibrary): material integrals for the leg type.
+        max_segments (int): 1 to 3.
+        top_k (int): number of stacks returned.
+        max_compat_ratio (float): largest allowed compatibility-factor ratio at an
+            interface (None disables the check).
+
+    Returns:
+        list: (score a²/r, materials hot->cold, interface node indices hot->cold), best first.
+        dict: search statistics.
+    """
+    top = []  # min-heap of (score, materials, nodes)
+    stats = {'expanded': 0, 'pruned': 0, 'evaluated': 0}
+    G = len(lib.T) - 1
+
+    def threshold():
+        return top[0][0] if len(top) == top_k else -np.inf
+
+    def offer(scores, materials, nodes):
+        for m in np.flatnonzero(scores > threshold()):
+            item = (float(scores[m]), materials + (m,), nodes)
+            if len(top) < top_k:
+                heapq.heappush(top, item)
+            elif item[0] > top[0][0]:
+                heapq.heapreplace(top, item)
+
+    # Uniform legs first: they give the search a good incumbent
+    a, r, valid = lib.segments(0, G)
+    stats['evaluated'] += len(a)
+    offer(np.where(valid, a**2 / r, -np.inf), (), (G, 0))
+
+    def expand(a0, r0, materials, nodes, hi, depth):
+        # Last segment: every material down to the cold end at once
+        a, r, valid = lib.segments(0, hi)
+        valid &= _compatible(lib, materials[-1], np.arange(len(a)), hi, max_compat_ratio)
+        stats['evaluated'] += int(valid.sum())
+        offer(np.where(valid, (a0 + a)**2 / (r0 + r), -np.inf), materials, nodes + (0,))
+        if depth + 1 >= max_segments:
+            return
+        # Intermediate segment [lo, hi] for every material and interior node lo
+        lo = np.arange(1, hi)
+        if not len(lo):
+            return
+        a, r, valid = lib.segments(lo, hi)
+        valid &= _compatible(lib, materials[-1], np.arange(len(a)), hi, max_compat_ratio)[:, None]
+        bound = np.where(valid, lib.bound(a0 + a, r0 + r, lo, max_segments - depth - 1), -np.inf)
+        order = np.argsort(bound, axis=None)[::-1][:int(np.isfinite(bound).sum())]
+        for n_done, flat in enumerate(order):
+            if bound.flat[flat] <= threshold():
+                stats['pruned'] += len(order) - n_done
+                break
+            m, j = np.unravel_index(flat, bound.shape)
+            stats['expanded'] += 1
+            expand(a0 + a[m, j], r0 + r[m, j], materials + (m,), nodes + (int(lo[j]),), int(lo[j]), depth + 1)
+
+    if max_segments > 1:
+        # First (hottest) segment [lo, G] for every material and interior node lo
+        lo = np.arange(1, G)
+        a, r, valid = lib.segments(lo, G)
+        bound = np.where(valid, lib.bound(a, r, lo, max_segments - 1), -np.inf)
+        order = np.argsort(bound, axis=None)[::-1][:int(np.isfinite(bound).sum())]
+        for n_done, flat in enumerate(order):
+            if bound.flat[flat] <= threshold():
+                stats['pruned'] += len(order) - n_done
+                break
+            m, j = np.unravel_index(flat, bound.shape)
+            stats['expanded'] += 1
+            expand(a[m, j], r[m, j], (m,), (G, int(lo[j])), int(lo[j]), 1)
+    return sorted(top, reverse=True), stats
+
+
+def describe_leg(lib, score, materials, nodes):
+    """Table row for one stack: materials, interface temperatures, length fractions and integrals."""
+    hi, lo = np.array(nodes[:-1]), np.array(nodes[1:])
+    ms = np.array(materials)
+    k = lib.C_k[ms, hi] - lib.C_k[ms, lo]
+    a = lib.C_S[ms, hi] - lib.C_S[ms, lo]
+    r = lib.C_rk[ms, hi] - lib.C_rk[ms, lo]
+    delta_T = lib.T[-1] - lib.T[0]
+    return {
+        'materials': ' / '.join(lib.formulas[ms]),
+        'interfaces (K)': ', '.join(f"{t:.0f}" for t in lib.T[lo[:-1]]),
+        'length fractions': ', '.join(f"{f:.2f}" for f in k / k.sum()),
+        'a (V)': a.sum(),
+        'r (Ω·W)': r.sum(),
+        'k (W/m)': k.sum(),
+        'ZT_eff': score / delta_T * lib.T.mean(),
+    }
+
+
+def optimize_couple(T_hot, T_cold, index=None, max_segments=3, top_k=10, step=10.0, max_compat_ratio=2.0):
+    """
+    Best segmented p/n couple for a temperature window.
+
+    The top_k stacks of each leg are combined at the optimal geometry: with
+    g = A/L the legs' thermal conductances are g k / ΔT and resistances r / (g k),
+    so Z = (a_p + a_n)² / (ΔT (√r_p + √r_n)²) when g_n k_n / (g_p k_p) = √(r_n / r_p).
+
+    Returns:
+        DataFrame: couples sorted by ZT_eff, with their maximum efficiency.
+        dict: per-leg search statistics and timings.
+    """
+    index = index or PropertyIndex(load_estm())
+    info, legs = {}, {}
+    for leg in ('p', 'n'):
+        start = time.perf_counter()
+        lib = LegLibrary(index, leg, T_cold, T_hot, step, max_segments=max_segments, top_k=top_k)
+        best, stats = optimize_leg(lib, max_segments, top_k, max_compat_ratio)
+        stats['materials'] = len(lib.formulas)
+        stats['seconds'] = time.perf_counter() - start
+        info[leg] = stats
+        legs[leg] = (lib, best)
+
+    delta_T, T_mean = T_hot - T_cold, 0.5 * (T_hot + T_cold)
+    rows = []
+    for p in legs['p'][1]:
+        row_p = describe_leg(legs['p'][0], *p)
+        for n in legs['n'][1]:
+            row_n = describe_leg(legs['n'][0], *n)
+            r_p, r_n = row_p['r (Ω·W)'], row_n['r (Ω·W)']
+            ZT = (row_p['a (V)'] + row_n['a (V)'])**2 / (delta_T * (np.sqrt(r_p) + np.sqrt(r_n))**2) * T_mean
+            rows.append({
+                'p-leg': row_p['materials'], 'p interfaces (K)': row_p['interfaces (K)'],
+                'p length fractions': row_p['length fractions'], 'p ZT_eff': row_p['ZT_eff'],
+                'n-leg': row_n['materials'], 'n interfaces (K)': row_n['interfaces (K)'],
+                'n length fractions': row_n['length fractions'], 'n ZT_eff': row_n['ZT_eff'],
+                'area ratio A_n/A_p (equal lengths)': np.sqrt(r_n / r_p) * row_p['k (W/m)'] / row_n['k (W/m)'],
+                'ZT_eff': ZT,
+                'efficiency': max_efficiency(T_hot, T_cold, ZT),
+            })
+    return pd.DataFrame(rows).sort_values('ZT_eff', ascending=False, ignore_index=True), info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--t-hot', type=float, default=800.0)
+    parser.add_argument('--t-cold', type=float, default=300.0)
+    parser.add_argument('--segments', type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument('--step', type=float, default=10.0, help='temperature grid step (K)')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-compat-ratio', type=float, default=2.0, help='0 disables the compatibility check')
+    args = parser.parse_args()
+
+    couples, info = optimize_couple(args.t_hot, args.t_cold, max_segments=args.segments, top_k=args.top,
+                                    step=args.step, max_compat_ratio=args.max_compat_ratio or None)
+    for leg, stats in info.items():
+        print(f"{leg}-leg: {stats['materials']} materials, {stats['evaluated']} stacks evaluated, "
+              f"{stats['pruned']} branches pruned, {stats['seconds']:.2f} s")
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(couples.head(args.top))
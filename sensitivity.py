@@ -0,0 +1,165 @@
+"""Sobol sensitivity indices over the seven COMSOL sweep parameters.
+
+Builds Saltelli sample matrices from a scrambled Sobol sequence, evaluates them
+in batches through the reduced-order unicouple model (or the surrogate) across
+a process pool, and estimates first-order (Saltelli 2010) and total (Jansen)
+indices with bootstrap confidence intervals.
+
+The surrogate was trained on TEG_data.csv, whose ranges do not overlap the
+COMSOL sweep (Delta_T 300 to 598 K against Th - 300 K of 0 to 200 K, rho_c on
+an unrecorded scale rather than Ω·m²), so its indices are computed over its
+own six inputs across their training-data ranges instead.
+
+Example:
+    python sensitivity.py --evaluations 1000000 --output pd_max --workers 4
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, qmc
+
+from comsol_results import SWEEP_PARAMS, scale_unit
+from teg_model import SURROGATE_INPUTS, SurrogateModel, surrogate_domain, unicouple_performance
+
+PARAMS = list(SWEEP_PARAMS)
+# Surrogate output name: column of SurrogateModel.predict
+SURROGATE_COLUMNS = {'power': 0, 'voltage': 1}
+_surrogate = None
+
+
+def evaluate_analytic(X, output='pd_max'):
+    """Unicouple model output for rows (LHT, HIC, w_p, w_n, FF, rho_c, Th)."""
+    return unicouple_performance(*X.T)[output]
+
+
+def evaluate_surrogate(X, output='power'):
+    """Surrogate power or voltage for rows ordered as SURROGATE_INPUTS."""
+    global _surrogate
+    if output not in SURROGATE_COLUMNS:
+        raise ValueError(f"Unknown surrogate output {output!r}; choose from {', '.join(SURROGATE_COLUMNS)}")
+    if _surrogate is None:
+        _surrogate = SurrogateModel()
+    return _surrogate.predict(X)[:, SURROGATE_COLUMNS[output]]
+
+
+def scale_surrogate(u, domain=None):
+    """Map unit-hypercube points (n, 6) onto the surrogate's training ranges (rho_c log-uniform, it spans decades)."""
+    domain = surrogate_domain() if domain is None else domain
+    low, high = domain['min'].to_numpy(), domain['max'].to_numpy()
+    X = low + u * (high - low)
+    j = SURROGATE_INPUTS.index('rho_c')
+    X[:, j] = low[j] * (high[j] / low[j]) ** u[:, j]
+    return X
+
+
+def _evaluate_chunk(args):
+    model, output, X = args
+    return (evaluate_analytic if model == 'analytic' else evaluate_surrogate)(X, output)
+
+
+def saltelli_matrices(n, seed=42, d=len(PARAMS), scale=scale_unit):
+    """Base matrices A and B (n, d), from one 2d-dimensional scrambled Sobol draw mapped by scale (sweep units)."""
+    u = qmc.Sobol(2 * d, scramble=True, seed=seed).random_base2(int(np.log2(n)))
+    return scale(u[:, :d]), scale(u[:, d:])
+
+
+def evaluate_saltelli(A, B, model='analytic', output='pd_max', workers=None, chunk_size=200_000):
+    """
+    Evaluate f(A), f(B) and every f(AB_i), where AB_i is A with column i taken from B.
+
+    Returns:
+        tuple: f_A (n,), f_B (n,), f_AB (d, n).
+    """
+    n, d = A.shape
+    blocks = [A, B]
+    for i in range(d):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    X = np.concatenate(blocks)
+
+    chunks = [(model, output, X[start:start + chunk_size]) for start in range(0, len(X), chunk_size)]
+    if workers == 1:
+        y = np.concatenate([_evaluate_chunk(c) for c in chunks])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            y = np.concatenate(list(pool.map(_evaluate_chunk, chunks)))
+    y = y.reshape(d + 2, n)
+    return y[0], y[1], y[2:]
+
+
+def sobol_indices(f_A, f_B, f_AB):
+    """First-order and total indices for each parameter (arrays of length d)."""
+    variance = np.var(np.concatenate([f_A, f_B]))
+    S1 = np.mean(f_B * (f_AB - f_A), axis=1) / variance
+    ST = 0.5 * np.mean((f_A - f_AB)**2, axis=1) / variance
+    return S1, ST
+
+
+def sensitivity_analysis(evaluations=1_000_000, model='analytic', output='pd_max', n_bootstrap=200,
+                         confidence=0.95, workers=None, seed=42, log_output=False):
+    """
+    Sobol indices of one model output over the COMSOL parameter space
+    (the surrogate: over its own inputs and training-data ranges).
+
+    Parameters:
+        evaluations (int): model evaluation budget; the base sample size is
+            evaluations / (d + 2), rounded to a power of two for the Sobol sequence.
+        model (str): 'analytic' or 'surrogate'.
+        output (str): unicouple_performance key ('pd_max', 'power', 'efficiency', 'voc')
+            for the analytic model, 'power' or 'voltage' for the surrogate.
+        n_bootstrap (int): bootstrap resamples for the confidence intervals.
+        log_output (bool): analyse log10 of the output (PDmax spans decades).
+
+    Returns:
+        DataFrame: S1, ST and their confidence half-widths per parameter.
+    """
+    names = SURROGATE_INPUTS if model == 'surrogate' else PARAMS
+    d = len(names)
+    n = 2 ** int(round(np.log2(evaluations / (d + 2))))
+    if model == 'surrogate':
+        domain = surrogate_domain()
+        A, B = saltelli_matrices(n, seed, d, lambda u: scale_surrogate(u, domain))
+    else:
+        A, B = saltelli_matrices(n, seed)
+    # Fail on an unknown output name here rather than in every worker
+    if model == 'surrogate' and output not in SURROGATE_COLUMNS:
+        raise ValueError(f"Unknown surrogate output {output!r}; choose from {', '.join(SURROGATE_COLUMNS)}")
+    if model == 'analytic' and output not in unicouple_performance(*A[:1].T):
+        raise ValueError(f"Unknown unicouple_performance output {output!r}")
+    f_A, f_B, f_AB = evaluate_saltelli(A, B, model, output, workers)
+    if log_output:
+        f_A, f_B, f_AB = (np.log10(np.clip(f, 1e-300, None)) for f in (f_A, f_B, f_AB))
+    S1, ST = sobol_indices(f_A, f_B, f_AB)
+
+    rng = np.random.default_rng(seed)
+    boot = np.empty((n_bootstrap, 2, d))
+    for b in range(n_bootstrap):
+        idx = rng.integers(0, n, n)
+        boot[b] = sobol_indices(f_A[idx], f_B[idx], f_AB[:, idx])
+    z = norm.ppf(0.5 + confidence / 2)
+    conf = z * boot.std(axis=0, ddof=1)
+
+    return pd.DataFrame({'S1': S1, 'S1_conf': conf[0], 'ST': ST, 'ST_conf': conf[1]},
+                        index=pd.Index(names, name='parameter'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--evaluations', type=int, default=1_000_000)
+    parser.add_argument('--model', choices=['analytic', 'surrogate'], default='analytic')
+    parser.add_argument('--output', default=None,
+                        help="model output (default: 'pd_max' for the analytic model, 'power' for the surrogate)")
+    parser.add_argument('--log-output', action='store_true')
+    parser.add_argument('--bootstrap', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    output = args.output or ('power' if args.model == 'surrogate' else 'pd_max')
+    indices = sensitivity_analysis(args.evaluations, args.model, output, args.bootstrap,
+                                   workers=args.workers, seed=args.seed, log_output=args.log_output)
+    print(indices.round(4).to_string())
@@ -0,0 +1,84 @@
+"""Read-only, memory-mapped column store shared by every Streamlit session.
+
+st.cache_data hands every caller its own unpickled copy of a DataFrame, so
+memory grows with the number of sessions. A ColumnStore converts a CSV once
+into one .npy file per column under .cache/columns and maps them read-only;
+held in st.cache_resource it is a single object per process, and frame()
+wraps the mapped arrays in a DataFrame without copying (copy-on-write, switched
+on here for pandas 2, means a page that modifies its frame only copies the
+columns it touches).
+The .npy files are rebuilt whenever the CSV changes.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache' / 'columns'
+
+# frame() hands out views on read-only maps; before pandas 3 copy-on-write is
+# opt-in, and without it assigning into such a frame raises instead of copying
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+class ColumnStore:
+    """
+    Memory-mapped columns of one CSV file.
+
+    Parameters:
+        csv_path (str or Path): source table.
+        cache_dir (str or Path): where the column files are kept.
+    """
+
+    def __init__(self, csv_path, cache_dir=CACHE_DIR):
+        csv_path = Path(csv_path)
+        stat = csv_path.stat()
+        key = hashlib.sha256(f"{csv_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+        self.path = Path(cache_dir) / f"{csv_path.stem}-{key}"
+        if not (self.path / 'columns.json').exists():
+            self._build(csv_path)
+        self.names = json.loads((self.path / 'columns.json').read_text())
+        self._columns = {name: np.load(self.path / f"{i}.npy", mmap_mode='r') for i, name in enumerate(self.names)}
+        # Never handed out itself: shallow copies of it are tracked by copy-on-write
+        self._frame = pd.DataFrame(self._columns, copy=False)
+
+    def _build(self, csv_path):
+        df = pd.read_csv(csv_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.path.parent, prefix=self.path.name + '.'))
+        for i, name in enumerate(df.columns):
+            values = df[name].to_numpy()
+            np.save(tmp / f"{i}.npy", values.astype(str) if values.dtype == object else values)
+        (tmp / 'columns.json').write_text(json.dumps(list(df.columns)))
+        try:
+            os.rename(tmp, self.path)
+        except OSError:
+            # Another process finished the same build first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def __len__(self):
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def column(self, name):
+        """Read-only mapped array of one column."""
+        return self._columns[name]
+
+    def frame(self, columns=None):
+        """DataFrame view on the mapped columns (no data is copied)."""
+        frame = self._frame if columns is None else self._frame[list(columns)]
+        return frame.copy(deep=False)
+
+    def take(self, rows, columns=None):
+        """DataFrame of selected rows (a boolean mask or indices); only the selection is copied."""
+        columns = self.names if columns is None else columns
+        return pd.DataFrame({name: self._columns[name][rows] for name in columns})
@@ -0,0 +1,177 @@
+"""Live top-k and Pareto summary of a COMSOL sweep while its results are written.
+
+The tracker consumes result rows in chunks as they arrive, keeps a bounded
+heap of the best rows for each page-7 metric and an incrementally merged
+Pareto front, and atomically rewrites a small JSON snapshot that the
+5000 COMSOL Simulations page polls. Following a results CSV only reads the
+bytes appended since the last poll.
+
+    python sweep_tracker.py ANN_dataset/comsol_results_with_efficiency.csv --follow
+"""
+import argparse
+import heapq
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comsol_results import INPUT_COLS, VN_COL, VOC_COL, add_derived_metrics
+
+SNAPSHOT_PATH = Path(__file__).resolve().parent / 'ANN_dataset' / 'sweep_snapshot.json'
+METRICS = ['V_diff', 'PDmax', 'efficiency', 'Power_W']
+PARETO_METRICS = ('PDmax', 'efficiency')
+
+
+def pareto_front(values):
+    """Indices of the rows of values (n, m) not dominated by any other row, all metrics maximized."""
+    values = np.asarray(values, dtype=float)
+    # Descending lexicographic order: a row can only be dominated by rows before it
+    order = np.lexsort(-values.T[::-1])
+    kept = []
+    for i in order:
+        if not kept or not (values[kept] >= values[i]).all(axis=1).any():
+            kept.append(i)
+    return np.array(kept, dtype=int)
+
+
+class SweepTracker:
+    """
+    Incremental best-k tables and Pareto front of streamed sweep results.
+
+    Parameters:
+        k (int): rows kept per metric.
+        metrics (list): metrics ranked (larger is better).
+        pareto_metrics (tuple): metrics of the Pareto front.
+        snapshot_path (str or Path): where save() writes the snapshot.
+    """
+
+    def __init__(self, k=3, metrics=METRICS, pareto_metrics=PARETO_METRICS, snapshot_path=SNAPSHOT_PATH):
+        self.k = k
+        self.metrics = list(metrics)
+        self.pareto_metrics = list(pareto_metrics)
+        self.snapshot_path = Path(snapshot_path)
+        self.rows_seen = 0
+        self.started = time.time()
+        self._heaps = {metric: [] for metric in self.metrics}
+        self._front = pd.DataFrame()
+
+    def update(self, rows):
+        """Add a chunk of raw COMSOL result rows (derived metrics are added when missing)."""
+        if rows.empty:
+            return
+        rows = rows.copy()
+        rows.columns = rows.columns.str.strip()
+        # IDs are CSV row positions, so they are assigned before failed runs are dropped
+        rows.insert(0, 'Config_ID', np.arange(self.rows_seen, self.rows_seen + len(rows)))
+        self.rows_seen += len(rows)
+        if not set(self.metrics) <= set(rows.columns):
+            rows = add_derived_metrics(rows)
+        rows = rows.dropna(subset=self.metrics)
+        keep = ['Config_ID'] + INPUT_COLS + [c for c in (VOC_COL, VN_COL) if c in rows] + self.metrics
+
+        for metric, heap in self._heaps.items():
+            # Only the chunk's own best k can enter the heap
+            for _, row in rows.nlargest(self.k, metric)[keep].iterrows():
+                item = (row[metric], int(row['Config_ID']), row.to_dict())
+                if len(heap) < self.k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+
+        # Merge the chunk's own front with the current one
+        chunk = rows[keep].iloc[pareto_front(rows[self.pareto_metrics].to_numpy())]
+        merged = pd.concat([self._front, chunk], ignore_index=True)
+        self._front = merged.iloc[pareto_front(merged[self.pareto_metrics].to_numpy())].reset_index(drop=True)
+
+    def top(self, metric):
+        """Best rows for one metric, best first."""
+        return pd.DataFrame([row for _, _, row in sorted(self._heaps[metric], reverse=True)])
+
+    @property
+    def pareto(self):
+        return self._front.sort_values(self.pareto_metrics[0], ascending=False)
+
+    def snapshot(self):
+        return {
+            'rows_seen': self.rows_seen,
+            'started': self.started,
+            'updated': time.time(),
+            'k': self.k,
+            'top': {metric: self.top(metric).to_dict(orient='records') for metric in self.metrics},
+            'pareto_metrics': self.pareto_metrics,
+            'pareto': self.pareto.to_dict(orient='records'),
+        }
+
+    def save(self, path=None):
+        """Write the snapshot atomically, so a polling reader never sees a partial file."""
+        path = Path(path or self.snapshot_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+        return path
+
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """Snapshot dict with its tables as DataFrames, or None when no sweep is tracked."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    snapshot = json.loads(path.read_text())
+    snapshot['top'] = {metric: pd.DataFrame(rows) for metric, rows in snapshot['top'].items()}
+    snapshot['pareto'] = pd.DataFrame(snapshot['pareto'])
+    return snapshot
+
+
+def follow_csv(path, poll=2.0, idle_timeout=None):
+    """
+    Yield DataFrames of the complete rows appended to a growing CSV.
+
+    Parameters:
+        path (str or Path): results CSV (the header must already be written).
+        poll (float): seconds between checks; None reads what is there and stops.
+        idle_timeout (float): stop after this many seconds without new rows.
+    """
+    with open(path, 'r', newline='') as f:
+        header = f.readline()
+        pending = ''
+        last_data = time.monotonic()
+        while True:
+            pending += f.read()
+            # Keep a trailing partial line for the next poll
+            complete, _, pending = pending.rpartition('\n')
+            if complete:
+                last_data = time.monotonic()
+                yield pd.read_csv(io.StringIO(header + complete + '\n'))
+            if poll is None or (idle_timeout is not None and time.monotonic() - last_data > idle_timeout):
+                return
+            time.sleep(poll)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('results', help='COMSOL results CSV (possibly still being written)')
+    parser.add_argument('--snapshot', default=str(SNAPSHOT_PATH))
+    parser.add_argument('-k', type=int, default=3, help='rows kept per metric')
+    parser.add_argument('--follow', action='store_true', help='keep polling for appended rows')
+    parser.add_argument('--poll', type=float, default=2.0, help='seconds between polls')
+    parser.add_argument('--idle-timeout', type=float, default=None, help='stop following after this many idle seconds')
+    args = parser.parse_args()
+
+    tracker = SweepTracker(k=args.k, snapshot_path=args.snapshot)
+    try:
+        for chunk in follow_csv(args.results, args.poll if args.follow else None, args.idle_timeout):
+            tracker.update(chunk)
+            tracker.save()
+            best = tracker.top('PDmax').iloc[0]
+            print(f"{tracker.rows_seen} rows: best PDmax {best['PDmax']:.2f} W/m² (config {best['Config_ID']}), "
+                  f"{len(tracker.pareto)} Pareto-optimal configurations")
+    except KeyboardInterrupt:
+        pass
+    print(f"Snapshot saved: {args.snapshot}")
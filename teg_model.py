@@ -0,0 +1,241 @@
+"""Vectorized TEG couple models shared by the pages and the offline tools.
+
+The analytic model is the one used on the "TEG Module" page (PbTe n-leg,
+SnSe p-leg, matched load), written so that every argument broadcasts with
+NumPy. The surrogate wraps the network trained by ANN_dataset/export_model.py.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# PbTe / SnSe couple at 323 K, as on the TEG Module page
+PBTE_SNSE = {
+    'S_p': 357e-6,      # SnSe Seebeck coefficient (V/K)
+    'S_n': -231e-6,     # PbTe Seebeck coefficient (V/K)
+    'sigma_p': 117.0,   # SnSe electrical conductivity (S/m)
+    'sigma_n': 22500.0, # PbTe electrical conductivity (S/m)
+    'kappa_p': 0.88,    # SnSe thermal conductivity (W/mK)
+    'kappa_n': 2.17,    # PbTe thermal conductivity (W/mK)
+    'A_p': 10e-6,       # leg cross-section (m^2)
+    'A_n': 10e-6,
+    'L': 5e-3,          # leg length (m)
+    'rho_c': 0.0,       # contact resistivity (ohm.m^2)
+}
+DESIGN_PARAMS = list(PBTE_SNSE)
+
+# Surrogate inputs and outputs, in the order used by export_model.py
+SURROGATE_INPUTS = ['H_Copper (mm)', 'H_leg (mm)', 'Width_leg_p (mm)', 'Width_leg_n (mm)', 'Delta_T (K)', 'rho_c']
+SURROGATE_OUTPUTS = ['Power Output (Watts)', 'Voltage (V)']
+# The network only knows the ranges of its training set, TEG_data.csv (SurrogateModel.domain):
+# Delta_T 300 to 598 K, leg widths up to 2 mm. That file records rho_c without a unit and
+# its values (0.012 to 4.1) are not Ω·m², so rho_c is passed to the surrogate as it
+# appears in TEG_data.csv; there is no known conversion from the COMSOL sweep's Ω·m².
+
+# Copper interconnects of the COMSOL unicouple
+SIGMA_CU = 5.96e7   # S/m
+KAPPA_CU = 400.0    # W/mK
+T_COLD_COMSOL = 300.0
+ANN_DIR = Path(__file__).resolve().parent / 'ANN_dataset'
+
+
+def couple_performance(T_hot, T_cold, S_p=PBTE_SNSE['S_p'], S_n=PBTE_SNSE['S_n'],
+                       sigma_p=PBTE_SNSE['sigma_p'], sigma_n=PBTE_SNSE['sigma_n'],
+                       kappa_p=PBTE_SNSE['kappa_p'], kappa_n=PBTE_SNSE['kappa_n'],
+                       A_p=PBTE_SNSE['A_p'], A_n=PBTE_SNSE['A_n'], L=PBTE_SNSE['L'],
+                       rho_c=PBTE_SNSE['rho_c'], R_ic=0.0, R_load=None):
+    """
+    Evaluate a p-n couple with constant properties.
+
+    All arguments broadcast against each other, so a (n_designs, 1) column of
+    design parameters against a (1, n_samples) row of temperatures gives a
+    full (n_designs, n_samples) table in one call. Without R_load the load is
+    matched to the internal resistance (maximum power). R_ic is any extra
+    series resistance, e.g. the interconnects.
+
+    Returns:
+        dict: voc (V), r_int (ohm), current (A), voltage (V), power (W),
+        q_hot (W) and efficiency arrays.
+    """
+    T_hot = np.asarray(T_hot, dtype=float)
+    T_cold = np.asarray(T_cold, dtype=float)
+    delta_T = T_hot - T_cold
+    alpha = S_p - S_n
+
+    # Leg resistances plus the two contact layers on each leg
+    R_int = L / (sigma_p * A_p) + L / (sigma_n * A_n) + 2 * rho_c * (1 / A_p + 1 / A_n) + R_ic
+    K = (kappa_p * A_p + kappa_n * A_n) / L
+    if R_load is None:
+        R_load = R_int
+
+    V_oc = alpha * delta_T
+    I = V_oc / (R_int + R_load)
+    P = I**2 * R_load
+    # Heat drawn from the hot side: conduction + Peltier - half the Joule heat
+    Q_hot = K * delta_T + alpha * I * T_hot - 0.5 * I**2 * R_int
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = np.where(Q_hot > 0, P / Q_hot, 0.0)
+
+    return {
+        'voc': V_oc,
+        'r_int': R_int * np.ones_like(V_oc),
+        'current': I,
+        'voltage': I * R_load,
+        'power': P,
+        'q_hot': Q_hot,
+        'efficiency': efficiency,
+    }
+
+
+def load_sweep(V_oc, R_int, n_points=500, low=0.01, high=10.0):
+    """
+    Voltage, current and power over a load-resistance sweep (TEG Module page).
+
+    V_oc and R_int may be arrays of couples; the sweep runs along a new last
+    axis from low * R_int to high * R_int.
+
+    Returns:
+        dict: R_L, current, voltage and power arrays, plus the index of maximum power.
+    """
+    V_oc = np.asarray(V_oc, dtype=float)[..., None]
+    R_int = np.asarray(R_int, dtype=float)[..., None]
+    R_L = R_int * np.linspace(low, high, n_points)
+    I = V_oc / (R_int + R_L)
+    P = I**2 * R_L
+    return {'R_L': R_L, 'current': I, 'voltage': I * R_L, 'power': P, 'best': P.argmax(axis=-1)}
+
+
+def max_efficiency(T_hot, T_cold, ZT):
+    """Maximum conversion efficiency for a mean ZT (TEG Module page formula)."""
+    T_hot = np.asarray(T_hot, dtype=float)
+    T_cold = np.asarray(T_cold, dtype=float)
+    sqrt_term = np.sqrt(1 + np.asarray(ZT, dtype=float))
+    return ((T_hot - T_cold) / T_hot) * ((sqrt_term - 1) / (sqrt_term + T_cold / T_hot))
+
+
+def unicouple_performance(LHT, HIC, w_p, w_n, FF, rho_c, Th, Tc=T_COLD_COMSOL, **materials):
+    """
+    Reduced-order model of the COMSOL unicouple (5000-simulation page).
+
+    Takes the sweep parameters in their sweep units (mm, Ω·m², K): square legs
+    of width w_p / w_n and height LHT, copper interconnects of height HIC on
+    both ends and a top bridge whose length follows from the fill factor.
+    Material properties default to the PbTe/SnSe couple and can be overridden
+    with the couple_performance keywords. Everything broadcasts.
+
+    Returns:
+        dict: couple_performance outputs plus pd_max (W/m² of leg area) and
+        the junction temperatures T_hot_leg / T_cold_leg.
+    """
+    props = {k: materials.get(k, PBTE_SNSE[k]) for k in ('S_p', 'S_n', 'sigma_p', 'sigma_n', 'kappa_p', 'kappa_n')}
+    L = np.asarray(LHT, dtype=float) * 1e-3
+    h = np.asarray(HIC, dtype=float) * 1e-3
+    w_p = np.asarray(w_p, dtype=float) * 1e-3
+    w_n = np.asarray(w_n, dtype=float) * 1e-3
+    A_p, A_n = w_p**2, w_n**2
+
+    # Share of the applied gradient that drops over the legs rather than the copper
+    kappa_leg = 0.5 * (props['kappa_p'] + props['kappa_n'])
+    leg_fraction = (L / kappa_leg) / (L / kappa_leg + 2 * h / KAPPA_CU)
+    delta_T = np.asarray(Th, dtype=float) - Tc
+    T_hot_leg = Th - 0.5 * (1 - leg_fraction) * delta_T
+    T_cold_leg = Tc + 0.5 * (1 - leg_fraction) * delta_T
+
+    # Copper: a pad under each leg plus the top bridge spanning one cell pitch
+    pitch = np.sqrt((A_p + A_n) / FF)
+    R_ic = 2 * h / SIGMA_CU * (1 / A_p + 1 / A_n) + pitch / (SIGMA_CU * h * np.maximum(w_p, w_n))
+
+    result = couple_performance(T_hot_leg, T_cold_leg, A_p=A_p, A_n=A_n, L=L,
+                                rho_c=rho_c, R_ic=R_ic, **props)
+    result['pd_max'] = result['power'] / (A_p + A_n)
+    result['T_hot_leg'] = T_hot_leg
+    result['T_cold_leg'] = T_cold_leg
+    return result
+
+
+def design_columns(designs, params=None):
+    """
+    Turn a table of designs into broadcastable (n_designs, 1) columns.
+
+    Parameters missing from the table fall back to the PbTe/SnSe defaults.
+    """
+    designs = pd.DataFrame(designs)
+    params = params or DESIGN_PARAMS
+    columns = {}
+    for name in params:
+        if name in designs.columns:
+            values = designs[name].to_numpy(dtype=float)
+        else:
+            values = np.full(len(designs), PBTE_SNSE[name])
+        columns[name] = values[:, None]
+    return columns
+
+
+def build_network(input_dim=6, output_dim=2):
+    """Layer stack of TEGModel in export_model.py (2 x 64 ReLU)."""
+    import torch
+
+    return torch.nn.Sequential(
+        torch.nn.Linear(input_dim, 64),
+        torch.nn.ReLU(),
+        torch.nn.Linear(64, 64),
+        torch.nn.ReLU(),
+        torch.nn.Linear(64, output_dim)
+    )
+
+
+def surrogate_domain(data_path=ANN_DIR / 'TEG_data.csv'):
+    """Training-data range (min, max) of every surrogate input; predictions outside it are extrapolation."""
+    X = pd.read_csv(data_path, usecols=SURROGATE_INPUTS)[SURROGATE_INPUTS]
+    return pd.DataFrame({'min': X.min(), 'max': X.max()})
+
+
+class SurrogateModel:
+    """Batched inference wrapper around the exported TEG network and its scalers."""
+
+    def __init__(self, model_path=ANN_DIR / 'teg_ann_model.pt',
+                 scaler_X_path=ANN_DIR / 'teg_ann_scaler_X.pkl',
+                 scaler_y_path=ANN_DIR / 'teg_ann_scaler_y.pkl',
+                 data_path=ANN_DIR / 'TEG_data.csv'):
+        import joblib
+        import torch
+
+        self._torch = torch
+        self.scaler_X = joblib.load(scaler_X_path)
+        self.scaler_y = joblib.load(scaler_y_path)
+        # TEGModel keeps its layers under `network.`; load them into the bare stack
+        state = torch.load(model_path, map_location='cpu')
+        self.model = build_network()
+        self.model.load_state_dict({k.replace('network.', '', 1): v for k, v in state.items()})
+        self.model.eval()
+
+        # export_model.py rescales the standardized inputs to [0, 1] using the
+        # training-set extremes, which are not saved; rebuild them from the data.
+        X = pd.read_csv(data_path, usecols=SURROGATE_INPUTS)[SURROGATE_INPUTS].to_numpy()
+        X_scaled = self.scaler_X.transform(X)
+        self.X_min = X_scaled.min(axis=0)
+        self.X_max = X_scaled.max(axis=0)
+        self.domain = surrogate_domain(data_path)
+
+    def in_domain(self, X, per_input=False):
+        """
+        Which rows of X (ordered as SURROGATE_INPUTS) lie inside the training-data ranges.
+
+        Returns:
+            ndarray: bool (n,), or (n, d) with per_input=True.
+        """
+        X = np.asarray(X, dtype=float).reshape(-1, len(SURROGATE_INPUTS))
+        inside = (X >= self.domain['min'].to_numpy()) & (X <= self.domain['max'].to_numpy())
+        return inside if per_input else inside.all(axis=1)
+
+    def predict(self, X, batch_size=65536):
+        """Predict power (W) and voltage (V) for rows ordered as SURROGATE_INPUTS."""
+        X = np.asarray(X, dtype=float).reshape(-1, len(SURROGATE_INPUTS))
+        out = np.empty((len(X), len(SURROGATE_OUTPUTS)))
+        with self._torch.no_grad():
+            for start in range(0, len(X), batch_size):
+                batch = self.scaler_X.transform(X[start:start + batch_size])
+                batch = (batch - self.X_min) / (self.X_max - self.X_min)
+                y = self.model(self._torch.as_tensor(batch, dtype=self._torch.float32)).numpy()
+                out[start:start + batch_size] = self.scaler_y.inverse_transform(y)
+        return out
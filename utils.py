@@ -1,30 +1,210 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
-from PIL import Image
 
-# Cache data loading functions
-@st.cache_data
+# Timing records: (unix time, page, name, seconds, cache outcome). The deque is
+# bounded, appends are thread-safe, and nothing is aggregated until the
+# diagnostics page asks for it.
+TIMING_BUFFER_SIZE = 10000
+_timings = deque(maxlen=TIMING_BUFFER_SIZE)
+_local = threading.local()  # per script-run thread: current page, last cache outcome
+
+
+def _record_timing(name, seconds, cache=None):
+    _timings.append((time.time(), getattr(_local, 'page', None), name, seconds, cache))
+
+
+@contextmanager
+def timer(name):
+    """Record how long the enclosed block takes."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_timing(name, time.perf_counter() - start)
+
+
+def timed(name=None, cache=False):
+    """
+    Decorator recording call latency under `name` (default: the function name).
+
+    With cache=True the function is also wrapped in st.cache_data (or in
+    st.cache_resource with cache='resource', for shared unpicklable objects),
+    and every call is recorded as a cache 'hit' or 'miss' depending on
+    whether the body ran.
+    """
+    def decorator(func):
+        label = name or func.__name__
+        if cache:
+            @functools.wraps(func)
+            def body(*args, **kwargs):
+                _local.cache_miss = True
+                return func(*args, **kwargs)
+            target = (st.cache_resource if cache == 'resource' else st.cache_data)(body)
+        else:
+            target = func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Nested timed calls get their own flag; the caller's is restored afterwards
+            outer_miss = getattr(_local, 'cache_miss', False)
+            _local.cache_miss = False
+            start = time.perf_counter()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                outcome = ('miss' if _local.cache_miss else 'hit') if cache else None
+                _record_timing(label, time.perf_counter() - start, outcome)
+                _local.cache_miss = outer_miss
+
+        if cache:
+            wrapper.clear = target.clear
+        return wrapper
+    return decorator
+
+
+def start_page_timer(page):
+    """Mark the start of a page run; later timings are attributed to this page."""
+    _local.page = page
+    _local.page_start = time.perf_counter()
+
+
+def stop_page_timer():
+    """Record the time since start_page_timer as the page's render time."""
+    start = getattr(_local, 'page_start', None)
+    if start is not None:
+        _record_timing('page render', time.perf_counter() - start)
+        _local.page_start = None
+
+
+def timing_records():
+    """Snapshot of the timing buffer as a DataFrame."""
+    return pd.DataFrame(list(_timings), columns=['time', 'page', 'name', 'seconds', 'cache'])
+
+
+def timing_summary(records=None):
+    """Call counts, cache hits/misses and latency percentiles (ms) per page and function."""
+    records = timing_records() if records is None else records
+    if records.empty:
+        return pd.DataFrame()
+    records = records.assign(page=records['page'].fillna('-'), ms=records['seconds'] * 1e3)
+    grouped = records.groupby(['page', 'name'])
+    summary = grouped['ms'].describe(percentiles=[0.5, 0.9, 0.99])[['count', '50%', '90%', '99%', 'max']]
+    summary.columns = ['calls', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms']
+    summary['hits'] = grouped['cache'].apply(lambda c: (c == 'hit').sum())
+    summary['misses'] = grouped['cache'].apply(lambda c: (c == 'miss').sum())
+    return summary.reset_index()
+
+
+def cache_memory_stats():
+    """Bytes held per Streamlit cache (st.cache_data / st.cache_resource / session state)."""
+    try:
+        from streamlit.runtime import Runtime
+        stats = Runtime.instance().stats_mgr.get_stats()
+    except Exception:
+        return pd.DataFrame(columns=['category', 'cache', 'bytes', 'entries'])
+    # Newer Streamlit groups stats by metric family, older versions return a flat list
+    stats = [s for family in stats.values() for s in family] if isinstance(stats, dict) else stats
+    rows = [(s.category_name, s.cache_name, s.byte_length) for s in stats if hasattr(s, 'byte_length')]
+    df = pd.DataFrame(rows, columns=['category', 'cache', 'bytes'])
+    return df.groupby(['category', 'cache'], as_index=False).agg(bytes=('bytes', 'sum'), entries=('bytes', 'size'))
+
+
+# Data files served from the shared column store
+DATA_FILES = {
+    'comsol': Path('ANN_dataset/comsol_results_with_efficiency.csv'),
+    'teg': Path('ANN_dataset/TEG_data.csv'),
+}
+
+
+@timed(cache='resource')
+def shared_table(name):
+    """Read-only memory-mapped ColumnStore of one DATA_FILES table, one per process for all sessions."""
+    from shared_data import ColumnStore
+
+    return ColumnStore(DATA_FILES[name])
+
+@timed()
 def load_comsol_data():
-    """Load COMSOL simulation results."""
+    """Load COMSOL simulation results (zero-copy view on the shared store)."""
     try:
-        return pd.read_csv('ANN_dataset/comsol_results_with_efficiency.csv')
+        return shared_table('comsol').frame()
     except FileNotFoundError:
         st.error("COMSOL results file not found. Please ensure the file exists in the ANN_dataset directory.")
         return None
 
-@st.cache_data
+@timed()
 def load_teg_data():
-    """Load TEG parameter data."""
+    """Load TEG parameter data (zero-copy view on the shared store)."""
     try:
-        return pd.read_csv('ANN_dataset/TEG_data.csv')
+        return shared_table('teg').frame()
     except FileNotFoundError:
         st.error("TEG data file not found. Please ensure the file exists in the ANN_dataset directory.")
         return None
 
+@timed(cache='resource')
+def dataset_aggregates(name):
+    """Histogram pyramids and statistics of one DATA_FILES table, computed once per process."""
+    from aggregates import DatasetAggregates
+
+    return DatasetAggregates(shared_table(name))
+
+@timed(cache='resource')
+def job_queue():
+    """Background job queue (bounded process pool) shared by all sessions."""
+    from jobs import JobQueue
+
+    return JobQueue()
+
+@timed(cache='resource')
+def load_config_index():
+    """KD-tree over the COMSOL sweep configurations, shared by all sessions."""
+    from nearest_configs import ConfigIndex
+
+    return ConfigIndex()
+
+@timed(cache=True)
+def snapshot_artifacts(task, stamp=None):
+    """
+    Artifacts of one task's current snapshot; `stamp` (precompute.snapshot_stamp) keys the cache
+    to the manifest and the task's inputs. Raises LookupError, which is not cached, when there is none.
+    """
+    from precompute import read_task
+
+    artifacts = read_task(task)
+    if artifacts is None:
+        raise LookupError(f"No current snapshot of {task}")
+    return artifacts
+
+@timed()
+def load_snapshot(task):
+    """Artifacts precomputed by precompute.py for one task, or None when missing or out of date."""
+    from precompute import snapshot_stamp
+
+    try:
+        return snapshot_artifacts(task, snapshot_stamp(task))
+    except LookupError:
+        return None
+
+@timed(cache=True)
+def material_operating_windows(delta_T=100.0, T_cold_min=0.0, T_hot_max=2000.0, zt='midpoint'):
+    """Best temperature window of every estm material (delta_T=None also optimizes ΔT)."""
+    from operating_window import optimal_windows
+    from precompute import OPERATING_WINDOW_DEFAULTS
+
+    inputs = {'delta_T': delta_T, 'T_cold_min': T_cold_min, 'T_hot_max': T_hot_max, 'zt': zt}
+    snapshot = load_snapshot('operating_windows') if inputs == OPERATING_WINDOW_DEFAULTS else None
+    return snapshot['windows'] if snapshot is not None else optimal_windows(**inputs)
+
 def create_interactive_plot(df, x_col, y_col, title, color_col=None):
     """Create an interactive Plotly plot."""
     fig = px.scatter(
@@ -44,6 +224,24 @@ def create_interactive_plot(df, x_col, y_col, title, color_col=None):
     )
     return fig
 
+def create_histogram_plot(hist, title, x_label, log_x=False):
+    """Bar chart of precomputed histogram bins (aggregates.DatasetAggregates.histogram)."""
+    left, right = hist['left'].to_numpy(), hist['right'].to_numpy()
+    if log_x:
+        # Log-spaced bins are drawn with equal widths in log10 units
+        left, right = np.log10(left), np.log10(right)
+        x_label = f"log10 {x_label}"
+    fig = go.Figure(go.Bar(x=0.5 * (left + right), y=hist['count'], width=right - left, marker_line_width=0))
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        xaxis_title=x_label,
+        yaxis_title='Count',
+        bargap=0,
+        template='plotly_white'
+    )
+    return fig
+
 def format_number(value, decimals=2):
     """Format number with specified decimal places."""
     return f"{value:,.{decimals}f}"
@@ -79,10 +277,18 @@ def display_metric_card(title, value, unit="", delta=None):
         delta=delta_str
     )
 
-def load_image(image_path):
-    """Load and display an image with error handling."""
+@timed(cache=True)
+def image_derivative(image_path, width=None, modified=None):
+    """Bytes of an image resized for display at `width` CSS pixels (image_assets); `modified` keys the cache to the source's mtime."""
+    from image_assets import derivative
+
+    return derivative(image_path, width).read_bytes()
+
+@timed()
+def load_image(image_path, width=None):
+    """Load an image resized for display at `width` CSS pixels (full width by default), with error handling."""
     try:
-        return Image.open(image_path)
+        return image_derivative(str(image_path), width, Path(image_path).stat().st_mtime)
     except FileNotFoundError:
         st.error(f"Image not found: {image_path}")
         return None
@@ -90,12 +296,44 @@ def load_image(image_path):
         st.error(f"Error loading image: {str(e)}")
         return None
 
-def create_download_button(df, filename, button_text):
-    """Create a download button for dataframes."""
-    csv = df.to_csv(index=False)
+def show_image(image_path, width=None, caption=None, container=st):
+    """Display the resized derivative of an image at `width` CSS pixels, or stretched to the container."""
+    image = load_image(image_path, width)
+    if image is not None:
+        container.image(image, caption=caption, width=width or 'stretch')
+
+def create_download_button(df, filename, button_text, fmt='csv', key=None):
+    """
+    Create a download button for dataframes.
+
+    The export is only written when the button is clicked, in chunks, and is
+    cached on disk by a hash of the data (exports.export_file), so rendering
+    the button costs nothing even for large tables.
+
+    Parameters:
+        fmt (str): 'csv', 'csv.gz' or 'parquet'.
+        key (str): widget key, needed when one page offers the same file name twice.
+    """
+    from exports import FORMATS, export_file
+
     st.download_button(
         label=button_text,
-        data=csv,
+        data=lambda: export_file(df, fmt).read_bytes(),
         file_name=filename,
-        mime='text/csv'
-    ) 
\ No newline at end of file
+        mime=FORMATS[fmt][1],
+        key=key or f"download_{fmt}_{filename}"
+    )
+
+def create_file_download_button(path, filename, button_text, mime='application/octet-stream', key=None):
+    """Create a download button for a file, read only when clicked (disabled if the file is missing)."""
+    path = Path(path)
+    missing = not path.is_file()
+    st.download_button(
+        label=button_text,
+        data=b'' if missing else path.read_bytes,
+        file_name=filename,
+        mime=mime,
+        key=key or f"download_{path}_{filename}",
+        disabled=missing,
+        help=f"{path} is not included in this deployment" if missing else None
+    )